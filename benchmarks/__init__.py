@@ -0,0 +1 @@
+"""Performance benchmarks for VoiceKeyboard (run as ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,346 @@
+"""Benchmark suite for the speech-to-text hot path.
+
+Runs offline with the ``stub`` ASR backend and an energy-based VAD, so it
+measures the app's own code rather than the models:
+
+- ``ring_buffer``: :class:`~voicekeyboard.stt.RingBuffer` append + concat
+- ``audio_callback``: the PortAudio callback's stereo downmix into the ring
+- ``stream_throughput``: ``processAudioStream`` over a recording, per chunk size
+- ``queue_latency``: :class:`~voicekeyboard.pipeline.StageQueue` put -> get
+- ``end_to_end``: last voiced sample fed to text emitted, with audio paced in
+  real time
+
+``--real WAV`` adds a tier that decodes a speech recording with the
+configured faster-whisper and VAD models (skipped when they cannot be
+loaded); the real-model throughput includes stopping the stages.
+``--output`` stores the results as JSON and ``--compare`` reports the change
+against an earlier file, exiting non-zero when a metric regressed by more
+than ``--threshold``.
+
+Run with ``python -m benchmarks.bench_pipeline`` from the repository root.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy
+
+from benchmarks.bench_ring_buffer import BLOCK_DURATION, _measure
+from voicekeyboard.asr import StubBackend
+from voicekeyboard.pipeline import StageQueue
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import RingBuffer, SpeechConverter, StreamingVad, vad_frame_samples
+
+RATE = 16000
+CHUNK_SIZES_MS = (10, 32, 100, 1000)
+# Speech/silence pattern (seconds) of the synthetic recording
+PATTERN = ((0.5, 0.0), (1.5, 0.5), (0.6, 0.0), (2.0, 0.5), (0.6, 0.0))
+
+Metrics = Dict[str, Dict[str, Any]]
+
+
+def _metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(float(value), 3), "unit": unit, "better": better}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(numpy.percentile(numpy.asarray(values), q)) if values else 0.0
+
+
+def synthetic_recording(repeats: int = 1) -> numpy.ndarray:
+    """Alternating silence and constant-level "speech" at 16 kHz."""
+    parts = [numpy.full(int(s * RATE), v, dtype=numpy.float32) for s, v in PATTERN]
+    return numpy.concatenate(parts * repeats)
+
+
+def _energy_vad() -> StreamingVad:
+    frame = vad_frame_samples(RATE)
+    assert frame is not None
+    return StreamingVad(
+        lambda f: 1.0 if float(numpy.abs(f).mean()) > 0.1 else 0.0,
+        RATE,
+        frame,
+        threshold=settings.vadThreshold,
+        min_silence_ms=settings.vadMinSilenceMs,
+        speech_pad_ms=settings.vadSpeechPadMs,
+        min_speech_ms=settings.vadMinSpeechMs,
+    )
+
+
+def stub_converter() -> SpeechConverter:
+    """A SpeechConverter wired to the stub ASR backend and an energy VAD."""
+    sc = SpeechConverter()
+    sc.dry_run = False
+    sc.asr = StubBackend(sample_rate=RATE)
+    sc.asr.load()
+    sc.vadModel = object()
+    sc.vad = _energy_vad()
+    return sc
+
+
+def real_converter() -> SpeechConverter:
+    """A SpeechConverter with the configured models; raises if they cannot load."""
+    sc = SpeechConverter()
+    sc.dry_run = False
+    sc._ensure_models_loaded()
+    if sc.asr is None or sc.vad is None:
+        raise RuntimeError("models unavailable (see log)")
+    return sc
+
+
+def bench_ring_buffer() -> Metrics:
+    metrics: Metrics = {}
+    for rate in (16000, 48000):
+        block = numpy.random.default_rng(0).standard_normal(int(rate * BLOCK_DURATION))
+        result = _measure(RingBuffer(rate * 2), block.astype(numpy.float32))
+        metrics[f"ring_buffer.{rate}.append_concat"] = _metric(result["us_per_append"], "us")
+        metrics[f"ring_buffer.{rate}.peak_alloc"] = _metric(result["peak_alloc_bytes"], "bytes")
+    return metrics
+
+
+def bench_audio_callback(iterations: int = 5000) -> Metrics:
+    sc = SpeechConverter()
+    frames = sc._capture_block_frames()
+    stereo = numpy.random.default_rng(0).standard_normal((frames, 2)).astype(numpy.float32)
+    mono = stereo[:, :1].copy()
+    # Drain well before the capture ring fills; the read is the consumer's cost
+    drain_every = max(1, sc.captureRing.capacity // frames // 2)
+    metrics: Metrics = {}
+    for name, block in (("stereo", stereo), ("mono", mono)):
+        elapsed = 0.0
+        for i in range(iterations):
+            started = time.perf_counter()
+            sc.audioCallback(block, frames, None, None)
+            elapsed += time.perf_counter() - started
+            if i % drain_every == 0:
+                sc.captureRing.read()
+        metrics[f"audio_callback.{name}"] = _metric(elapsed / iterations * 1e6, "us")
+    return metrics
+
+
+def _run_stream(
+    sc: SpeechConverter, audio: numpy.ndarray, chunk: int, expected: Optional[int]
+) -> float:
+    """Push ``audio`` through processAudioStream in ``chunk``-sample blocks.
+
+    Returns the wall seconds until ``expected`` texts were emitted (stage
+    shutdown not timed) or, with ``expected=None``, until the stages have
+    drained and stopped.
+    """
+    emitted: List[str] = []
+    done = threading.Event()
+
+    def record(text: str) -> None:
+        emitted.append(text)
+        if expected is not None and len(emitted) >= expected:
+            done.set()
+
+    sc._emit_text = record  # type: ignore[method-assign]
+    sc.audioQueue = StageQueue(64, "block", name="audio")
+    sc._process_flag = [True]
+    thread = threading.Thread(target=sc.processAudioStream, daemon=True)
+    started = time.perf_counter()
+    thread.start()
+    for start in range(0, audio.shape[0], chunk):
+        sc.audioQueue.put(audio[start : start + chunk])
+    if expected is not None and not done.wait(timeout=60):
+        raise RuntimeError(f"pipeline emitted {len(emitted)} of {expected} texts")
+    # Stopping before the VAD stage took the first block would discard the queue
+    while not sc.audioQueue.empty():
+        time.sleep(0.001)
+    sc._process_flag[0] = False
+    if expected is not None:
+        elapsed = time.perf_counter() - started
+        thread.join()
+        return elapsed
+    thread.join()
+    return time.perf_counter() - started
+
+
+def bench_stream_throughput(
+    factory: Callable[[], SpeechConverter], audio: numpy.ndarray, expected: Optional[int]
+) -> Metrics:
+    """Seconds of audio processed per wall second, for each chunk size."""
+    seconds = audio.shape[0] / RATE
+    metrics: Metrics = {}
+    sc = factory()
+    for chunk_ms in CHUNK_SIZES_MS:
+        elapsed = _run_stream(sc, audio, int(RATE * chunk_ms / 1000), expected)
+        metrics[f"stream_throughput.{chunk_ms}ms"] = _metric(seconds / elapsed, "x", "higher")
+    return metrics
+
+
+def bench_queue_latency(items: int = 5000) -> Metrics:
+    queue = StageQueue(256, "block")
+    latencies: List[float] = []
+
+    def consume() -> None:
+        for _ in range(items):
+            sent = queue.get()
+            latencies.append(time.perf_counter() - sent)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    for _ in range(items):
+        queue.put(time.perf_counter())
+        # A producer paced like the capture thread, not a tight loop
+        time.sleep(0)
+    consumer.join()
+    us = [value * 1e6 for value in latencies]
+    return {
+        "queue_latency.p50": _metric(_percentile(us, 50), "us"),
+        "queue_latency.p99": _metric(_percentile(us, 99), "us"),
+    }
+
+
+def bench_end_to_end(
+    factory: Callable[[], SpeechConverter], speech: numpy.ndarray, utterances: int
+) -> Metrics:
+    """Latency from feeding the last sample of ``speech`` to its last text being emitted.
+
+    ``speech`` is followed by silence and fed in capture-sized blocks at
+    real-time pace, so the figure includes the VAD's end-of-speech silence
+    (``vadMinSilenceMs``).
+    """
+    sc = factory()
+    emitted: List[float] = []
+
+    def record(text: str) -> None:
+        if text:
+            emitted.append(time.perf_counter())
+
+    sc._emit_text = record  # type: ignore[method-assign]
+    block = sc._capture_block_frames()
+    silence = numpy.zeros(int(RATE * 1.5), dtype=numpy.float32)
+    last_fed: List[float] = []
+    sc._process_flag = [True]
+    thread = threading.Thread(target=sc.processAudioStream, daemon=True)
+    thread.start()
+    clock = time.perf_counter()
+    for _ in range(utterances):
+        for part in (speech, silence):
+            for start in range(0, part.shape[0], block):
+                sc.audioQueue.put(part[start : start + block])
+                clock += block / RATE
+                time.sleep(max(0.0, clock - time.perf_counter()))
+            if part is speech:
+                last_fed.append(time.perf_counter())
+    sc._process_flag[0] = False
+    thread.join()
+    latencies: List[float] = []
+    for i, fed in enumerate(last_fed):
+        following = last_fed[i + 1] if i + 1 < len(last_fed) else float("inf")
+        texts = [t for t in emitted if fed <= t < following]
+        if texts:
+            latencies.append((max(texts) - fed) * 1000)
+    if not latencies:
+        raise RuntimeError("pipeline emitted no text")
+    return {
+        "end_to_end.p50": _metric(_percentile(latencies, 50), "ms"),
+        "end_to_end.max": _metric(max(latencies), "ms"),
+    }
+
+
+def _load_speech(path: str) -> numpy.ndarray:
+    from voicekeyboard.offline import LinearResampler, read_blocks, wav_format
+
+    fmt = wav_format(path)
+    resampler = LinearResampler(fmt.sample_rate, RATE)
+    blocks = [resampler.process(block) for block in read_blocks(path, fmt, fmt.sample_rate)]
+    return numpy.concatenate(blocks).astype(numpy.float32, copy=False)
+
+
+def run(quick: bool = False, real_audio: Optional[str] = None) -> Metrics:
+    """Run every benchmark; ``real_audio`` (a speech WAV) enables the real-model tier."""
+    settings.audioSampleRate = RATE
+    settings.whisperStreamingDecode = False
+    recording = synthetic_recording(2 if quick else 10)
+    # Every voiced part is followed by enough silence to close it
+    utterances = sum(1 for _seconds, level in PATTERN if level) * (2 if quick else 10)
+    results: Metrics = {}
+    results.update(bench_ring_buffer())
+    results.update(bench_audio_callback(1000 if quick else 5000))
+    results.update(bench_stream_throughput(stub_converter, recording, utterances))
+    results.update(bench_queue_latency(1000 if quick else 5000))
+    speech = numpy.full(RATE, 0.5, dtype=numpy.float32)
+    results.update(bench_end_to_end(stub_converter, speech, 2 if quick else 5))
+    if real_audio:
+        try:
+            speech = _load_speech(real_audio)
+            real_results = bench_stream_throughput(real_converter, speech, None)
+            real_results.update(bench_end_to_end(real_converter, speech, 2))
+        except Exception as e:
+            print(f"Real-model tier skipped: {e}", file=sys.stderr)
+        else:
+            results.update({f"real.{key}": value for key, value in real_results.items()})
+    return results
+
+
+def _commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Metrics, baseline: Metrics, threshold: float) -> List[str]:
+    """Print each shared metric's change and return those worse than ``threshold``."""
+    regressions: List[str] = []
+    for name in sorted(set(current) & set(baseline)):
+        old, new = baseline[name]["value"], current[name]["value"]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = change > threshold if current[name]["better"] == "lower" else -change > threshold
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<36} {old:>12.3f} -> {new:>12.3f} {change:>+8.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    parser.add_argument(
+        "--real", metavar="WAV", help="add the real-model tier, decoding this speech recording"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="relative change counted as regression"
+    )
+    args = parser.parse_args(argv)
+    results = run(quick=args.quick, real_audio=args.real)
+    for name, metric in results.items():
+        print(f"{name:<36} {metric['value']:>12.3f} {metric['unit']}")
+    if args.output:
+        document = {
+            "commit": _commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(document, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        print(f"\nCompared with {args.compare} ({baseline.get('commit')})")
+        if compare(results, baseline["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Micro-benchmark for :class:`voicekeyboard.stt.RingBuffer`.
+
+Compares the preallocated circular buffer with the previous deque +
+``numpy.concatenate`` implementation under the access pattern used by
+``SpeechConverter.processAudioStream``: append one ~10 ms block, then read
+the whole buffered window (``latest()``, the zero-copy view the pipeline uses,
+where the buffer has one).
+
+Run with ``python -m benchmarks.bench_ring_buffer`` from the repository root.
+"""
+
+import time
+import tracemalloc
+from collections import deque
+from typing import Deque, Dict, List
+
+import numpy
+
+from voicekeyboard.stt import RingBuffer
+
+SAMPLE_RATES = (16000, 48000)
+BLOCK_DURATION = 0.01
+WINDOW_SECONDS = 2
+ITERATIONS = 2000
+
+
+class DequeRingBuffer:
+    """Reference copy of the former deque-backed implementation."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._chunks: Deque[numpy.ndarray] = deque()
+        self._length = 0
+
+    def append(self, arr: numpy.ndarray) -> None:
+        self._chunks.append(arr)
+        self._length += arr.shape[0]
+        while self._length > self.capacity and self._chunks:
+            left = self._chunks[0]
+            if self._length - left.shape[0] >= self.capacity:
+                self._chunks.popleft()
+                self._length -= left.shape[0]
+            else:
+                need = self._length - self.capacity
+                self._chunks[0] = left[need:]
+                self._length -= need
+                break
+
+    def concat(self) -> numpy.ndarray:
+        return numpy.concatenate(list(self._chunks), axis=0)
+
+
+def _measure(buffer, block: numpy.ndarray) -> Dict[str, float]:
+    read = getattr(buffer, "latest", buffer.concat)
+    # Warm up until the window is full so steady-state behaviour is measured
+    for _ in range(int(WINDOW_SECONDS / BLOCK_DURATION) + 1):
+        buffer.append(block)
+        read()
+
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        buffer.append(block)
+        read()
+    elapsed = time.perf_counter() - started
+
+    # Allocation cost is measured in a separate pass so tracing does not skew timing
+    tracemalloc.start()
+    baseline, _peak = tracemalloc.get_traced_memory()
+    for _ in range(ITERATIONS):
+        buffer.append(block)
+        read()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "us_per_append": elapsed / ITERATIONS * 1e6,
+        "peak_alloc_bytes": float(peak - baseline),
+    }
+
+
+def run() -> List[Dict[str, object]]:
+    results: List[Dict[str, object]] = []
+    for rate in SAMPLE_RATES:
+        block = numpy.random.default_rng(0).standard_normal(int(rate * BLOCK_DURATION))
+        block = block.astype(numpy.float32)
+        capacity = rate * WINDOW_SECONDS
+        for name, buffer in (
+            ("deque+concatenate", DequeRingBuffer(capacity)),
+            ("RingBuffer", RingBuffer(capacity)),
+        ):
+            row: Dict[str, object] = {"impl": name, "sample_rate": rate}
+            row.update(_measure(buffer, block))
+            results.append(row)
+    return results
+
+
+def main() -> None:
+    print(f"{'impl':<20} {'rate':>6} {'us/append':>10} {'peak alloc bytes':>17}")
+    for row in run():
+        print(
+            f"{row['impl']:<20} {row['sample_rate']:>6} {row['us_per_append']:>10.2f} "
+            f"{row['peak_alloc_bytes']:>17.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
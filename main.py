@@ -1,8 +1,12 @@
+import sys
+
 from voicekeyboard.app import Generic
 from voicekeyboard.app import main as _main
 
 if __name__ == "__main__":
-    Generic.startup()
+    # Subcommands (e.g. ``serve``) run without the tray and overlay
+    if len(sys.argv) == 1:
+        Generic.startup()
     _main()
 """Thin wrapper to launch the VoiceKeyboard console application.
 
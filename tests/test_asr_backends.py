@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from voicekeyboard.asr import (
+    FasterWhisperBackend,
+    StubBackend,
+    Word,
+    create_asr_backend,
+)
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import SpeechConverter
+
+RATE = 16000
+
+
+class WordModel:
+    def __init__(self):
+        self.kwargs = []
+
+    def transcribe(self, audio, **kwargs):
+        self.kwargs.append(kwargs)
+        words = [SimpleNamespace(start=0.0, end=0.4, word=" hi")]
+        segs = [
+            SimpleNamespace(start=0.0, end=0.4, text=" hi", words=words),
+            SimpleNamespace(start=0.4, end=1.0, text=" there you", words=None),
+        ]
+        return iter(segs), None
+
+
+def test_registry_creates_unloaded_backends():
+    assert isinstance(create_asr_backend("faster-whisper"), FasterWhisperBackend)
+    stub = create_asr_backend("stub")
+    assert isinstance(stub, StubBackend)
+    assert stub.model is None
+    with pytest.raises(ValueError):
+        create_asr_backend("nope")
+
+
+def test_stub_is_deterministic():
+    stub = StubBackend(word_duration=0.25, sample_rate=RATE)
+    stub.load()
+    audio = np.zeros(RATE, dtype=np.float32)
+    assert stub.transcribe(audio) == " w0 w1 w2 w3"
+    assert stub.transcribe(audio) == " w0 w1 w2 w3"
+    (seg,) = stub.segments(audio, word_timestamps=True)
+    assert seg.words[1] == Word(0.25, 0.5, " w1")
+    assert stub.transcribe_batch([audio[: RATE // 2], audio]) == [" w0 w1", " w0 w1 w2 w3"]
+    assert stub.calls == [RATE, RATE, RATE, RATE // 2, RATE]
+    assert not stub.capabilities().batching
+
+
+def test_faster_whisper_segments_words_and_prompt():
+    model = WordModel()
+    backend = FasterWhisperBackend(model=model)
+    segs = list(backend.segments(np.ones(RATE), "en", word_timestamps=True, prompt="ctx"))
+    assert [s.text for s in segs] == [" hi", " there you"]
+    assert segs[0].words == [Word(0.0, 0.4, " hi")]
+    assert segs[1].words == []
+    assert model.kwargs[0]["initial_prompt"] == "ctx"
+    assert model.kwargs[0]["word_timestamps"] is True
+    assert backend.capabilities().word_timestamps
+
+
+def test_speech_converter_uses_selected_backend(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    monkeypatch.setattr(settings, "asrBackend", "stub")
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    sc = SpeechConverter()
+
+    class LoadedVad:
+        def __init__(self, _rate):
+            pass
+
+        def load(self):
+            pass
+
+        def score(self, _frame):
+            return 0.0
+
+        def reset(self):
+            pass
+
+        def get_speech_timestamps(self, *_a, **_k):
+            return []
+
+    monkeypatch.setattr("voicekeyboard.stt.create_vad_backend", lambda _n, r: LoadedVad(r))
+    assert sc._load_models()
+    assert isinstance(sc.asr, StubBackend)
+    assert sc.model is sc.asr
+    assert sc._transcribe(np.zeros(RATE, dtype=np.float32)) == " w0 w1"
+    words = sc._transcribe_words(np.zeros(RATE, dtype=np.float32))
+    assert [w.text for w in words] == [" w0", " w1"]
+
+
+def test_words_spread_when_engine_has_no_timings(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    sc = SpeechConverter()
+    sc.model = WordModel()
+    assert isinstance(sc.asr, FasterWhisperBackend)
+    words = sc._transcribe_words(np.ones(RATE, dtype=np.float32))
+    assert [w.text for w in words] == [" hi", " there", " you"]
+    assert words[1].start == pytest.approx(0.4)
+    assert words[2].start == pytest.approx(0.7)
+    sc.model = None
+    assert sc.asr is None
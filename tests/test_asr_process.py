@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from voicekeyboard.asr import AsrWorkerError, ProcessAsrBackend
+from voicekeyboard.settings import settings
+
+RATE = 16000
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    backend = ProcessAsrBackend("stub", max_restarts=1)
+    backend.load()
+    yield backend
+    backend.close()
+
+
+def test_worker_decodes_in_child_process(worker):
+    import os
+
+    assert worker.process.pid != os.getpid()
+    audio = np.zeros(RATE, dtype=np.float32)
+    assert worker.transcribe(audio) == " w0 w1"
+    assert worker.transcribe_batch([audio[: RATE // 2], audio]) == [" w0", " w0 w1"]
+    (seg,) = worker.segments(audio, word_timestamps=True)
+    assert [w.text for w in seg.words] == [" w0", " w1"]
+    assert worker.capabilities().word_timestamps
+
+
+def test_abandoned_stream_keeps_replies_in_order(worker):
+    stream = worker.segments(np.zeros(RATE, dtype=np.float32))
+    next(stream)
+    stream.close()
+    assert worker.transcribe(np.zeros(RATE // 2, dtype=np.float32)) == " w0"
+
+
+def test_worker_is_restarted_after_crash(worker):
+    worker.process.kill()
+    worker.process.join()
+    assert worker.transcribe(np.zeros(RATE, dtype=np.float32)) == " w0 w1"
+    assert worker.restarts == 1
+    worker.process.kill()
+    worker.process.join()
+    with pytest.raises(AsrWorkerError):
+        worker.transcribe(np.zeros(RATE, dtype=np.float32))
+
+
+def test_load_failure_is_reported():
+    backend = ProcessAsrBackend("nope")
+    with pytest.raises(AsrWorkerError):
+        backend.load()
+    assert backend.process is None
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import numpy as np
+
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import SpeechConverter, UtteranceBatcher
+
+
+class _Seg:
+    def __init__(self, start, text):
+        self.start = start
+        self.text = text
+
+
+class FakeBatchedPipeline:
+    """Chunks clips like faster-whisper's ``collect_chunks`` and returns one segment per chunk.
+
+    Adjacent clips are merged while they fit into ``chunk_length`` seconds; each
+    chunk's text is the number of non-silent samples in it.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, clip_timestamps=None, batch_size=None, chunk_length=30, **_kw):
+        self.calls.append(len(clip_timestamps))
+        rate = settings.audioSampleRate
+        chunks = []
+        for clip in clip_timestamps:
+            start, end = int(clip["start"] * rate), int(clip["end"] * rate)
+            if chunks and chunks[-1][2] + end - start <= chunk_length * rate:
+                chunks[-1][1] += int(np.count_nonzero(audio[start:end]))
+                chunks[-1][2] += end - start
+            else:
+                chunks.append([clip["start"], int(np.count_nonzero(audio[start:end])), end - start])
+        return [_Seg(offset, f"len{voiced}") for offset, voiced, _ in chunks], None
+
+
+class SequentialModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **_kwargs):
+        self.calls += 1
+        return [_Seg(0.0, f"len{audio.shape[0]}")], None
+
+
+def test_batcher_size_and_wait():
+    now = [0.0]
+    b = UtteranceBatcher(max_size=2, max_wait=0.5, clock=lambda: now[0])
+    assert b.time_left() is None
+    b.add(np.zeros(1))
+    assert not b.full()
+    assert b.time_left() == 0.5
+    now[0] = 0.6
+    assert b.time_left() == 0.0
+    b.add(np.zeros(2))
+    b.add(np.zeros(3))
+    assert b.full()
+    assert [a.shape[0] for a in b.take()] == [1, 2]
+    assert len(b) == 1
+
+
+def test_transcribe_batch_maps_segments_back(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    sc.model = SequentialModel()
+    sc.batchedModel = FakeBatchedPipeline()
+    audios = [np.ones(n, dtype=np.float32) for n in (1600, 320, 4800)]
+    assert sc._transcribe_batch(audios) == ["len1600", "len320", "len4800"]
+    assert sc.batchedModel.calls == [3]
+    assert sc.model.calls == 0
+
+
+def test_buffers_longer_than_a_window_are_decoded_alone(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    sc.model = SequentialModel()
+    sc.batchedModel = FakeBatchedPipeline()
+    long = np.ones(31 * settings.audioSampleRate, dtype=np.float32)
+    audios = [np.ones(100, dtype=np.float32), long, np.ones(200, dtype=np.float32)]
+    assert sc._transcribe_batch(audios) == ["len100", f"len{long.shape[0]}", "len200"]
+    assert sc.batchedModel.calls == [2]
+    assert sc.model.calls == 1
+
+
+def test_transcribe_batch_falls_back_to_sequential(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    sc.model = SequentialModel()
+    assert sc._transcribe_batch([np.zeros(10), np.zeros(20)]) == ["len10", "len20"]
+    assert sc.model.calls == 2
+
+
+def test_segments_from_one_vad_pass_are_batched(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    sc = SpeechConverter()
+    sc.vadModel = object()
+    sc.model = SequentialModel()
+    sc.batchedModel = FakeBatchedPipeline()
+    sc.get_speech_timestamps = lambda audio, *_a, **_k: [
+        {"start": 0, "end": 100},
+        {"start": 200, "end": 400},
+    ]
+    emitted = []
+    sc._emit_text = emitted.append
+    sc.audioQueue.put(np.ones(480, dtype=np.float32))
+
+    sc._process_flag = [True]
+    t = threading.Thread(target=sc.processAudioStream, daemon=True)
+    t.start()
+    time.sleep(0.1)
+    sc._process_flag[0] = False
+    t.join(timeout=2)
+
+    assert sc.batchedModel.calls == [2]
+    assert emitted == ["len100", "len200"]
@@ -0,0 +1,136 @@
+import json
+import os
+import wave
+
+import numpy as np
+
+from voicekeyboard import corpus
+from voicekeyboard.asr import StubBackend
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import SpeechConverter, StreamingVad
+
+RATE = 16000
+
+
+def stub_converter():
+    # Runs in the pool workers; builds the pipeline without real models
+    os.environ["VOICEKB_DRYRUN"] = "0"
+    sc = SpeechConverter()
+    sc.asr = StubBackend(sample_rate=RATE)
+    sc.asr.load()
+    sc.vadModel = object()
+    sc.vad = StreamingVad(
+        lambda frame: 1.0 if float(np.abs(frame).mean()) > 0.1 else 0.0,
+        RATE,
+        512,
+        min_silence_ms=100,
+        speech_pad_ms=0,
+    )
+    return sc
+
+
+def broken_converter():
+    raise RuntimeError("Speech models failed to load")
+
+
+def thread_env_converter():
+    # Records what the worker inherited before any native library was imported
+    raise RuntimeError(os.environ.get("OMP_NUM_THREADS"))
+
+
+def device_converter():
+    # Reports the device the worker was told to load on
+    raise RuntimeError(f"{settings.whisperDevice}/{settings.whisperComputeType}")
+
+
+def _write_wav(path, seconds):
+    audio = np.concatenate(
+        [np.zeros(RATE // 2), np.full(int(seconds * RATE), 0.5), np.zeros(RATE // 2)]
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes((audio * 32767).astype("<i2").tobytes())
+
+
+def test_corpus_runs_on_pool_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    data = tmp_path / "data"
+    _write_wav(data / "a.wav", 1.0)
+    _write_wav(data / "day2" / "b.wav", 2.0)
+    (data / "notes.txt").write_text("ignored")
+    (data / "broken.wav").write_bytes(b"not a wav")
+    out = tmp_path / "out"
+
+    counts = corpus.transcribe_corpus(
+        [str(data)], str(out), workers=2, threads=1, factory=stub_converter
+    )
+    assert counts == {"done": 2, "failed": 1, "skipped": 0}
+    (line,) = (out / "day2" / "b.wav.jsonl").read_text().splitlines()
+    assert json.loads(line)["text"] == "w0 w1 w2 w3"
+    entries = corpus.read_manifest(str(out / "manifest.jsonl"))
+    assert entries[str(data / "a.wav")]["audio"] == 2.0
+    assert entries[str(data / "broken.wav")]["status"] == "failed"
+    assert not list(out.glob("**/*.part"))
+
+    # A second run skips finished files and retries the failed one
+    os.remove(out / "a.wav.jsonl")
+    counts = corpus.transcribe_corpus([str(data)], str(out), workers=2, factory=stub_converter)
+    assert counts == {"done": 1, "failed": 1, "skipped": 1}
+
+
+def test_corpus_fails_files_when_models_do_not_load(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    _write_wav(data / "a.wav", 1.0)
+    _write_wav(data / "b.wav", 1.0)
+    out = tmp_path / "out"
+
+    counts = corpus.transcribe_corpus([str(data)], str(out), workers=1, factory=broken_converter)
+    assert counts == {"done": 0, "failed": 2, "skipped": 0}
+    entries = corpus.read_manifest(str(out / "manifest.jsonl"))
+    assert entries[str(data / "a.wav")]["error"].startswith("RuntimeError: Speech models")
+
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    corpus.transcribe_corpus(
+        [str(data)], str(tmp_path / "env"), workers=1, threads=3, factory=thread_env_converter
+    )
+    entries = corpus.read_manifest(str(tmp_path / "env" / "manifest.jsonl"))
+    assert entries[str(data / "a.wav")]["error"] == "RuntimeError: 3"
+    assert "OMP_NUM_THREADS" not in os.environ
+
+
+def test_auto_device_is_probed_once_in_the_parent(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    for name in ("a.wav", "b.wav", "c.wav"):
+        _write_wav(data / name, 1.0)
+    probes = []
+
+    def resolve(model, device, compute_type):
+        probes.append((device, compute_type))
+        return "cpu", "int8"
+
+    monkeypatch.setattr(corpus, "resolve_device", resolve)
+    # Stands in for the default factory, which loads faster-whisper with these settings
+    monkeypatch.setattr(corpus, "_load_converter", device_converter)
+    monkeypatch.setattr(settings, "asrBackend", "faster-whisper")
+    monkeypatch.setattr(settings, "whisperDevice", "auto")
+    monkeypatch.setattr(settings, "whisperComputeType", "auto")
+
+    corpus.transcribe_corpus(
+        [str(data)], str(tmp_path / "out"), workers=3, factory=device_converter
+    )
+    assert probes == [("auto", "auto")]
+    entries = corpus.read_manifest(str(tmp_path / "out" / "manifest.jsonl"))
+    assert {entry["error"] for entry in entries.values()} == {"RuntimeError: cpu/int8"}
+
+
+def test_plan_jobs_mirrors_input_tree(tmp_path):
+    files = [str(tmp_path / "x" / "1.wav"), str(tmp_path / "x" / "y" / "2.wav")]
+    out = str(tmp_path / "out")
+    jobs = corpus.plan_jobs(files, out)
+    assert [job.output for job in jobs] == [
+        os.path.join(out, "1.wav.jsonl"),
+        os.path.join(out, "y", "2.wav.jsonl"),
+    ]
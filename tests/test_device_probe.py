@@ -0,0 +1,99 @@
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from voicekeyboard import probe
+from voicekeyboard.settings import settings
+
+TEXT = "the quick brown fox jumps over the lazy dog"
+
+
+class FakeEngine:
+    def __init__(self, text, delay):
+        self.text = text
+        self.delay = delay
+
+    def transcribe(self, audio, **_kwargs):
+        probe.time.sleep(self.delay)
+        return [SimpleNamespace(text=self.text)], None
+
+
+def make_factory(table, built):
+    def factory(device, compute_type):
+        built.append((device, compute_type))
+        if (device, compute_type) not in table:
+            raise RuntimeError("unsupported")
+        return FakeEngine(*table[(device, compute_type)])
+
+    return factory
+
+
+@pytest.fixture
+def speech(tmp_path, monkeypatch):
+    path = tmp_path / "speech.wav"
+    with wave.open(str(path), "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(16000)
+        writer.writeframes(np.zeros(16000, dtype="<i2").tobytes())
+    monkeypatch.setattr(settings, "whisperProbeAudio", str(path))
+    monkeypatch.setattr(settings, "whisperProbeMinAccuracy", 0.9)
+    monkeypatch.setattr(probe, "_cuda_devices", lambda: 0)
+    monkeypatch.setattr(probe, "_supported", lambda device: None)
+    return path
+
+
+def test_word_error_rate_ignores_case_and_punctuation():
+    assert probe.word_error_rate("Hello, world.", "hello world") == 0.0
+    assert probe.word_error_rate("a b c d", "a x c") == 0.5
+    assert probe.word_error_rate("", "") == 0.0
+
+
+def test_picks_fastest_candidate_above_accuracy_floor(speech, tmp_path):
+    table = {
+        ("cpu", "float32"): (TEXT, 0.03),
+        ("cpu", "int8_float32"): (TEXT, 0.02),
+        # Fastest, but garbles the transcript
+        ("cpu", "int8"): ("the quack", 0.0),
+    }
+    built = []
+    cache = str(tmp_path / "cache.json")
+    choice = probe.resolve_device("tiny", cache_path=cache, factory=make_factory(table, built))
+    assert choice == ("cpu", "int8_float32")
+    # The most precise candidate is probed first and serves as the reference
+    assert built[0] == ("cpu", "float32")
+
+    # Later startups reuse the cached pick without building any model
+    again = []
+    assert probe.resolve_device("tiny", cache_path=cache, factory=make_factory(table, again)) == (
+        "cpu",
+        "int8_float32",
+    )
+    assert again == []
+    # The cache is per model
+    probe.resolve_device("base", cache_path=cache, factory=make_factory(table, again))
+    assert again
+
+
+def test_unavailable_candidates_are_skipped(speech, tmp_path):
+    table = {("cpu", "int8"): (TEXT, 0.0)}
+    choice = probe.resolve_device(
+        "tiny", cache_path=str(tmp_path / "c.json"), factory=make_factory(table, [])
+    )
+    assert choice == ("cpu", "int8")
+    with pytest.raises(RuntimeError):
+        probe.resolve_device(
+            "small", cache_path=str(tmp_path / "c.json"), factory=make_factory({}, [])
+        )
+
+
+def test_explicit_settings_skip_probe(speech, tmp_path):
+    built = []
+    assert probe.resolve_device(
+        "tiny", "cpu", "int8", cache_path=str(tmp_path / "c.json"), factory=make_factory({}, built)
+    ) == ("cpu", "int8")
+    assert built == []
+    assert probe.candidates("cpu", "float32") == [("cpu", "float32")]
+    assert [d for d, _ in probe.candidates()] == ["cpu", "cpu", "cpu"]
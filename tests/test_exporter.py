@@ -0,0 +1,72 @@
+import socket
+import urllib.request
+
+from voicekeyboard.exporter import (
+    CONTENT_TYPE,
+    MetricFamily,
+    MetricsExporter,
+    collect,
+    render,
+)
+from voicekeyboard.hotkeys import HotkeysManager, HotkeysService
+from voicekeyboard.metrics import UtteranceTiming
+from voicekeyboard.stt import SpeechConverter
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_render_openmetrics_text():
+    text = render(
+        [
+            MetricFamily("x_seconds", "counter", "Time", [({}, 1.5)], "seconds"),
+            MetricFamily("depth", "gauge", 'Queue "depth"', [({"queue": 'a"b'}, 3)]),
+        ]
+    )
+    assert text.splitlines() == [
+        "# TYPE x_seconds counter",
+        "# UNIT x_seconds seconds",
+        "# HELP x_seconds Time",
+        "x_seconds_total 1.5",
+        "# TYPE depth gauge",
+        '# HELP depth Queue \\"depth\\"',
+        'depth{queue="a\\"b"} 3',
+        "# EOF",
+    ]
+
+
+def test_collect_from_converter_and_hotkeys(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    sc.framesCaptured = 480
+    sc.metrics.record_decode(2.0, 0.5, segments=2)
+    sc.metrics.record(UtteranceTiming(1.0, 0.0, 0.1))
+    manager = HotkeysManager(lambda: None, lambda: None)
+    manager._start()
+    text = render(collect(sc, HotkeysService(manager)))
+    assert "voicekeyboard_audio_frames_received_total 480\n" in text
+    assert "voicekeyboard_segments_transcribed_total 2\n" in text
+    assert "voicekeyboard_decode_seconds_total 0.5\n" in text
+    assert "voicekeyboard_realtime_factor 0.25\n" in text
+    assert 'voicekeyboard_queue_depth{queue="audio"} 0\n' in text
+    assert 'voicekeyboard_utterance_latency_seconds{stage="vad",percentile="95"} 0.1\n' in text
+    assert "voicekeyboard_hotkey_activations_total 1\n" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_exporter_serves_http_and_writes_file(tmp_path):
+    families = [MetricFamily("up", "gauge", "Up", [({}, 1)])]
+    path = tmp_path / "textfile" / "voicekeyboard.prom"
+    exporter = MetricsExporter(lambda: families, port=_free_port(), path=str(path), interval=60)
+    exporter.start()
+    try:
+        host, port = exporter.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert response.read().decode() == "# TYPE up gauge\n# HELP up Up\nup 1\n# EOF\n"
+    finally:
+        exporter.stop()
+    assert path.read_text().endswith("up 1\n# EOF\n")
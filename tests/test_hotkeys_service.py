@@ -1,3 +1,4 @@
+import sys
 import time
 
 from voicekeyboard.hotkeys import HotkeysManager, HotkeysService
@@ -49,3 +50,26 @@ def test_hotkeys_service_disabled(monkeypatch):
     svc = HotkeysService(HotkeysManager(lambda: None, lambda: None))
     svc.start()  # Should no-op
     svc.stop()
+
+
+def test_hotkeys_service_idles_without_polling_and_stops_at_once(monkeypatch):
+    import keyboard as kb
+
+    monkeypatch.setattr(kb, "add_hotkey", lambda *a, **k: None)
+    monkeypatch.setattr(kb, "on_press_key", lambda *a, **k: None)
+    monkeypatch.setattr(kb, "on_release_key", lambda *a, **k: None)
+    monkeypatch.setenv("VOICEKB_DISABLE_HOTKEYS", "0")
+    svc = HotkeysService(HotkeysManager(lambda: None, lambda: None))
+    svc.start()
+    time.sleep(0.05)
+    assert svc.running()
+    # Parked on the stop event rather than in a sleep loop
+    frame = sys._current_frames()[svc._thread.ident]
+    assert frame.f_code.co_name == "wait"
+    thread = svc._thread
+    started = time.monotonic()
+    svc.stop()
+    # The stop event ends the wait; only a missed wake-up would run into the 1s join timeout
+    assert not thread.is_alive()
+    assert time.monotonic() - started < 1.0
+    assert not svc.running()
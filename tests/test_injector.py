@@ -0,0 +1,137 @@
+import threading
+
+from voicekeyboard import injector
+from voicekeyboard.metrics import PipelineMetrics
+
+
+class FakeClipboard(injector.Clipboard):
+    def __init__(self, text="previous"):
+        self.text = text
+        self.history = []
+
+    def get(self):
+        return self.text
+
+    def set(self, text):
+        self.text = text
+        self.history.append(text)
+
+
+def _record_keys(monkeypatch):
+    events = []
+    monkeypatch.setattr(injector.keyboard, "write", lambda text, delay=0: events.append(text))
+    monkeypatch.setattr(injector.keyboard, "send", lambda hotkey: events.append(("send", hotkey)))
+    return events
+
+
+def test_short_text_typed_long_text_pasted(monkeypatch):
+    events = _record_keys(monkeypatch)
+    monkeypatch.setattr(injector, "PASTE_SETTLE_SECONDS", 0)
+    clipboard = FakeClipboard()
+    out = injector.TextInjector(paste_threshold=10, clipboard=clipboard)
+
+    out.inject(" hello")
+    out.inject(" a much longer sentence")
+
+    assert events == [" hello", ("send", injector.paste_hotkey())]
+    assert clipboard.history == [" a much longer sentence", "previous"]
+    assert out.stats()["typed"] == 1 and out.stats()["pasted"] == 1
+
+
+def test_paste_falls_back_to_typing_without_clipboard(monkeypatch):
+    events = _record_keys(monkeypatch)
+    monkeypatch.setattr(injector, "default_clipboard", lambda: None)
+    out = injector.TextInjector(paste_threshold=3)
+    out.inject(" typed anyway")
+    assert events == [" typed anyway"]
+
+
+def test_worker_joins_pending_text_and_records_time_to_text(monkeypatch):
+    events = _record_keys(monkeypatch)
+    busy = threading.Event()
+    release = threading.Event()
+    original = injector.keyboard.write
+
+    def slow_write(text, delay=0):
+        # The first injection stalls like a busy target application
+        if not events:
+            busy.set()
+            release.wait(5)
+        original(text, delay)
+
+    monkeypatch.setattr(injector.keyboard, "write", slow_write)
+    metrics = PipelineMetrics()
+    out = injector.TextInjector(paste_threshold=0, metrics=metrics)
+    out.start()
+    out.submit(" one")
+    assert busy.wait(5)
+    out.submit(" two")
+    out.submit(" three")
+    release.set()
+    out.stop()
+
+    assert events == [" one", " two three"]
+    assert out.stats()["characters"] == len(" one two three")
+    assert metrics.snapshot()["latency_ms"]["type"]["count"] == 2
+
+
+def test_joined_texts_keep_words_apart():
+    assert injector._coalesce(
+        [(injector.TEXT, "one", 1.0), (injector.TEXT, "two", 2.0), (injector.TEXT, " three", 3.0)]
+    ) == [(injector.TEXT, "one two three", 1.0)]
+    assert injector._coalesce([(injector.TEXT, "end\n", 1.0), (injector.TEXT, "next", 2.0)]) == [
+        (injector.TEXT, "end\nnext", 1.0)
+    ]
+
+
+def _screen(monkeypatch):
+    screen = []
+    monkeypatch.setattr(injector.keyboard, "write", lambda text, delay=0: screen.extend(text))
+
+    def send(hotkey):
+        assert hotkey == "backspace"
+        screen.pop()
+
+    monkeypatch.setattr(injector.keyboard, "send", send)
+    return screen
+
+
+def test_revisions_send_only_the_edit(monkeypatch):
+    screen = _screen(monkeypatch)
+    out = injector.TextInjector(paste_threshold=0)
+    assert injector.edit_keys(" hello world", " hello word") == (2, "d")
+
+    out.apply_revision(" hello wor")
+    out.apply_revision(" hello world")
+    out.apply_revision(" hello word")
+    out.apply_revision(" hello words", final=True)
+    out.apply_revision(" next", final=True)
+
+    assert "".join(screen) == " hello words next"
+    assert out.backspaces == 2
+    assert out.stats()["keystrokes_per_utterance"]["max"] == 10 + 2 + 3 + 1
+
+
+def test_queued_revisions_are_skipped_for_the_newest(monkeypatch):
+    screen = _screen(monkeypatch)
+    out = injector.TextInjector(paste_threshold=0)
+    out.revise(" a")
+    out.revise(" a")
+    out.revise(" ab")
+    out.revise(" abc", final=True)
+    out.submit(" d")
+    out.start()
+    out.stop()
+    assert "".join(screen) == " abc d"
+    assert out.stats()["keystrokes_per_utterance"]["max"] == 4
+
+
+def test_stop_gives_up_on_a_hung_target(monkeypatch, caplog):
+    release = threading.Event()
+    monkeypatch.setattr(injector.keyboard, "write", lambda text, delay=0: release.wait(5))
+    out = injector.TextInjector(paste_threshold=0)
+    out.start()
+    out.submit(" stuck")
+    out.stop(timeout=0.1)
+    release.set()
+    assert "did not finish" in caplog.text
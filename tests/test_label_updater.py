@@ -1,4 +1,5 @@
 import os
+import time
 
 import pytest
 
@@ -19,3 +20,74 @@ def test_label_updater_offscreen(monkeypatch):
     app.processEvents()
     assert windowLabel is not None and windowLabel.text() == "Hello"
     app.quit()
+
+
+def test_label_posts_coalesce_to_latest_text(monkeypatch):
+    from voicekeyboard import window
+    from voicekeyboard.window import LabelUpdater
+
+    updater = LabelUpdater()
+    # Headless: nothing is queued or counted
+    updater.post("nobody is looking")
+    assert updater.stats() == {"posted": 0, "coalesced": 0, "unchanged": 0}
+
+    monkeypatch.setattr(window, "uiInvoker", object())
+    shown = []
+    requests = []
+    updater.textChanged.connect(shown.append)
+    updater.flushRequested.connect(lambda: requests.append(True))
+    for i in range(20):
+        updater.post(f"partial {i}")
+    updater.flush()
+    updater.post("partial 19")
+    updater.flush()
+    updater.flush()
+
+    assert shown == ["partial 19"]
+    assert len(requests) == 2
+    assert updater.stats() == {"posted": 21, "coalesced": 19, "unchanged": 1}
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Qt offscreen test runs on Linux only")
+def test_window_flushes_posted_label_text(monkeypatch):
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    from voicekeyboard import window
+    from voicekeyboard.settings import settings
+
+    monkeypatch.setattr(settings, "windowLabelUpdateIntervalMs", 50)
+    app = QApplication.instance() or QApplication([])
+    monkeypatch.setattr(window, "uiInvoker", window.UiInvoker())
+    manager = window.WindowManager()
+    shown = []
+    window.labelUpdater.textChanged.connect(shown.append)
+    for i in range(10):
+        window.labelUpdater.post(f"text {i}")
+    deadline = time.monotonic() + 5
+    while window.windowLabel.text() != "text 9" and time.monotonic() < deadline:
+        app.processEvents()
+    assert window.windowLabel.text() == "text 9"
+    assert shown == ["text 9"]
+    window.labelUpdater.textChanged.disconnect(shown.append)
+    manager.close()
+
+
+def test_wait_label_blocks_on_event_not_polling(monkeypatch):
+    import threading
+
+    from voicekeyboard import window
+
+    monkeypatch.setattr(window, "windowThread", None)
+    window.WindowManager.wait_label()  # window disabled: returns at once
+
+    ready = threading.Event()
+    monkeypatch.setattr(window, "labelReady", ready)
+    monkeypatch.setattr(window, "windowThread", threading.current_thread())
+    waiter = threading.Thread(target=window.WindowManager.wait_label, daemon=True)
+    waiter.start()
+    waiter.join(0.05)
+    assert waiter.is_alive()
+    ready.set()
+    waiter.join(1)
+    assert not waiter.is_alive()
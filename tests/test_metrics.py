@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from voicekeyboard.asr import StubBackend
+from voicekeyboard.metrics import (
+    MetricsReporter,
+    PipelineMetrics,
+    RollingHistogram,
+    UtteranceTiming,
+)
+from voicekeyboard.pipeline import StageQueue
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import SpeechConverter, StreamingVad
+
+RATE = 16000
+
+
+def test_rolling_histogram_keeps_window_and_percentiles():
+    hist = RollingHistogram(100)
+    assert hist.summary() == {"count": 0}
+    for value in range(200):
+        hist.add(float(value))
+    summary = hist.summary(scale=2.0)
+    assert summary["count"] == 100
+    assert summary["max"] == 398.0
+    assert summary["p50"] == pytest.approx(299.0)
+    assert summary["p99"] == pytest.approx(2 * 198.01)
+
+
+def test_pipeline_metrics_snapshot():
+    metrics = PipelineMetrics(window=10, queue_depths=lambda: {"audio": 1, "asr": 0})
+    timing = UtteranceTiming(2.0, captured=10.0, speech_end=10.1)
+    timing.decode_start, timing.decode_end, timing.emitted = 10.3, 10.8, 10.81
+    metrics.record(timing)
+    metrics.record_decode(2.0, 0.5)
+    snap = metrics.snapshot()
+    assert snap["utterances"] == 1
+    assert snap["latency_ms"]["queue"]["p50"] == pytest.approx(200.0)
+    assert snap["latency_ms"]["total"]["max"] == pytest.approx(810.0)
+    assert snap["rtf"]["overall"] == 0.25
+    assert snap["queues"] == {"audio": 1, "asr": 0}
+    json.dumps(snap)
+
+
+def test_stage_queue_reports_enqueue_time():
+    q = StageQueue(4)
+    before = time.monotonic()
+    q.put("a")
+    q.get()
+    assert before <= q.last_enqueued <= time.monotonic()
+
+
+def test_reporter_dumps_json_only_when_changed(tmp_path):
+    metrics = PipelineMetrics()
+    path = tmp_path / "metrics" / "stt.json"
+    reporter = MetricsReporter(metrics, 60, str(path))
+    reporter.report()
+    path.unlink()
+    reporter.report()
+    assert not path.exists()
+    metrics.record(UtteranceTiming(1.0, 0.0, 0.0))
+    reporter.report()
+    assert json.loads(path.read_text())["utterances"] == 1
+
+
+def test_pipeline_records_each_utterance(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    monkeypatch.setattr(settings, "whisperStreamingDecode", False)
+    sc = SpeechConverter()
+    sc.asr = StubBackend(sample_rate=RATE)
+    sc.asr.load()
+    sc.vadModel = object()
+    sc.vad = StreamingVad(
+        lambda frame: 1.0 if float(np.abs(frame).mean()) > 0.1 else 0.0,
+        RATE,
+        512,
+        min_silence_ms=100,
+        speech_pad_ms=0,
+    )
+    speech = np.concatenate([np.full(RATE, 0.5), np.zeros(RATE // 2)]).astype(np.float32)
+    for _ in range(3):
+        for start in range(0, speech.shape[0], 1600):
+            sc.audioQueue.put(speech[start : start + 1600])
+    sc._process_flag = [True]
+    thread = threading.Thread(target=sc.processAudioStream, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while sc.metrics.snapshot()["utterances"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sc._process_flag[0] = False
+    thread.join(timeout=5)
+
+    snap = sc.metrics_snapshot()
+    assert snap["utterances"] == 3
+    assert snap["audio_seconds"] == pytest.approx(3.0, abs=0.2)
+    for stage in ("vad", "queue", "decode", "emit", "total"):
+        assert snap["latency_ms"][stage]["count"] == 3
+        assert snap["latency_ms"][stage]["p50"] >= 0
+    assert snap["rtf"]["overall"] is not None
+    assert set(snap["queues"]) == {"audio", "asr"}
@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pytest
+
+from voicekeyboard.asr import AsrWorkerError, StubBackend
+from voicekeyboard.server import ModelServer, RemoteAsrBackend, authkey_path
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import SpeechConverter
+from voicekeyboard.transport import SharedAudioRing
+
+RATE = 16000
+
+
+@pytest.fixture
+def sock(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    return str(tmp_path / "srv" / "model.sock")
+
+
+def start_server(path, backend=None):
+    backend = backend or StubBackend(sample_rate=RATE)
+    backend.load()
+    server = ModelServer(path, backend)
+    server.start()
+    return server
+
+
+def test_clients_share_one_loaded_backend(sock):
+    backend = StubBackend(sample_rate=RATE)
+    server = start_server(sock, backend)
+    first, second = RemoteAsrBackend(sock), RemoteAsrBackend(sock)
+    try:
+        assert oct(os.stat(sock).st_mode & 0o777) == "0o600"
+        first.load()
+        second.load()
+        audio = np.zeros(RATE, dtype=np.float32)
+        assert first.transcribe(audio) == " w0 w1"
+        assert second.transcribe_batch([audio[: RATE // 2]]) == [" w0"]
+        assert backend.calls == [RATE, RATE // 2]
+        assert server.clients == 2
+    finally:
+        first.close()
+        second.close()
+        server.stop()
+    assert not os.path.exists(sock)
+
+
+def test_shared_ring_audio_is_passed_by_reference(sock):
+    server = start_server(sock)
+    ring = SharedAudioRing(RATE * 2)
+    client = RemoteAsrBackend(sock, transport=ring)
+    try:
+        client.load()
+        shared = ring.view(ring.write(np.zeros(RATE, dtype=np.float32)))
+        assert client.transcribe(shared) == " w0 w1"
+        assert client.meter.refs == 1 and client.meter.copies == 0
+    finally:
+        client.close()
+        server.stop()
+        ring.close()
+
+
+def test_client_reconnects_after_server_restart(sock):
+    server = start_server(sock)
+    client = RemoteAsrBackend(sock, reconnect_timeout=5.0)
+    try:
+        client.load()
+        server.stop()
+        server = start_server(sock)
+        assert client.transcribe(np.zeros(RATE, dtype=np.float32)) == " w0 w1"
+        assert client.reconnects == 1
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_no_server_falls_back_to_in_process(sock, monkeypatch):
+    with pytest.raises(AsrWorkerError):
+        RemoteAsrBackend(sock).load()
+    monkeypatch.setattr(settings, "asrServerEnabled", True)
+    monkeypatch.setattr(settings, "asrServerSocket", sock)
+    sc = SpeechConverter()
+    assert sc._connect_model_server() is None
+    sc.asrRing.close()
+
+
+def test_stale_socket_is_replaced_and_live_one_refused(sock):
+    os.makedirs(os.path.dirname(sock), mode=0o700)
+    open(sock, "w").close()
+    server = start_server(sock)
+    try:
+        with pytest.raises(RuntimeError):
+            ModelServer(sock, StubBackend()).start()
+    finally:
+        server.stop()
+
+
+def test_socket_directory_must_be_private(sock):
+    os.makedirs(os.path.dirname(sock), mode=0o700)
+    os.chmod(os.path.dirname(sock), 0o755)
+    with pytest.raises(RuntimeError, match="mode 700"):
+        ModelServer(sock, StubBackend()).start()
+    assert not os.path.exists(sock)
+
+
+def test_clients_without_the_key_are_rejected(sock):
+    server = start_server(sock)
+    client = RemoteAsrBackend(sock)
+    try:
+        assert oct(os.stat(authkey_path(sock)).st_mode & 0o777) == "0o600"
+        with open(authkey_path(sock), "wb") as file:
+            file.write(b"wrong key")
+        with pytest.raises(AsrWorkerError, match="authentication"):
+            client.load()
+        # The server keeps serving clients that know the key
+        with open(authkey_path(sock), "wb") as file:
+            file.write(server._authkey)
+        client.load()
+        assert client.transcribe(np.zeros(RATE, dtype=np.float32)) == " w0 w1"
+    finally:
+        client.close()
+        server.stop()
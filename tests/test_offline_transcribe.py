@@ -0,0 +1,86 @@
+import io
+import json
+import wave
+
+import numpy as np
+import pytest
+
+from voicekeyboard import offline
+from voicekeyboard.asr import StubBackend
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import SpeechConverter, StreamingVad
+
+RATE = 16000
+
+
+def _converter(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    sc = SpeechConverter()
+    sc.asr = StubBackend(sample_rate=RATE)
+    sc.asr.load()
+    sc.vadModel = object()
+    sc.vad = StreamingVad(
+        lambda frame: 1.0 if float(np.abs(frame).mean()) > 0.1 else 0.0,
+        RATE,
+        512,
+        min_silence_ms=100,
+        speech_pad_ms=0,
+    )
+    return sc
+
+
+def _signal(rate):
+    parts = [(1.0, 0.0), (2.0, 0.5), (1.0, 0.0), (1.0, 0.5), (1.0, 0.0)]
+    return np.concatenate([np.full(int(s * rate), v, dtype=np.float32) for s, v in parts])
+
+
+def _write_wav(path, audio, rate, channels):
+    pcm = (np.repeat(audio[:, None], channels, axis=1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(pcm.tobytes())
+
+
+def test_wav_is_memory_mapped_resampled_and_streamed(tmp_path, monkeypatch):
+    path = tmp_path / "talk.wav"
+    _write_wav(path, _signal(48000), 48000, 2)
+    fmt = offline.wav_format(str(path))
+    assert (fmt.sample_rate, fmt.channels, fmt.dtype, fmt.frames) == (48000, 2, "<i2", 288000)
+
+    out = io.StringIO()
+    count = offline.transcribe_file(str(path), out, converter=_converter(monkeypatch))
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == len(records) == 2
+    assert records[0]["text"] == "w0 w1 w2 w3"
+    assert records[0]["start"] == pytest.approx(1.0, abs=0.05)
+    assert records[1]["start"] == pytest.approx(4.0, abs=0.05)
+    assert records[1]["text"] == "w0 w1"
+
+
+def test_raw_pcm_from_stream_with_word_timings(monkeypatch):
+    pcm = (_signal(RATE) * 32767).astype("<i2").tobytes()
+    fmt = offline.AudioFormat(RATE, 1, offline.RAW_FORMATS["s16le"])
+    out = io.StringIO()
+    sc = _converter(monkeypatch)
+    # An odd block size splits frames across reads
+    offline.transcribe_file(
+        io.BytesIO(pcm), out, fmt, converter=sc, block_seconds=0.0331, word_timestamps=True
+    )
+    first = json.loads(out.getvalue().splitlines()[0])
+    assert first["words"][1]["start"] == pytest.approx(1.5, abs=0.05)
+    # Each utterance is decoded on its own, never the whole recording
+    assert max(sc.asr.calls) <= int(2.1 * RATE)
+
+
+def test_resampler_is_continuous_across_blocks():
+    ramp = np.arange(48000, dtype=np.float32)
+    whole = offline.LinearResampler(48000, 16000).process(ramp)
+    blocked = offline.LinearResampler(48000, 16000)
+    parts = [blocked.process(ramp[i : i + 1000]) for i in range(0, ramp.shape[0], 1000)]
+    joined = np.concatenate(parts)
+    assert joined.shape[0] == whole.shape[0]
+    assert np.allclose(joined, whole)
+    assert np.allclose(joined[:4], [0.0, 3.0, 6.0, 9.0])
@@ -0,0 +1,105 @@
+import threading
+import time
+from queue import Empty, Full
+
+import numpy as np
+import pytest
+
+from voicekeyboard.pipeline import StageQueue
+from voicekeyboard.stt import AsrJob, SpeechConverter, merge_asr_jobs, merge_audio_blocks
+
+
+def test_stage_queue_block_policy_times_out():
+    q = StageQueue(2, "block")
+    q.put(1)
+    q.put(2)
+    with pytest.raises(Full):
+        q.put(3, timeout=0.01)
+    with pytest.raises(Full):
+        q.put_nowait(3)
+    assert q.stats()["rejected"] == 2
+    assert [q.get(), q.get()] == [1, 2]
+    with pytest.raises(Empty):
+        q.get(timeout=0.01)
+
+
+def test_stage_queue_block_policy_waits_for_consumer():
+    q = StageQueue(1, "block")
+    q.put("a")
+    threading.Timer(0.05, q.get).start()
+    q.put("b", timeout=1)
+    assert q.get_nowait() == "b"
+
+
+def test_stage_queue_drop_oldest():
+    q = StageQueue(2, "drop-oldest")
+    for i in range(5):
+        q.put(i)
+    assert q.drain() == [3, 4]
+    assert q.stats()["dropped"] == 3
+    assert q.stats()["high_water"] == 2
+
+
+def test_stage_queue_merge_audio():
+    q = StageQueue(1, "merge", merge_fn=merge_audio_blocks)
+    q.put(np.array([1.0], dtype=np.float32))
+    q.put(np.array([2.0, 3.0], dtype=np.float32))
+    assert q.qsize() == 1
+    assert q.get().tolist() == [1.0, 2.0, 3.0]
+    assert q.stats()["merged"] == 1
+
+
+def test_merge_asr_jobs():
+    a, b = np.zeros(1), np.zeros(2)
+    assert merge_asr_jobs(AsrJob("final", [a]), AsrJob("final", [b])).audios == [a, b]
+    newer = AsrJob("partial", [b])
+    assert merge_asr_jobs(AsrJob("partial", [a]), newer) is newer
+    assert merge_asr_jobs(AsrJob("final", [a]), newer) is None
+
+
+def test_stage_queue_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        StageQueue(1, "spill")
+
+
+class SlowModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **_kwargs):
+        time.sleep(0.2)
+        self.calls += 1
+
+        class Seg:
+            text = "hi"
+
+        return [Seg()], None
+
+
+def test_slow_decode_does_not_stall_vad(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    sc = SpeechConverter()
+    sc.vadModel = object()
+    sc.model = SlowModel()
+    seen = []
+
+    def vad(audio, *_a, **_k):
+        seen.append(len(audio))
+        return [{"start": 0, "end": len(audio)}]
+
+    sc.get_speech_timestamps = vad
+    sc._process_flag = [True]
+    t = threading.Thread(target=sc.processAudioStream, daemon=True)
+    t.start()
+    for _ in range(4):
+        sc.audioQueue.put(np.zeros(320, dtype=np.float32))
+        time.sleep(0.02)
+    # VAD has seen every chunk while the first decode is still running
+    assert len(seen) == 4
+    assert sc.model.calls == 0
+    assert set(sc.queue_depths()) == {"audio", "asr"}
+    sc._process_flag[0] = False
+    t.join(timeout=5)
+    # Everything queued was decoded (batched into as few calls as possible)
+    assert 1 <= sc.model.calls <= 4
+    assert not t.is_alive()
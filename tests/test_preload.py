@@ -0,0 +1,63 @@
+from voicekeyboard import stt
+from voicekeyboard.stt import SpeechConverter
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **_kwargs):
+        self.calls += 1
+        return [], None
+
+
+def test_preload_loads_and_warms_up(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    sc = SpeechConverter()
+    states = []
+    sc.add_readiness_listener(states.append)
+    loads = []
+
+    def fake_load():
+        loads.append(1)
+        sc._set_readiness(stt.READINESS_LOADING)
+        sc.model = CountingModel()
+        sc.vadModel = object()
+        return True
+
+    monkeypatch.setattr(sc, "_load_models", fake_load)
+    sc.preload().join(timeout=5)
+
+    assert states == [stt.READINESS_LOADING, stt.READINESS_WARMING, stt.READINESS_READY]
+    assert sc.readiness == stt.READINESS_READY
+    assert sc.model.calls == 1  # warm-up inference ran
+    # Lazy loading on the first chunk now finds the models ready
+    sc._ensure_models_loaded()
+    assert loads == [1]
+
+
+def test_preload_reports_failure(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    sc = SpeechConverter()
+    monkeypatch.setattr(sc, "_load_models", lambda: False)
+    sc.preload().join(timeout=5)
+    assert sc.readiness == stt.READINESS_FAILED
+
+
+def test_preload_dry_run_is_ready(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    assert sc.readiness == stt.READINESS_IDLE
+    sc.preload().join(timeout=5)
+    assert sc.readiness == stt.READINESS_READY
+    assert sc.model is None
+
+
+def test_warm_up_resets_streaming_vad(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    sc.vad = stt.StreamingVad(lambda frame: 1.0, 16000, 512)
+    sc._warm_up()
+    assert sc.vad.frames_scored > 0
+    assert sc.vad.cursor == 0
+    assert not sc.vad.triggered
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from voicekeyboard import profiler
+from voicekeyboard.settings import settings
+
+
+def _busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_attributes_samples_to_named_threads(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,), name="hotkeys", daemon=True)
+    worker.start()
+    session = profiler.SamplingProfiler(str(tmp_path / "out.folded"), interval=0.002, duration=5)
+    session.start()
+    time.sleep(0.2)
+    path = session.stop()
+    stop.set()
+    worker.join()
+
+    assert not session.active()
+    lines = open(path).read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    hotkeys = [line for line in lines if line.startswith("hotkeys;")]
+    assert any("_busy (test_profiler.py:" in line for line in hotkeys)
+    assert "profiler" not in session.thread_samples()
+    assert session.thread_samples()["hotkeys"] <= session.samples
+
+
+def test_env_toggle_runs_for_given_seconds(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "logFullpath", str(tmp_path / "logs" / "application.log"))
+    monkeypatch.setenv("VOICEKB_PROFILE", "0.1")
+    session = profiler.start_from_env()
+    assert session is not None and profiler.active()
+    assert session.path.startswith(str(tmp_path / "logs" / "profile-"))
+    deadline = time.monotonic() + 5
+    while profiler.active() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not profiler.active()
+    assert session.samples > 0
+    assert open(session.path).read()
+    monkeypatch.setenv("VOICEKB_PROFILE", "0")
+    assert profiler.start_from_env() is None
@@ -0,0 +1,141 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from voicekeyboard import replay
+from voicekeyboard.asr import StubBackend
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import SpeechConverter, StreamingVad
+
+RATE = 16000
+BLOCK = 160
+
+
+def _converter(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    monkeypatch.setattr(settings, "whisperStreamingDecode", False)
+    sc = SpeechConverter()
+    sc.asr = StubBackend(sample_rate=RATE)
+    sc.asr.load()
+    sc.vadModel = object()
+    sc.vad = StreamingVad(
+        lambda frame: 1.0 if float(np.abs(frame).mean()) > 0.1 else 0.0,
+        RATE,
+        512,
+        min_silence_ms=100,
+        speech_pad_ms=0,
+    )
+    return sc
+
+
+def _record(sc, path):
+    sc.recorder = replay.AudioRecorder(str(path), RATE, 2)
+    parts = [np.zeros(RATE // 2), np.full(2 * RATE, 0.5), np.zeros(RATE // 2)]
+    mono = np.concatenate(parts).astype(np.float32)
+    for i, start in enumerate(range(0, mono.shape[0], BLOCK)):
+        block = np.repeat(mono[start : start + BLOCK, None], 2, axis=1)
+        status = SimpleNamespace(input_overflow=i == 3, input_underflow=False)
+        sc.audioCallback(block, block.shape[0], None, status)
+    sc.recorder.close()
+    sc.recorder = None
+    return mono
+
+
+def test_recording_keeps_blocks_timing_and_status(tmp_path, monkeypatch):
+    sc = _converter(monkeypatch)
+    path = tmp_path / "session.vkrec"
+    mono = _record(sc, path)
+
+    header, blocks = replay.read_recording(str(path))
+    assert header == replay.RecordingHeader(RATE, 2, replay.FORMAT_INT16)
+    blocks = list(blocks)
+    assert len(blocks) == mono.shape[0] // BLOCK
+    assert all(block.audio.shape == (BLOCK, 2) for block in blocks)
+    assert [block.status for block in blocks[2:5]] == [0, replay.STATUS_OVERFLOW, 0]
+    assert blocks[0].time == 0.0
+    assert all(a.time <= b.time for a, b in zip(blocks, blocks[1:]))
+    joined = np.concatenate([block.audio[:, 0] for block in blocks])
+    assert np.allclose(joined, mono, atol=1e-4)
+    # 16-bit samples plus a 13-byte block header
+    assert path.stat().st_size == 15 + len(blocks) * (13 + BLOCK * 2 * 2)
+
+
+def test_replay_drives_the_pipeline(tmp_path, monkeypatch):
+    path = tmp_path / "session.vkrec"
+    _record(_converter(monkeypatch), path)
+
+    sc = _converter(monkeypatch)
+    texts = []
+    sc._emit_text = lambda text: texts.append(text) if text else None
+    sc._process_flag = [True]
+    thread = threading.Thread(target=sc.processAudioStream, daemon=True)
+    thread.start()
+    result = replay.replay(str(path), sc, speed=0)
+    sc._process_flag[0] = False
+    thread.join(timeout=5)
+
+    assert result["blocks"] == 300
+    assert result["audio_seconds"] == 3.0
+    assert texts == [" w0 w1 w2 w3"]
+    assert sc.capture_stats()["input_overflows"] == 1
+    assert sc.capture_stats()["frames_captured"] == 3 * RATE
+    assert sc.metrics_snapshot()["utterances"] == 1
+
+
+def test_replay_rejects_other_sample_rates(tmp_path, monkeypatch):
+    path = tmp_path / "other.vkrec"
+    replay.AudioRecorder(str(path), 48000, 1).close()
+    with pytest.raises(ValueError, match="48000 Hz"):
+        replay.replay(str(path), _converter(monkeypatch))
+    (tmp_path / "junk.vkrec").write_bytes(b"nope")
+    with pytest.raises(ValueError, match="not a voicekeyboard"):
+        replay.read_recording(str(tmp_path / "junk.vkrec"))
+
+
+def test_recorder_drops_whole_blocks_when_the_writer_falls_behind(tmp_path):
+    path = tmp_path / "slow.vkrec"
+    # Room for two blocks; the writer does not poll before close()
+    recorder = replay.AudioRecorder(
+        str(path), RATE, 1, buffer_seconds=2 * BLOCK / RATE, poll_interval=60
+    )
+    for value in (0.1, 0.2, 0.3):
+        recorder.capture(np.full((BLOCK, 1), value, dtype=np.float32), BLOCK)
+    recorder.close()
+
+    assert recorder.stats() == {"blocks": 2, "dropped_blocks": 1, "dropped_frames": BLOCK}
+    _header, blocks = replay.read_recording(str(path))
+    assert [round(float(block.audio[0, 0]), 2) for block in blocks] == [0.1, 0.2]
+
+
+def test_batch_vad_processes_audio_queued_before_the_flag_was_cleared(monkeypatch):
+    sc = _converter(monkeypatch)
+    sc.vad = None
+    sc.get_speech_timestamps = lambda audio, *_a, **_k: [{"start": 0, "end": audio.shape[0]}]
+    texts = []
+    sc._emit_text = lambda text: texts.append(text) if text else None
+    for _ in range(3):
+        sc.audioQueue.put(np.full(RATE, 0.5, dtype=np.float32))
+    # Cleared before the stage even starts, as replay.run does after feeding
+    sc._process_flag = [False]
+    sc.processAudioStream()
+
+    assert sc.audioQueue.qsize() == 0
+    assert "".join(texts).split() == ["w0", "w1"] * 3
+
+
+def test_reader_owns_the_file_and_closes_it(tmp_path, monkeypatch):
+    path = tmp_path / "session.vkrec"
+    _record(_converter(monkeypatch), path)
+
+    _header, blocks = replay.read_recording(str(path))
+    with blocks:
+        next(blocks)
+    assert blocks._file.closed
+    assert list(blocks) == []
+
+    _header, blocks = replay.read_recording(str(path))
+    assert len(list(blocks)) == 300
+    assert blocks._file.closed
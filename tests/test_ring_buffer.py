@@ -26,3 +26,40 @@ def test_ring_buffer_clear():
     out = rb.concat()
     assert out.size == 0
 
+
+def test_ring_buffer_latest_is_view_across_wrap():
+    rb = RingBuffer(capacity=6)
+    rb.append(np.array([1, 2, 3, 4], dtype=np.float32))
+    view = rb.latest(2)
+    assert view.tolist() == [3, 4]
+    assert np.shares_memory(view, rb._data)
+    rb.append(np.array([5, 6, 7], dtype=np.float32))  # wraps storage
+    wrapped = rb.latest()
+    assert wrapped.tolist() == [2, 3, 4, 5, 6, 7]
+    assert np.shares_memory(wrapped, rb._data)
+    assert rb.latest(1).tolist() == [7]
+
+
+def test_ring_buffer_concat_is_a_copy():
+    rb = RingBuffer(capacity=4)
+    rb.append(np.array([1, 2, 3], dtype=np.float32))
+    kept = rb.concat()
+    rb.append(np.array([8, 9], dtype=np.float32))
+    assert not np.shares_memory(kept, rb._data)
+    assert kept.tolist() == [1, 2, 3]
+
+
+def test_ring_buffer_oversized_append_keeps_newest():
+    rb = RingBuffer(capacity=3)
+    rb.append(np.array([1, 2], dtype=np.float32))
+    rb.append(np.arange(10, dtype=np.float32))
+    assert len(rb) == 3
+    assert rb.concat().tolist() == [7, 8, 9]
+
+
+def test_ring_buffer_casts_to_float32():
+    rb = RingBuffer(capacity=4)
+    rb.append(np.array([[1], [2]], dtype=np.float64))
+    out = rb.concat()
+    assert out.dtype == np.float32
+    assert out.tolist() == [1, 2]
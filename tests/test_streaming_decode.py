@@ -0,0 +1,104 @@
+import numpy as np
+
+from voicekeyboard import injector
+from voicekeyboard.stt import HypothesisStabilizer, StreamingDecoder, Word, join_words
+
+RATE = 1000  # samples per second, keeps the fake timeline readable
+WORD_SPAN = 0.5  # each scripted word occupies 0.4 s followed by 0.1 s pause
+SCRIPT = [f" w{i}" for i in range(12)]
+
+
+def _fake_transcribe_words(calls):
+    """Decode a window whose samples encode their absolute index in the utterance."""
+
+    def transcribe(window, prompt):
+        calls.append(window.shape[0])
+        if window.size == 0:
+            return []
+        offset = float(window[0]) / RATE
+        end = offset + window.shape[0] / RATE
+        words = []
+        for i, text in enumerate(SCRIPT):
+            w_start, w_end = i * WORD_SPAN, i * WORD_SPAN + 0.4
+            if w_end <= offset or w_start >= end:
+                continue
+            if w_end > end:
+                text = text + "-partial"  # cut-off word is unstable
+            words.append(Word(max(0.0, w_start - offset), min(w_end, end) - offset, text))
+        return words
+
+    return transcribe
+
+
+def _utterance(seconds):
+    return np.arange(int(seconds * RATE), dtype=np.float32)
+
+
+def test_stabilizer_commits_common_prefix():
+    st = HypothesisStabilizer()
+    assert st.insert([Word(0, 0.4, " a"), Word(0.5, 0.9, " b")]) == []
+    agreed = st.insert([Word(0, 0.4, " a"), Word(0.5, 0.9, " bee"), Word(1.0, 1.4, " c")])
+    assert [w.text for w in agreed] == [" a"]
+    assert st.committed_end == 0.4
+    assert [w.text for w in st.flush()] == [" bee", " c"]
+
+
+def test_stabilizer_drops_words_before_committed_end():
+    st = HypothesisStabilizer()
+    st.insert([Word(0, 0.4, " a")])
+    st.insert([Word(0, 0.4, " a")])
+    # Re-decoded overlap repeats " a" with shifted timing
+    assert st.insert([Word(0.35, 0.45, " a"), Word(0.5, 0.9, " b")]) == []
+    assert [w.text for w in st.insert([Word(0.5, 0.9, " b")])] == [" b"]
+
+
+def test_streaming_decoder_loses_nothing_at_boundaries():
+    calls = []
+    dec = StreamingDecoder(
+        _fake_transcribe_words(calls),
+        RATE,
+        chunk_samples=RATE,  # 1 s chunks, deliberately misaligned with words
+        overlap_samples=RATE // 5,
+        max_window_samples=RATE * 30,
+    )
+    total = len(SCRIPT) * WORD_SPAN
+    utterance = _utterance(total)
+    emitted = ""
+    for n in range(100, utterance.shape[0] + 1, 100):
+        emitted += dec.update(utterance[:n])
+    emitted += dec.finish(utterance)
+    assert emitted == "".join(SCRIPT)
+    # Windows stay bounded by a few chunks instead of growing with the utterance
+    assert max(calls) < 3 * RATE
+
+
+def test_streaming_decoder_emits_before_utterance_end():
+    dec = StreamingDecoder(_fake_transcribe_words([]), RATE, RATE, RATE // 5, RATE * 30)
+    utterance = _utterance(4)
+    partial = dec.update(utterance[:RATE]) + dec.update(utterance[: 2 * RATE])
+    assert partial.startswith(" w0")
+
+
+def test_live_hypotheses_corrected_with_few_keystrokes(monkeypatch):
+    screen = []
+    monkeypatch.setattr(injector.keyboard, "write", lambda text, delay=0: screen.extend(text))
+    monkeypatch.setattr(injector.keyboard, "send", lambda hotkey: screen.pop())
+    out = injector.TextInjector(paste_threshold=0)
+    # 1.2 s chunks cut words in half, so the live tail needs correcting
+    dec = StreamingDecoder(_fake_transcribe_words([]), RATE, 1200, RATE // 5, RATE * 30)
+    utterance = _utterance(len(SCRIPT) * WORD_SPAN)
+    shown = []
+    for n in range(100, utterance.shape[0] + 1, 100):
+        dec.update(utterance[:n])
+        out.apply_revision(dec.hypothesis())
+        shown.append("".join(screen))
+    committed = join_words(dec.stabilizer.committed)
+    out.apply_revision(committed + dec.finish(utterance), final=True)
+
+    assert "".join(screen) == "".join(SCRIPT)
+    # Words appear while speaking, before LocalAgreement would confirm them
+    assert shown[11] == " w0 w1 w2-partial"
+    # Only the cut-off tails are erased; agreed text is never retyped
+    assert out.backspaces == 3 * len("-partial")
+    keys = out.stats()["keystrokes_per_utterance"]["max"]
+    assert keys == len("".join(SCRIPT)) + 2 * out.backspaces
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import numpy as np
+
+from voicekeyboard.stt import SpeechConverter, SpeechSegmenter, StreamingVad, vad_frame_samples
+
+RATE = 16000
+FRAME = 512
+
+
+def _energy_vad(calls=None, **kwargs):
+    def score(frame):
+        if calls is not None:
+            calls.append(frame.shape[0])
+        return 1.0 if float(np.abs(frame).mean()) > 0.1 else 0.0
+
+    return StreamingVad(score, RATE, FRAME, min_silence_ms=100, speech_pad_ms=0, **kwargs)
+
+
+def _speech(frames):
+    return np.full(frames * FRAME, 0.5, dtype=np.float32)
+
+
+def _silence(frames):
+    return np.zeros(frames * FRAME, dtype=np.float32)
+
+
+def test_vad_frame_samples():
+    assert vad_frame_samples(16000) == 512
+    assert vad_frame_samples(8000) == 256
+    assert vad_frame_samples(48000) == 1536
+    assert vad_frame_samples(44100) is None
+
+
+def test_streaming_vad_scores_each_frame_once():
+    calls = []
+    vad = _energy_vad(calls)
+    audio = np.concatenate([_silence(3), _speech(5), _silence(7)])
+    # Feed in odd-sized blocks so frames straddle chunk boundaries
+    for i in range(0, audio.shape[0], 160):
+        vad.process(audio[i : i + 160])
+    assert len(calls) == audio.shape[0] // FRAME
+    assert vad.frames_scored == len(calls)
+
+
+def test_streaming_vad_emits_start_and_end():
+    vad = _energy_vad()
+    events = vad.process(np.concatenate([_silence(2), _speech(4), _silence(6)]))
+    assert [e.kind for e in events] == ["start", "end"]
+    assert events[0].sample == 2 * FRAME
+    assert events[1].sample == 6 * FRAME
+
+
+def test_segmenter_returns_utterance_audio():
+    seg = SpeechSegmenter(_energy_vad(), max_samples=RATE * 5)
+    out = []
+    audio = np.concatenate([_silence(2), _speech(4), _silence(6)])
+    for i in range(0, audio.shape[0], 320):
+        out.extend(seg.feed(audio[i : i + 320]))
+    assert len(out) == 1
+    assert out[0].shape[0] == 4 * FRAME
+    assert not seg.active
+
+
+def test_segmenter_flush_and_long_utterance_cut():
+    seg = SpeechSegmenter(_energy_vad(), max_samples=FRAME * 8)
+    audio = _speech(10)
+    out = []
+    for i in range(0, audio.shape[0], 256):
+        out.extend(seg.feed(audio[i : i + 256]))
+    assert len(out) == 1  # cut before the ring overwrites the utterance start
+    assert seg.active
+    tail = seg.flush()
+    assert len(tail) == 1
+    assert out[0].shape[0] + tail[0].shape[0] == 10 * FRAME
+
+
+class _Model:
+    def __init__(self):
+        self.lengths = []
+
+    def transcribe(self, audio, language=None, vad_filter=False, word_timestamps=False):
+        self.lengths.append(audio.shape[0])
+
+        class Seg:
+            text = "hello"
+
+        return [Seg()], None
+
+
+def test_process_audio_stream_uses_streaming_vad(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    sc = SpeechConverter()
+    sc.vadModel = object()
+    sc.model = _Model()
+    sc.vad = _energy_vad()
+    sc.get_speech_timestamps = lambda *_a, **_k: (_ for _ in ()).throw(AssertionError())
+
+    for block in (_silence(2), _speech(4), _silence(6)):
+        sc.audioQueue.put(block)
+    sc._process_flag = [True]
+    t = threading.Thread(target=sc.processAudioStream, daemon=True)
+    t.start()
+    time.sleep(0.2)
+    sc._process_flag[0] = False
+    t.join(timeout=2)
+
+    assert sc.model.lengths == [4 * FRAME]
+
+
+def test_streaming_vad_drops_speech_shorter_than_min_speech():
+    vad = _energy_vad(min_speech_ms=200)  # 200 ms = 6.25 frames
+    blip = np.concatenate([_silence(2), _speech(4), _silence(6)])
+    assert vad.process(blip) == []
+    assert not vad.triggered
+    assert vad.process(_speech(4)) + vad.flush() == []
+
+    events = vad.process(np.concatenate([_speech(8), _silence(6)]))
+    assert [(e.kind, e.sample) for e in events] == [
+        ("start", blip.shape[0] + 4 * FRAME),
+        ("end", blip.shape[0] + 12 * FRAME),
+    ]
+
+
+def test_late_stop_marker_does_not_drop_the_open_utterance(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "0")
+    sc = SpeechConverter()
+    sc.vadModel = object()
+    sc.model = _Model()
+    sc.vad = _energy_vad()
+    drain = sc.audioQueue.drain
+
+    def drain_then_marker():
+        items = drain()
+        # stop() enqueues its wake marker only after joining the capture thread
+        sc.audioQueue.put_unbounded(None)
+        return items
+
+    monkeypatch.setattr(sc.audioQueue, "drain", drain_then_marker)
+    sc.audioQueue.put(np.concatenate([_silence(2), _speech(4)]))
+    sc._process_flag = [False]
+    sc.processAudioStream()
+
+    assert sc.model.lengths == [4 * FRAME]
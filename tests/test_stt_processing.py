@@ -1,7 +1,12 @@
+import sys
+import threading
 import time
+from queue import Empty
+from types import SimpleNamespace
 
 import numpy as np
 
+from voicekeyboard.settings import settings
 from voicekeyboard.stt import SpeechConverter
 
 
@@ -35,10 +40,70 @@ def test_stt_process_calls_model(monkeypatch):
 
     # Run processing briefly
     sc._process_flag = [True]
-    t = __import__("threading").Thread(target=sc.processAudioStream, daemon=True)
+    t = threading.Thread(target=sc.processAudioStream, daemon=True)
     t.start()
     time.sleep(0.1)
     sc._process_flag[0] = False
     t.join(timeout=1)
 
     assert sc.model.calls >= 1
+
+
+def test_stop_wakes_the_vad_stage_immediately(monkeypatch):
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    waiting = threading.Event()
+    wakeups = []
+    get = sc.audioQueue.get
+
+    def recording_get(*args, **kwargs):
+        waiting.set()
+        try:
+            item = get(*args, **kwargs)
+        except Empty:
+            wakeups.append("timeout")
+            raise
+        wakeups.append("marker" if item is None else "audio")
+        return item
+
+    monkeypatch.setattr(sc.audioQueue, "get", recording_get)
+    sc._process_flag = [True]
+    thread = threading.Thread(target=sc.processAudioStream, daemon=True)
+    sc.transcriptionThread = thread
+    thread.start()
+    assert waiting.wait(5)
+    sc.stop()
+
+    assert not thread.is_alive(), "VAD stage still running after stop()"
+    assert wakeups[-1] == "marker", f"VAD stage was not woken by stop()'s marker: {wakeups}"
+    assert sc.transcriptionThread is None
+
+
+def test_capture_thread_polls_once_per_vad_frame(monkeypatch):
+    class FakeStream:
+        def __init__(self, **_kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            return False
+
+    class RecordingStop:
+        def __init__(self):
+            self.timeouts = []
+
+        def wait(self, timeout=None):
+            self.timeouts.append(timeout)
+            return True
+
+    monkeypatch.setitem(sys.modules, "sounddevice", SimpleNamespace(InputStream=FakeStream))
+    monkeypatch.setattr(settings, "audioSampleRate", 16000)
+    monkeypatch.setattr(settings, "audioCaptureBlockMs", 10)
+    monkeypatch.setenv("VOICEKB_DRYRUN", "1")
+    sc = SpeechConverter()
+    sc._captureStop = RecordingStop()
+    sc._run_audio_stream([True])
+    # A 32 ms Silero frame, not half of the 10 ms block
+    assert sc._captureStop.timeouts == [512 / 16000]
@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+import pytest
+
+from voicekeyboard.asr import ProcessAsrBackend
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import AsrJob, SpeechConverter
+from voicekeyboard.transport import AudioRef, SharedAudioRing, TransportMeter
+
+RATE = 16000
+
+
+@pytest.fixture
+def ring():
+    r = SharedAudioRing(10)
+    yield r
+    r.close()
+
+
+def test_regions_are_contiguous_and_released_in_order(ring):
+    a = ring.write(np.arange(4, dtype=np.float32))
+    b = ring.write(np.arange(4, 8, dtype=np.float32))
+    assert a == AudioRef(0, 4) and b == AudioRef(4, 4)
+    # 3 samples do not fit in the 2-sample tail nor in the freed space yet
+    assert ring.write(np.zeros(3, dtype=np.float32)) is None
+    assert ring.full == 1
+    ring.release(a)
+    c = ring.write(np.array([9, 9, 9], dtype=np.float32))
+    # Skips the tail instead of wrapping, so the view stays contiguous
+    assert c == AudioRef(10, 3)
+    assert ring.view(c).tolist() == [9, 9, 9]
+    assert ring.view(b).tolist() == [4, 5, 6, 7]
+    assert ring.ref_of(ring.view(c)) == c
+    assert ring.ref_of(ring.view(b)[1:3]) == AudioRef(5, 2)
+    assert ring.ref_of(np.zeros(3, dtype=np.float32)) is None
+    ring.release(c)
+    assert ring.used() == 0
+    assert ring.ref_of(ring.view(c)) is None
+
+
+def test_attach_by_name_shares_samples(ring):
+    ref = ring.write(np.array([1.5, 2.5], dtype=np.float32))
+    other = SharedAudioRing(ring.capacity, name=ring.name)
+    try:
+        assert not other.owner
+        assert other.view(ref).tolist() == [1.5, 2.5]
+    finally:
+        other.close()
+
+
+def test_threads_exchange_refs_only():
+    ring = SharedAudioRing(RATE)
+    refs = []
+    received = []
+    done = threading.Event()
+
+    def consume():
+        while not done.is_set() or refs:
+            if refs:
+                ref = refs.pop(0)
+                received.append(float(ring.view(ref)[0]))
+                ring.release(ref)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    for i in range(200):
+        block = np.full(160, i, dtype=np.float32)
+        ref = None
+        while ref is None:
+            ref = ring.write(block)
+        refs.append(ref)
+    done.set()
+    consumer.join(timeout=5)
+    ring.close()
+    assert received == [float(i) for i in range(200)]
+
+
+def test_meter_normalises_per_audio_second():
+    meter = TransportMeter()
+    meter.audio(RATE * 2)
+    meter.copied(4000)
+    meter.copied(4000)
+    meter.referenced(100)
+    stats = meter.stats(RATE)
+    assert stats["audio_seconds"] == 2.0
+    assert stats["copies_per_audio_second"] == 1.0
+    assert stats["bytes_copied_per_audio_second"] == 4000.0
+    assert stats["refs"] == 1
+
+
+def test_process_backend_reads_shared_audio_in_place(monkeypatch):
+    monkeypatch.setattr(settings, "audioSampleRate", RATE)
+    ring = SharedAudioRing(RATE * 4)
+    meter = TransportMeter()
+    backend = ProcessAsrBackend("stub", transport=ring, meter=meter)
+    backend.load()
+    try:
+        shared = ring.view(ring.write(np.zeros(RATE, dtype=np.float32)))
+        assert backend.transcribe(shared) == " w0 w1"
+        assert meter.refs == 1 and meter.copies == 0
+        # Private arrays still go over the pipe
+        assert backend.transcribe(np.zeros(RATE // 2, dtype=np.float32)) == " w0"
+        assert meter.copies == 1
+    finally:
+        backend.close()
+        ring.close()
+
+
+def test_speech_converter_stores_voiced_audio_in_shared_ring():
+    sc = SpeechConverter()
+    sc.asrRing = SharedAudioRing(RATE)
+    try:
+        stored = sc._store_audio(np.ones(100, dtype=np.float32))
+        assert sc.asrRing.ref_of(stored) == AudioRef(0, 100)
+        assert sc.transport_stats()["shared_ring_used"] == 100
+        sc._release_audio(AsrJob("final", [stored]))
+        assert sc.asrRing.used() == 0
+    finally:
+        sc.asrRing.close()
+    sc.asrRing = None
+    private = sc._store_audio(np.ones(10, dtype=np.float32))
+    assert private.flags.owndata
+    assert sc.transport_stats()["copies"] == 2
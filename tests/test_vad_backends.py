@@ -0,0 +1,119 @@
+import numpy
+import pytest
+
+from voicekeyboard import stt
+from voicekeyboard.settings import settings
+from voicekeyboard.stt import OnnxSileroVad, create_vad_backend
+
+
+class FakeInput:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """Scores a frame as speech when its newest samples are loud."""
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.feeds = []
+
+    def get_inputs(self):
+        return [FakeInput(name) for name in self.inputs]
+
+    def run(self, _outputs, feeds):
+        self.feeds.append({k: numpy.array(v) for k, v in feeds.items()})
+        prob = numpy.array([[1.0 if abs(feeds["input"][0, -1]) > 0.1 else 0.0]])
+        if "state" in feeds:
+            return [prob, feeds["state"] + 1]
+        return [prob, feeds["h"] + 1, feeds["c"] + 1]
+
+
+def make_backend(monkeypatch, tmp_path, inputs, sample_rate=16000):
+    model = tmp_path / "silero_vad.onnx"
+    model.write_bytes(b"")
+    session = FakeSession(inputs)
+    backend = OnnxSileroVad(sample_rate, str(model))
+    monkeypatch.setattr(backend, "_create_session", lambda _path: session)
+    backend.load()
+    return backend, session
+
+
+def test_v5_signature_prepends_context_and_carries_state(monkeypatch, tmp_path):
+    backend, session = make_backend(monkeypatch, tmp_path, ["input", "state", "sr"])
+    frame = numpy.arange(512, dtype=numpy.float32)
+    backend.score(frame)
+    backend.score(frame + 1000)
+    first, second = session.feeds
+    assert first["input"].shape == (1, 576)
+    assert int(first["sr"]) == 16000
+    numpy.testing.assert_array_equal(second["input"][0, :64], frame[-64:])
+    assert second["state"].shape == (2, 1, 128)
+    assert float(second["state"][0, 0, 0]) == 1.0
+    backend.reset()
+    assert not backend._state["state"].any()
+    assert not backend._input.any()
+
+
+def test_v4_signature_uses_h_c_without_context(monkeypatch, tmp_path):
+    backend, session = make_backend(monkeypatch, tmp_path, ["input", "sr", "h", "c"])
+    backend.score(numpy.ones(512, dtype=numpy.float32))
+    feeds = session.feeds[0]
+    assert feeds["input"].shape == (1, 512)
+    assert feeds["h"].shape == (2, 1, 64)
+
+
+def test_faster_whisper_signature_has_no_sample_rate(monkeypatch, tmp_path):
+    backend, session = make_backend(monkeypatch, tmp_path, ["input", "h", "c"])
+    assert backend.score(numpy.ones(512, dtype=numpy.float32)) == 1.0
+    feeds = session.feeds[0]
+    assert "sr" not in feeds
+    assert feeds["input"].shape == (1, 576)
+    assert feeds["h"].shape == (1, 1, 128)
+
+
+def test_48k_frames_are_decimated(monkeypatch, tmp_path):
+    backend, session = make_backend(
+        monkeypatch, tmp_path, ["input", "state", "sr"], sample_rate=48000
+    )
+    backend.score(numpy.arange(1536, dtype=numpy.float32))
+    feeds = session.feeds[0]
+    assert int(feeds["sr"]) == 16000
+    numpy.testing.assert_array_equal(feeds["input"][0, 64:], numpy.arange(0, 1536, 3))
+
+
+def test_speech_timestamps_from_frame_scores(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "vadSpeechPadMs", 0)
+    backend, _ = make_backend(monkeypatch, tmp_path, ["input", "state", "sr"])
+    audio = numpy.zeros(16000, dtype=numpy.float32)
+    audio[4096:8192] = 0.5
+    stamps = backend.get_speech_timestamps(audio, None, sampling_rate=16000)
+    assert stamps == [{"start": 4096, "end": 8192}]
+
+
+def test_missing_model_path_raises(tmp_path):
+    backend = OnnxSileroVad(16000, str(tmp_path / "missing.onnx"))
+    with pytest.raises(FileNotFoundError):
+        backend.load()
+
+
+def test_registry(monkeypatch):
+    monkeypatch.setattr(settings, "vadOnnxPath", "/models/vad.onnx")
+    backend = create_vad_backend("onnx", 16000)
+    assert isinstance(backend, OnnxSileroVad)
+    assert backend.path == "/models/vad.onnx"
+    assert isinstance(create_vad_backend("torch", 16000), stt.TorchSileroVad)
+    with pytest.raises(ValueError):
+        create_vad_backend("nope", 16000)
+
+
+def test_streaming_vad_built_from_backend(monkeypatch, tmp_path):
+    backend, _ = make_backend(monkeypatch, tmp_path, ["input", "state", "sr"])
+    monkeypatch.setattr(settings, "audioSampleRate", 16000)
+    monkeypatch.setattr(settings, "vadStreaming", True)
+    sc = stt.SpeechConverter()
+    sc.vadBackend = backend
+    vad = sc._build_streaming_vad()
+    assert vad is not None
+    events = vad.process(numpy.full(16000, 0.5, dtype=numpy.float32))
+    assert events and events[0].kind == "start"
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def qt(monkeypatch):
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+class FakeScreen:
+    """Primary screen of 400x300 whose content is a numpy image."""
+
+    def __init__(self):
+        from PyQt6.QtCore import QRect
+
+        self.pixels = np.full((300, 400, 4), 128, np.uint8)
+        self.bounds = QRect(0, 0, 400, 300)
+        self.grabs = []
+
+    def geometry(self):
+        return self.bounds
+
+    def grabWindow(self, window, x, y, width, height):
+        from PyQt6.QtGui import QImage, QPixmap
+
+        self.grabs.append((x, y, width, height))
+        data = np.ascontiguousarray(self.pixels[y : y + height, x : x + width])
+        image = QImage(data.data, width, height, width * 4, QImage.Format.Format_ARGB32)
+        return QPixmap.fromImage(image.copy())
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Qt offscreen test runs on Linux only")
+def test_blur_grabs_only_the_window_region_and_skips_unchanged(qt):
+    from PyQt6.QtCore import QRect
+
+    from voicekeyboard.window import BackgroundBlur
+
+    screen = FakeScreen()
+    blur = BackgroundBlur(strength=2.0, downscale=4)
+    window = QRect(100, 100, 200, 50)
+
+    assert blur.refresh(screen, window)
+    m = blur.margin
+    assert screen.grabs == [(100 - m, 100 - m, 200 + 2 * m, 50 + 2 * m)]
+    assert (blur.offset.x(), blur.offset.y()) == (m, m)
+    assert blur.frame.width() == 200 + 2 * m
+    # Nothing changed behind the window: the cached frame is kept
+    assert not blur.refresh(screen, window)
+    # Changes under the overlay itself are its own output, not new background
+    screen.pixels[120, 150] = 255
+    assert not blur.refresh(screen, window)
+    screen.pixels[100 - m : 100, 100:300] = 0
+    assert blur.refresh(screen, window)
+    # Moving the window always refreshes
+    assert blur.refresh(screen, window.translated(10, 0))
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Qt offscreen test runs on Linux only")
+def test_blur_smooths_in_place_and_keeps_flat_areas(qt):
+    from PyQt6.QtGui import QImage
+
+    from voicekeyboard.window import BackgroundBlur, _pixels
+
+    image = QImage(40, 20, QImage.Format.Format_ARGB32)
+    image.fill(0xFF808080)
+    pixels = _pixels(image)
+    blur = BackgroundBlur(strength=2.0, downscale=1)
+    blur._blur(pixels)
+    assert (pixels[..., :3] == 128).all() and (pixels[..., 3] == 255).all()
+
+    pixels[::2, ::2, :3] = 255
+    before = pixels[..., 0].std()
+    blur._blur(pixels)
+    assert _pixels(image)[..., 0].std() < before / 4
+    assert (_pixels(image)[..., 3] == 255).all()
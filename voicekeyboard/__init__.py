@@ -6,6 +6,18 @@ Subpackages and modules:
 - voicekeyboard.window: Qt overlay window and UI helpers
 - voicekeyboard.tray: system tray integration
 - voicekeyboard.stt: audio capture and speech-to-text
+- voicekeyboard.pipeline: bounded queues between capture, VAD and ASR stages
+- voicekeyboard.metrics: per-utterance latency and real-time-factor metrics
+- voicekeyboard.exporter: OpenMetrics endpoint and text file for pipeline counters
+- voicekeyboard.profiler: on-demand sampling profiler writing collapsed stacks
+- voicekeyboard.replay: recording of raw capture input and replay into the pipeline
+- voicekeyboard.injector: output engine typing or pasting text into the focused window
+- voicekeyboard.asr: speech recognition backends behind a common interface
+- voicekeyboard.transport: shared-memory audio hand-off and copy accounting
+- voicekeyboard.server: persistent model server and its client backend
+- voicekeyboard.probe: automatic Whisper device / compute type selection
+- voicekeyboard.offline: file transcription to JSON lines
+- voicekeyboard.corpus: resumable bulk transcription on a process pool
 
 Modules are imported directly when needed (no eager imports here) to avoid
 pulling in heavy GUI/ML dependencies at package import time.
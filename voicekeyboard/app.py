@@ -1,14 +1,21 @@
+import argparse
 import logging
 import os
+import signal
 import subprocess
 import sys
-import time
+import threading
+from typing import List, Optional
 
 import keyboard  # noqa: F401
 
+from . import profiler
+from .exporter import MetricsExporter, collect
 from .hotkeys import HotkeysManager, HotkeysService
+from .injector import TextInjector
+from .offline import RAW_FORMATS
 from .settings import settings
-from .stt import SpeechConverter
+from .stt import READINESS_READY, SpeechConverter
 
 
 class Hotkeys:
@@ -65,6 +72,7 @@ class Generic:
         """Load settings from disk and configure logging."""
         settings.load()
         settings.setLogging()
+        profiler.start_from_env()
 
     @staticmethod
     def startWindow():
@@ -76,15 +84,9 @@ class Generic:
     @staticmethod
     def waitWindowLabelVar():
         """Wait for the UI label to be constructed by the Qt thread."""
-        from .window import windowLabel
+        from .window import WindowManager
 
-        while True:
-            try:
-                if windowLabel is not None:
-                    return
-            except NameError:
-                pass
-            time.sleep(0.1)
+        WindowManager.wait_label()
 
     @staticmethod
     def openSettings():
@@ -116,6 +118,7 @@ class Generic:
             restart_cb=lambda *_: Generic.restart(),
             exit_cb=lambda *_: Generic._exit(),
             toggle_window_cb=lambda *_: Generic.toggleWindow(),
+            profile_cb=lambda *_: Generic.toggleProfiler(),
         )
 
     @staticmethod
@@ -144,6 +147,11 @@ class Generic:
             pass
         settings.save()
 
+    @staticmethod
+    def requestShutdown(*_args):
+        """Wake ``main`` to stop services and exit (also the SIGTERM/SIGINT handler)."""
+        shutdownEvent.set()
+
     @staticmethod
     def _exit():
         """Terminate the process after gracefully shutting down subsystems."""
@@ -177,6 +185,24 @@ class Generic:
                 _win.show()
             settings.windowShow = True
 
+    @staticmethod
+    def toggleProfiler():
+        """Start or stop sampling all threads (see :mod:`voicekeyboard.profiler`)."""
+        if profiler.active():
+            logging.info(f"Profile written to {profiler.stop()}")
+        else:
+            profiler.start()
+
+    @staticmethod
+    def showReadiness(state: str):
+        """Reflect the STT model readiness state in the tray icon."""
+        try:
+            from .tray import TrayIconManager
+
+            TrayIconManager.setStatus("" if state == READINESS_READY else state)
+        except Exception:
+            pass
+
     @staticmethod
     def openPreferences():
         """Open the Preferences dialog, unless running in headless mode."""
@@ -190,33 +216,187 @@ class Generic:
         invoke_in_ui(_show_preferences_dialog)
 
 
-def main() -> None:
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="voicekeyboard", description="Voice typing")
+    commands = parser.add_subparsers(dest="command")
+    serve = commands.add_parser(
+        "serve", help="run a model server that keeps the ASR model loaded across app restarts"
+    )
+    serve.add_argument("--socket", help="Unix socket path (default: per-user runtime dir)")
+    serve.add_argument("--backend", help="ASR backend to serve (default: asrBackend)")
+    transcribe = commands.add_parser(
+        "transcribe", help="transcribe an audio file and print segments as JSON lines"
+    )
+    transcribe.add_argument("file", help="WAV file, raw PCM file, or - for raw PCM on stdin")
+    transcribe.add_argument(
+        "--format",
+        choices=sorted(RAW_FORMATS),
+        help="raw PCM sample format (default: read the WAV header)",
+    )
+    transcribe.add_argument("--rate", type=int, default=16000, help="raw PCM sample rate")
+    transcribe.add_argument("--channels", type=int, default=1, help="raw PCM channel count")
+    transcribe.add_argument("--language", help="language code (default: whisperLanguage)")
+    transcribe.add_argument("--words", action="store_true", help="include word timings")
+    transcribe.add_argument(
+        "--block-seconds", type=float, default=1.0, help="audio read per step (default: 1.0)"
+    )
+    batch = commands.add_parser(
+        "batch", help="transcribe many recordings across worker processes, resumably"
+    )
+    batch.add_argument("paths", nargs="*", help="audio files or directories to search")
+    batch.add_argument("--list", help="file with one audio path per line")
+    batch.add_argument("--output-dir", required=True, help="where transcripts are written")
+    batch.add_argument("--manifest", help="progress manifest (default: OUTPUT_DIR/manifest.jsonl)")
+    batch.add_argument("--workers", type=int, default=1, help="worker processes (default: 1)")
+    batch.add_argument(
+        "--threads", type=int, default=0, help="CPU threads per worker (default: cores/workers)"
+    )
+    batch.add_argument(
+        "--format", choices=sorted(RAW_FORMATS), help="sample format of .raw/.pcm files"
+    )
+    batch.add_argument("--rate", type=int, default=16000, help="raw PCM sample rate")
+    batch.add_argument("--channels", type=int, default=1, help="raw PCM channel count")
+    replay = commands.add_parser(
+        "replay", help="feed a recorded capture session through the pipeline and print metrics"
+    )
+    replay.add_argument("file", help=".vkrec recording (see audioRecordDir)")
+    replay.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="1 for the recorded pace, N for N times faster, 0 as fast as possible (default)",
+    )
+    return parser
+
+
+def _run_batch(args: argparse.Namespace) -> None:
+    from .corpus import transcribe_corpus
+    from .offline import AudioFormat
+
+    paths = list(args.paths)
+    if args.list:
+        with open(args.list, "r", encoding="utf-8") as file:
+            paths.extend(line.strip() for line in file if line.strip())
+    raw = None
+    if args.format:
+        raw = AudioFormat(args.rate, args.channels, RAW_FORMATS[args.format])
+    counts = transcribe_corpus(
+        paths, args.output_dir, args.manifest, args.workers, args.threads, raw
+    )
+    print(f"done {counts['done']}, failed {counts['failed']}, skipped {counts['skipped']}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Entry point for console script ``voicekeyboard``.
 
-    Instantiates the STT subsystem and starts the hotkeys service, then idles
-    until a KeyboardInterrupt is received.
+    Without a subcommand, instantiates the STT subsystem and starts the
+    hotkeys service, then idles until a KeyboardInterrupt is received.
+    ``voicekeyboard serve`` runs the model server instead (see
+    :mod:`voicekeyboard.server`) and ``voicekeyboard transcribe`` transcribes
+    a file (see :mod:`voicekeyboard.offline`); ``voicekeyboard batch``
+    transcribes a whole corpus (see :mod:`voicekeyboard.corpus`);
+    ``voicekeyboard replay`` plays back a recorded capture session (see
+    :mod:`voicekeyboard.replay`).
     """
+    args = _build_parser().parse_args(argv)
+    if args.command == "serve":
+        from .server import serve
+
+        Generic.startupSettings()
+        serve(args.socket, args.backend)
+        return
+    if args.command == "transcribe":
+        from .offline import run
+
+        Generic.startupSettings()
+        run(
+            args.file,
+            args.format,
+            args.rate,
+            args.channels,
+            args.language,
+            args.words,
+            args.block_seconds,
+        )
+        return
+    if args.command == "batch":
+        Generic.startupSettings()
+        _run_batch(args)
+        return
+    if args.command == "replay":
+        from .replay import run as run_replay
+
+        Generic.startupSettings()
+        run_replay(args.file, args.speed)
+        return
     global speechConverter
     global _hotkeys_service
     speechConverter = SpeechConverter()
+    speechConverter.add_readiness_listener(Generic.showReadiness)
+    if settings.sttPreloadOnStartup:
+        # Load and warm up models now so the first hotkey press is not slowed down
+        speechConverter.preload()
+    _start_text_injector()
     # Start hotkeys in a dedicated service thread
     _hotkeys_service = HotkeysService(Hotkeys._manager())
     _hotkeys_service.start()
+    _start_metrics_exporter()
 
-    # Main loop; in GUI mode, Qt runs on its own thread
+    # In GUI mode, Qt runs on its own thread; sleep until asked to shut down
+    signal.signal(signal.SIGTERM, Generic.requestShutdown)
+    signal.signal(signal.SIGINT, Generic.requestShutdown)
     try:
-        while True:
-            time.sleep(0.1)
+        if os.name == "nt":
+            # An untimed wait cannot be interrupted by Ctrl+C on Windows
+            while not shutdownEvent.wait(0.5):
+                pass
+        else:
+            shutdownEvent.wait()
     except KeyboardInterrupt:
-        try:
-            _hotkeys_service.stop()
-        finally:
-            Generic._exit()
+        pass
+    try:
+        _hotkeys_service.stop()
+        if speechConverter.injector is not None:
+            speechConverter.injector.stop()
+    finally:
+        Generic._exit()
+
+
+def _start_text_injector() -> None:
+    """Type recognized text into the focused window when ``outputEnabled`` is on."""
+    if not settings.outputEnabled:
+        return
+    speechConverter.injector = TextInjector(
+        paste_threshold=settings.outputPasteThreshold,
+        restore_clipboard=settings.outputRestoreClipboard,
+        metrics=speechConverter.metrics,
+    )
+    speechConverter.injector.start()
 
 
 # Global used by hotkeys
 speechConverter: SpeechConverter
 _hotkeys_service: HotkeysService
+_metrics_exporter: Optional[MetricsExporter] = None
+# Set to make main() stop services and exit
+shutdownEvent = threading.Event()
+
+
+def _start_metrics_exporter() -> None:
+    """Expose pipeline counters when ``metricsExporterPort``/``metricsExporterPath`` are set."""
+    if not settings.metricsExporterPort and not settings.metricsExporterPath:
+        return
+    global _metrics_exporter
+    _metrics_exporter = MetricsExporter(
+        lambda: collect(speechConverter, _hotkeys_service),
+        port=settings.metricsExporterPort,
+        path=settings.metricsExporterPath,
+        interval=settings.metricsExporterInterval,
+    )
+    try:
+        _metrics_exporter.start()
+    except OSError as e:
+        logging.error(f"Failed to start metrics endpoint: {e}")
 
 
 def reload_hotkeys_service() -> None:
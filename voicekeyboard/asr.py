@@ -0,0 +1,630 @@
+"""Speech recognition engines behind a common interface.
+
+:class:`SpeechConverter` talks to an :class:`AsrBackend` instead of a specific
+library, so engines can be swapped (``asrBackend`` setting) or benchmarked
+against each other on the same audio without touching the pipeline. Backends
+are looked up in :data:`ASR_BACKENDS`; heavy libraries are imported in
+:meth:`AsrBackend.load`, never at module import time.
+"""
+
+import logging
+import multiprocessing
+import threading
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy
+
+from .probe import AUTO, resolve_device
+from .settings import settings
+from .transport import AudioRef, SharedAudioRing, TransportMeter
+
+
+class Word(NamedTuple):
+    """Recognized word with start/end times in seconds."""
+
+    start: float
+    end: float
+    text: str
+
+
+class AsrSegment(NamedTuple):
+    """Recognized span of audio; times in seconds relative to the input."""
+
+    start: float
+    end: float
+    text: str
+    words: List[Word]
+
+
+class AsrCapabilities(NamedTuple):
+    """What a loaded backend can do beyond plain :meth:`AsrBackend.transcribe`."""
+
+    # Segments are yielded as they are decoded rather than all at the end
+    streaming: bool
+    # transcribe_batch decodes several buffers in one engine call
+    batching: bool
+    # Segments carry per-word timings
+    word_timestamps: bool
+    # Honours a text prompt conditioning the decode
+    prompting: bool
+
+
+class AsrBackend:
+    """Base class for speech recognition engines.
+
+    Subclasses implement :meth:`load`, :meth:`segments` and
+    :meth:`capabilities`; :meth:`transcribe` and :meth:`transcribe_batch` are
+    derived from :meth:`segments` unless the engine can do better. ``model``
+    holds the engine object once loaded and is None before.
+    """
+
+    name = ""
+
+    def __init__(self) -> None:
+        self.model: Optional[Any] = None
+
+    def load(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the engine; the backend can be loaded again afterwards."""
+        self.model = None
+
+    def capabilities(self) -> AsrCapabilities:
+        raise NotImplementedError
+
+    def segments(
+        self,
+        audio: numpy.ndarray,
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+        prompt: str = "",
+    ) -> Iterator[AsrSegment]:
+        """Decode ``audio`` (mono float32) and yield its segments in order."""
+        raise NotImplementedError
+
+    def transcribe(self, audio: numpy.ndarray, language: Optional[str] = None) -> str:
+        """Decode ``audio`` and return the joined text."""
+        if audio.size == 0:
+            return ""
+        return " ".join(seg.text for seg in self.segments(audio, language=language))
+
+    def transcribe_batch(
+        self, audios: List[numpy.ndarray], language: Optional[str] = None
+    ) -> List[str]:
+        """Decode several independent buffers; one text per buffer."""
+        return [self.transcribe(audio, language=language) for audio in audios]
+
+
+# Whisper decodes fixed windows of this many seconds; the batched pipeline merges
+# clips until one is full, so each buffer gets a whole window of its own
+WHISPER_WINDOW_SECONDS = 30
+
+
+class FasterWhisperBackend(AsrBackend):
+    """faster-whisper (CTranslate2) engine, optionally with batched inference.
+
+    ``model`` and ``batched`` may be passed in to wrap engines built elsewhere.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model: Optional[Any] = None, batched: Optional[Any] = None):
+        super().__init__()
+        self.model = model
+        self.batched = batched
+
+    def load(self) -> None:
+        from faster_whisper import WhisperModel
+
+        device, compute_type = settings.whisperDevice, settings.whisperComputeType
+        if AUTO in (device, compute_type):
+            device, compute_type = resolve_device(settings.whisperModel, device, compute_type)
+        self.model = WhisperModel(
+            model_size_or_path=settings.whisperModel,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=settings.whisperCpuThreads,
+            num_workers=settings.whisperNumWorkers,
+        )
+        if settings.whisperBatchMaxSize > 1:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+
+                self.batched = BatchedInferencePipeline(model=self.model)
+            except ImportError:
+                logging.info("Batched inference unavailable; decoding sequentially")
+
+    def close(self) -> None:
+        self.model = None
+        self.batched = None
+
+    def capabilities(self) -> AsrCapabilities:
+        return AsrCapabilities(
+            streaming=True,
+            batching=self.batched is not None,
+            word_timestamps=True,
+            prompting=True,
+        )
+
+    def segments(
+        self,
+        audio: numpy.ndarray,
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+        prompt: str = "",
+    ) -> Iterator[AsrSegment]:
+        if self.model is None or audio.size == 0:
+            return
+        kwargs: Dict[str, Any] = {}
+        if prompt:
+            kwargs["initial_prompt"] = prompt
+        segments, _info = self.model.transcribe(
+            audio.astype(numpy.float32, copy=False),
+            language=language,
+            vad_filter=False,
+            word_timestamps=word_timestamps,
+            **kwargs,
+        )
+        for seg in segments:
+            seg_words = getattr(seg, "words", None) or []
+            yield AsrSegment(
+                seg.start, seg.end, seg.text, [Word(w.start, w.end, w.word) for w in seg_words]
+            )
+
+    def transcribe(self, audio: numpy.ndarray, language: Optional[str] = None) -> str:
+        if self.model is None or audio.size == 0:
+            return ""
+        segments, _info = self.model.transcribe(
+            audio.astype(numpy.float32, copy=False),
+            language=language,
+            vad_filter=False,
+            word_timestamps=False,
+        )
+        return " ".join([seg.text for seg in segments])
+
+    def transcribe_batch(
+        self, audios: List[numpy.ndarray], language: Optional[str] = None
+    ) -> List[str]:
+        """Decode the buffers in one batched call when possible.
+
+        ``BatchedInferencePipeline`` packs adjacent clips into one window of
+        up to ``WHISPER_WINDOW_SECONDS`` and returns a single segment for it, so
+        short buffers laid end to end would be decoded together and their
+        texts lumped onto the first one. Each buffer is therefore padded with
+        silence to a full window (what Whisper does to every input anyway) and
+        given as one clip, which makes every batch entry exactly one buffer.
+        Buffers longer than a window, and everything when there is no batched
+        engine, are decoded one by one.
+        """
+        if self.model is None:
+            return ["" for _ in audios]
+        window = WHISPER_WINDOW_SECONDS * settings.audioSampleRate
+        batch = [i for i, audio in enumerate(audios) if 0 < len(audio) <= window]
+        if self.batched is None or len(batch) < 2:
+            return [self.transcribe(audio, language=language) for audio in audios]
+        joined = numpy.zeros(len(batch) * window, dtype=numpy.float32)
+        for slot, index in enumerate(batch):
+            joined[slot * window : slot * window + len(audios[index])] = audios[index]
+        clips = [
+            {"start": slot * WHISPER_WINDOW_SECONDS, "end": (slot + 1) * WHISPER_WINDOW_SECONDS}
+            for slot in range(len(batch))
+        ]
+        segments, _info = self.batched.transcribe(
+            joined,
+            language=language,
+            vad_filter=False,
+            word_timestamps=False,
+            without_timestamps=True,
+            clip_timestamps=clips,
+            chunk_length=WHISPER_WINDOW_SECONDS,
+            batch_size=len(batch),
+        )
+        parts: List[List[str]] = [[] for _ in batch]
+        for seg in segments:
+            # Segment times are absolute in the joined audio; one window per buffer
+            slot = min(len(batch) - 1, max(0, int(seg.start + 1e-3) // WHISPER_WINDOW_SECONDS))
+            parts[slot].append(seg.text)
+        texts = {index: " ".join(parts[slot]) for slot, index in enumerate(batch)}
+        return [
+            texts[i] if i in texts else self.transcribe(audio, language=language)
+            for i, audio in enumerate(audios)
+        ]
+
+
+class StubBackend(AsrBackend):
+    """Deterministic engine for tests and pipeline benchmarks.
+
+    Emits one word per ``word_duration`` seconds of input (``w0``, ``w1``, ...),
+    timed on a fixed grid, so identical audio always yields identical text and
+    overlapping windows agree on their common words. ``calls`` records the
+    length of every decoded buffer.
+    """
+
+    name = "stub"
+
+    def __init__(self, word_duration: float = 0.5, sample_rate: Optional[int] = None):
+        super().__init__()
+        self.word_duration = word_duration
+        self.sample_rate = sample_rate
+        self.calls: List[int] = []
+
+    def load(self) -> None:
+        self.model = self
+
+    def capabilities(self) -> AsrCapabilities:
+        return AsrCapabilities(
+            streaming=True, batching=False, word_timestamps=True, prompting=False
+        )
+
+    def segments(
+        self,
+        audio: numpy.ndarray,
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+        prompt: str = "",
+    ) -> Iterator[AsrSegment]:
+        self.calls.append(int(audio.shape[0]))
+        rate = self.sample_rate or settings.audioSampleRate
+        duration = audio.shape[0] / rate
+        count = int(duration / self.word_duration)
+        if count == 0:
+            return
+        words = [
+            Word(i * self.word_duration, (i + 1) * self.word_duration, f" w{i}")
+            for i in range(count)
+        ]
+        yield AsrSegment(0.0, words[-1].end, "".join(w.text for w in words), words)
+
+
+class AsrWorkerError(RuntimeError):
+    """An out-of-process ASR worker failed a request or could not be reached."""
+
+
+class _WorkerDied(Exception):
+    pass
+
+
+def _settings_snapshot() -> Dict[str, Any]:
+    """Plain-valued settings to replay in the worker process."""
+    return {
+        key: value
+        for key, value in vars(settings).items()
+        if value is None or isinstance(value, (bool, int, float, str))
+    }
+
+
+def _split_audio(data: bytes, lengths: List[int]) -> List[numpy.ndarray]:
+    joined = numpy.frombuffer(data, dtype=numpy.float32)
+    audios: List[numpy.ndarray] = []
+    position = 0
+    for length in lengths:
+        audios.append(joined[position : position + length])
+        position += length
+    return audios
+
+
+def _process_worker_main(
+    conn: Any,
+    name: str,
+    snapshot: Dict[str, Any],
+    ring_name: Optional[str] = None,
+    ring_capacity: int = 0,
+) -> None:
+    """Entry point of the ASR worker process: load ``name`` and serve requests.
+
+    Requests are ``(op, refs, lengths, params)``. With ``refs`` the audio is read
+    in place from the shared ring ``ring_name``; otherwise it follows as one raw
+    float32 byte message. Replies are ``("segment", seg)``* then
+    ``("done", result)`` or ``("error", message)``.
+    """
+    for key, value in snapshot.items():
+        setattr(settings, key, value)
+    ring: Optional[SharedAudioRing] = None
+    try:
+        if ring_name:
+            ring = SharedAudioRing(ring_capacity, name=ring_name)
+        backend = create_asr_backend(name)
+        backend.load()
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", backend.capabilities()))
+    serve_connection(conn, backend, ring)
+    backend.close()
+    if ring is not None:
+        ring.close()
+
+
+def serve_connection(
+    conn: Any,
+    backend: AsrBackend,
+    ring: Optional[SharedAudioRing],
+    lock: Optional[threading.Lock] = None,
+) -> None:
+    """Answer worker-protocol requests on ``conn`` until it closes or sends ``stop``.
+
+    ``ring`` is the client's attached shared audio ring, if any. ``lock``
+    serialises engine calls when several connections share ``backend``.
+    """
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        op = message[0]
+        if op == "stop":
+            break
+        _op, refs, lengths, params = message
+        if refs is not None and ring is not None:
+            audios = [ring.view(ref) for ref in refs]
+        else:
+            audios = _split_audio(conn.recv_bytes(), lengths)
+        try:
+            if lock is not None:
+                lock.acquire()
+            try:
+                if op == "segments":
+                    for seg in backend.segments(audios[0], **params):
+                        conn.send(("segment", seg))
+                    conn.send(("done", None))
+                elif op == "transcribe":
+                    conn.send(("done", backend.transcribe(audios[0], **params)))
+                elif op == "batch":
+                    conn.send(("done", backend.transcribe_batch(audios, **params)))
+                else:
+                    conn.send(("error", f"Unknown request: {op}"))
+            finally:
+                if lock is not None:
+                    lock.release()
+        except (EOFError, OSError):
+            break
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class ConnectedAsrBackend(AsrBackend):
+    """Client side of the worker protocol, over any ``multiprocessing`` connection.
+
+    Audio that already lives in ``transport`` (a
+    :class:`~voicekeyboard.transport.SharedAudioRing` the peer has attached) is
+    passed by offset and length only; other audio is sent as raw float32 bytes.
+    Segments stream back as they are decoded. Subclasses open the connection
+    and decide how to recover when it drops (:meth:`_alive`, :meth:`_recover`).
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 0.1,
+        transport: Optional[SharedAudioRing] = None,
+        meter: Optional[TransportMeter] = None,
+    ):
+        super().__init__()
+        self.transport = transport
+        self.meter = meter if meter is not None else TransportMeter()
+        self.poll_interval = poll_interval
+        self._conn: Optional[Any] = None
+        self._caps: Optional[AsrCapabilities] = None
+        # Whether the peer attached ``transport`` and accepts audio by reference
+        self._peer_ring = transport is not None
+        # One request in flight at a time; replies are matched by order
+        self._lock = threading.Lock()
+
+    def capabilities(self) -> AsrCapabilities:
+        if self._caps is None:
+            raise AsrWorkerError("ASR worker not loaded")
+        return self._caps
+
+    def _alive(self) -> bool:
+        return self._conn is not None
+
+    def _recover(self) -> None:
+        """Re-establish the connection after it dropped, or raise AsrWorkerError."""
+        raise NotImplementedError
+
+    def _receive(self) -> Tuple[str, Any]:
+        conn = self._conn
+        if conn is None:
+            raise _WorkerDied
+        try:
+            # Blocks in poll (GIL released) and notices a dead peer promptly
+            while not conn.poll(self.poll_interval):
+                if not self._alive():
+                    raise _WorkerDied
+            return conn.recv()
+        except (EOFError, OSError):
+            raise _WorkerDied from None
+
+    def _send(self, op: str, audios: List[numpy.ndarray], params: Dict[str, Any]) -> None:
+        if self._conn is None:
+            raise _WorkerDied
+        lengths = [int(audio.shape[0]) for audio in audios]
+        refs: Optional[List[AudioRef]] = None
+        if self.transport is not None and self._peer_ring:
+            found = [self.transport.ref_of(audio) for audio in audios]
+            if all(ref is not None for ref in found):
+                refs = [ref for ref in found if ref is not None]
+        try:
+            self._conn.send((op, refs, lengths, params))
+            if refs is not None:
+                for audio in audios:
+                    self.meter.referenced(audio.nbytes)
+                return
+            joined = numpy.concatenate(audios) if len(audios) > 1 else audios[0]
+            joined = numpy.ascontiguousarray(joined, dtype=numpy.float32)
+            self._conn.send_bytes(joined)
+            self.meter.copied(joined.nbytes)
+        except (OSError, ValueError):
+            raise _WorkerDied from None
+
+    def _exchange(self, op: str, audios: List[numpy.ndarray], params: Dict[str, Any]) -> Any:
+        """Send one request and return its first reply, recovering once per drop."""
+        while True:
+            try:
+                if not self._alive():
+                    raise _WorkerDied
+                self._send(op, audios, params)
+                return self._receive()
+            except _WorkerDied:
+                self._recover()
+
+    def _request(self, op: str, audios: List[numpy.ndarray], params: Dict[str, Any]) -> Any:
+        with self._lock:
+            kind, payload = self._exchange(op, audios, params)
+        if kind == "error":
+            raise AsrWorkerError(payload)
+        return payload
+
+    def segments(
+        self,
+        audio: numpy.ndarray,
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+        prompt: str = "",
+    ) -> Iterator[AsrSegment]:
+        if audio.size == 0:
+            return
+        params = {"language": language, "word_timestamps": word_timestamps, "prompt": prompt}
+        with self._lock:
+            kind, payload = self._exchange("segments", [audio], params)
+            # Later replies cannot be retried: segments were already handed out
+            try:
+                while kind == "segment":
+                    yield payload
+                    kind, payload = self._receive()
+            except _WorkerDied:
+                raise AsrWorkerError("ASR worker died while streaming segments") from None
+            finally:
+                # Abandoned mid-stream: consume the rest so replies stay in order
+                while kind == "segment":
+                    try:
+                        kind, payload = self._receive()
+                    except _WorkerDied:
+                        break
+        if kind == "error":
+            raise AsrWorkerError(payload)
+
+    def transcribe(self, audio: numpy.ndarray, language: Optional[str] = None) -> str:
+        if audio.size == 0:
+            return ""
+        return self._request("transcribe", [audio], {"language": language})
+
+    def transcribe_batch(
+        self, audios: List[numpy.ndarray], language: Optional[str] = None
+    ) -> List[str]:
+        if not audios:
+            return []
+        return self._request("batch", audios, {"language": language})
+
+
+class ProcessAsrBackend(ConnectedAsrBackend):
+    """Runs another backend in a child process, out of the app's GIL.
+
+    Decoding then no longer competes with the Qt overlay, the tray loop and the
+    keyboard hook for the interpreter. If the worker dies, it is restarted and
+    the request retried (up to ``max_restarts`` times over the backend's
+    lifetime); ``restarts`` counts restarts so far.
+    """
+
+    name = "process"
+
+    def __init__(
+        self,
+        inner: str,
+        max_restarts: int = 3,
+        poll_interval: float = 0.1,
+        transport: Optional[SharedAudioRing] = None,
+        meter: Optional[TransportMeter] = None,
+    ):
+        super().__init__(poll_interval, transport, meter)
+        self.inner = inner
+        self.max_restarts = max(0, int(max_restarts))
+        self.restarts = 0
+        self.process: Optional[Any] = None
+
+    def load(self) -> None:
+        with self._lock:
+            self._start()
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+        self.model = None
+
+    def _alive(self) -> bool:
+        return self._conn is not None and self.process is not None and self.process.is_alive()
+
+    def _recover(self) -> None:
+        self._restart()
+
+    def _start(self) -> None:
+        # spawn: a fresh interpreter, safe with the app's threads and Qt
+        context = multiprocessing.get_context("spawn")
+        parent, child = context.Pipe()
+        process = context.Process(
+            target=_process_worker_main,
+            args=(
+                child,
+                self.inner,
+                _settings_snapshot(),
+                None if self.transport is None else self.transport.name,
+                0 if self.transport is None else self.transport.capacity,
+            ),
+            name=f"asr-{self.inner}",
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        self.process, self._conn = process, parent
+        try:
+            kind, payload = self._receive()
+        except _WorkerDied:
+            self._stop()
+            raise AsrWorkerError(f"ASR worker exited during load ({process.exitcode})")
+        if kind != "ready":
+            self._stop()
+            raise AsrWorkerError(f"ASR worker failed to load: {payload}")
+        self._caps = payload
+        self.model = process
+        logging.info(f"ASR worker {self.inner} running as pid {process.pid}")
+
+    def _stop(self) -> None:
+        conn, process = self._conn, self.process
+        self._conn = self.process = None
+        if conn is not None:
+            try:
+                conn.send(("stop",))
+            except (OSError, ValueError):
+                pass
+        if process is not None:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=2)
+        if conn is not None:
+            conn.close()
+
+    def _restart(self) -> None:
+        if self.restarts >= self.max_restarts:
+            self._stop()
+            raise AsrWorkerError("ASR worker crashed too often; giving up")
+        self.restarts += 1
+        exitcode = None if self.process is None else self.process.exitcode
+        logging.warning(f"ASR worker died ({exitcode}); restart {self.restarts}")
+        self._stop()
+        self._start()
+
+
+ASR_BACKENDS: Dict[str, Callable[[], AsrBackend]] = {
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def create_asr_backend(name: str) -> AsrBackend:
+    """Instantiate the ASR backend registered under ``name`` (not yet loaded)."""
+    try:
+        factory = ASR_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown ASR backend: {name}") from None
+    return factory()
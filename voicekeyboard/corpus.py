@@ -0,0 +1,231 @@
+"""Bulk transcription of many recordings (``voicekeyboard batch``).
+
+Files are spread over a pool of worker processes. Each worker loads the
+models once in its initializer, with ``threads`` CPU threads, and then
+transcribes file after file through :func:`voicekeyboard.offline.transcribe_file`,
+writing one JSONL output per recording. Every finished file is appended to a
+manifest, so an interrupted run started again with the same manifest skips
+what is already done and retries what failed.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+import numpy
+
+from .asr import FasterWhisperBackend, _settings_snapshot
+from .offline import AudioFormat, transcribe_file, wav_format
+from .probe import AUTO, resolve_device
+from .settings import settings
+from .stt import SpeechConverter
+
+AUDIO_EXTENSIONS = (".wav",)
+RAW_EXTENSIONS = (".raw", ".pcm")
+# Environment variables that size the BLAS/OpenMP thread pools of each worker
+THREAD_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+ConverterFactory = Callable[[], SpeechConverter]
+
+
+class CorpusJob(NamedTuple):
+    """One recording and where its transcript goes."""
+
+    source: str
+    output: str
+
+
+def find_audio(paths: Iterable[str], raw: bool = False) -> List[str]:
+    """Audio files named in ``paths``, with directories searched recursively.
+
+    Directories contribute ``.wav`` files (and ``.raw``/``.pcm`` with ``raw``);
+    explicitly named files are taken as they are. The result is sorted and
+    free of duplicates.
+    """
+    extensions = AUDIO_EXTENSIONS + (RAW_EXTENSIONS if raw else ())
+    found: Set[str] = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                found.update(
+                    os.path.join(root, name) for name in files if name.lower().endswith(extensions)
+                )
+        elif os.path.isfile(path):
+            found.add(path)
+        else:
+            logging.warning(f"Skipping {path}: not a file or directory")
+    return sorted(os.path.abspath(path) for path in found)
+
+
+def plan_jobs(files: List[str], output_dir: str) -> List[CorpusJob]:
+    """Map each file to ``output_dir/<path relative to the common root>.jsonl``."""
+    if not files:
+        return []
+    root = os.path.commonpath([os.path.dirname(path) for path in files])
+    return [
+        CorpusJob(path, os.path.join(output_dir, os.path.relpath(path, root) + ".jsonl"))
+        for path in files
+    ]
+
+
+def read_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest manifest entry per source file; a torn last line is ignored."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and "file" in entry:
+                    entries[entry["file"]] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def pending_jobs(jobs: List[CorpusJob], manifest: Dict[str, Dict[str, Any]]) -> List[CorpusJob]:
+    """Jobs not yet recorded as done (or whose output has since disappeared)."""
+    return [
+        job
+        for job in jobs
+        if manifest.get(job.source, {}).get("status") != "done" or not os.path.isfile(job.output)
+    ]
+
+
+def _load_converter() -> SpeechConverter:
+    converter = SpeechConverter()
+    converter._ensure_models_loaded()
+    if converter.asr is None:
+        raise RuntimeError("Speech models failed to load")
+    return converter
+
+
+def _worker_snapshot(factory: ConverterFactory) -> Dict[str, Any]:
+    """Settings for the workers, with an ``auto`` device resolved here once.
+
+    Otherwise every worker would run the device probe at the same time, timing
+    candidates against each other's load and racing to write the probe cache.
+    """
+    snapshot = _settings_snapshot()
+    device, compute_type = settings.whisperDevice, settings.whisperComputeType
+    if (
+        factory is _load_converter
+        and settings.asrBackend == FasterWhisperBackend.name
+        and AUTO in (device, compute_type)
+    ):
+        device, compute_type = resolve_device(settings.whisperModel, device, compute_type)
+        snapshot.update(whisperDevice=device, whisperComputeType=compute_type)
+    return snapshot
+
+
+# Per-process state of a pool worker, set by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(
+    snapshot: Dict[str, Any],
+    threads: int,
+    raw: Optional[AudioFormat],
+    factory: ConverterFactory,
+) -> None:
+    for key, value in snapshot.items():
+        setattr(settings, key, value)
+    # Keep N workers x ``threads`` within the machine instead of oversubscribing it
+    settings.whisperCpuThreads = threads
+    _worker["raw"] = raw
+    try:
+        _worker["converter"] = factory()
+    except Exception as e:
+        # Raising here would make the pool respawn this worker forever; fail its jobs instead
+        _worker["error"] = f"{type(e).__name__}: {e}"
+        logging.error(f"Corpus worker {os.getpid()} could not load models: {e}")
+        return
+    logging.info(f"Corpus worker {os.getpid()} ready with {threads} threads")
+
+
+def _transcribe_job(job: CorpusJob) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"file": job.source, "output": job.output}
+    started = time.perf_counter()
+    partial = job.output + ".part"
+    if "error" in _worker:
+        entry.update(status="failed", error=_worker["error"], seconds=0.0, worker=os.getpid())
+        return entry
+    try:
+        fmt = _worker["raw"] if job.source.lower().endswith(RAW_EXTENSIONS) else None
+        if fmt is None:
+            fmt = wav_format(job.source)
+        os.makedirs(os.path.dirname(job.output) or ".", exist_ok=True)
+        with open(partial, "w", encoding="utf-8") as out:
+            segments = transcribe_file(job.source, out, fmt, converter=_worker["converter"])
+        os.replace(partial, job.output)
+        frames = fmt.frames
+        if frames is None:
+            frame_bytes = fmt.channels * numpy.dtype(fmt.dtype).itemsize
+            frames = (os.path.getsize(job.source) - fmt.offset) // frame_bytes
+        entry.update(status="done", segments=segments, audio=round(frames / fmt.sample_rate, 3))
+    except Exception as e:
+        entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+        try:
+            os.unlink(partial)
+        except OSError:
+            pass
+    entry["seconds"] = round(time.perf_counter() - started, 3)
+    entry["worker"] = os.getpid()
+    return entry
+
+
+def transcribe_corpus(
+    paths: Iterable[str],
+    output_dir: str,
+    manifest_path: Optional[str] = None,
+    workers: int = 1,
+    threads: int = 0,
+    raw: Optional[AudioFormat] = None,
+    factory: ConverterFactory = _load_converter,
+) -> Dict[str, int]:
+    """Transcribe every recording under ``paths`` into ``output_dir``.
+
+    ``workers`` processes each load the models once (``factory``) and use
+    ``threads`` CPU threads (0: share the cores evenly). ``raw`` describes
+    ``.raw``/``.pcm`` inputs. Progress goes to ``manifest_path`` (default
+    ``output_dir/manifest.jsonl``); files it records as done are skipped.
+    Returns counts of ``done``, ``failed`` and ``skipped`` files.
+    """
+    manifest_path = manifest_path or os.path.join(output_dir, "manifest.jsonl")
+    jobs = plan_jobs(find_audio(paths, raw=raw is not None), output_dir)
+    todo = pending_jobs(jobs, read_manifest(manifest_path))
+    counts = {"done": 0, "failed": 0, "skipped": len(jobs) - len(todo)}
+    if counts["skipped"]:
+        logging.info(f"Resuming: {counts['skipped']} of {len(jobs)} files already done")
+    if not todo:
+        return counts
+    workers = max(1, min(int(workers), len(todo)))
+    threads = int(threads) or max(1, (os.cpu_count() or 1) // workers)
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    # spawn: fresh interpreters, safe with the app's threads and native libraries
+    context = multiprocessing.get_context("spawn")
+    initargs = (_worker_snapshot(factory), threads, raw, factory)
+    # Native thread pools read these at import, so spawned workers must inherit them
+    saved = {variable: os.environ.get(variable) for variable in THREAD_VARIABLES}
+    os.environ.update({variable: str(threads) for variable in THREAD_VARIABLES})
+    try:
+        with open(manifest_path, "a", encoding="utf-8") as manifest:
+            with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+                for entry in pool.imap_unordered(_transcribe_job, todo):
+                    manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    manifest.flush()
+                    counts[entry["status"]] += 1
+                    finished = counts["done"] + counts["failed"]
+                    logging.info(f"[{finished}/{len(todo)}] {entry['status']}: {entry['file']}")
+    finally:
+        for variable, value in saved.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+    return counts
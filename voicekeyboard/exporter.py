@@ -0,0 +1,446 @@
+"""Pipeline counters in OpenMetrics text format, for fleet monitoring.
+
+:func:`collect` gathers counters and gauges from the
+:class:`~voicekeyboard.stt.SpeechConverter`, the
+:class:`~voicekeyboard.hotkeys.HotkeysService` and the Qt window thread, and
+:func:`render` formats them as OpenMetrics text. :class:`MetricsExporter`
+serves that text at ``http://127.0.0.1:<port>/metrics`` and/or rewrites it to
+a file every few seconds, so a Prometheus-compatible scraper (or the node
+exporter's textfile collector) can watch dictation latency without parsing
+``application.log``.
+"""
+
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .stt import READINESS_READY
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PREFIX = "voicekeyboard_"
+
+Labels = Dict[str, str]
+
+
+class MetricFamily(NamedTuple):
+    """One metric with its type, help text and labelled samples."""
+
+    name: str
+    # "counter" or "gauge"
+    kind: str
+    help: str
+    samples: List[Tuple[Labels, float]]
+    # OpenMetrics unit; ``name`` must end with it
+    unit: str = ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def render(families: List[MetricFamily]) -> str:
+    """Format ``families`` as an OpenMetrics text exposition ending in ``# EOF``."""
+    lines: List[str] = []
+    for family in families:
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        if family.unit:
+            lines.append(f"# UNIT {family.name} {family.unit}")
+        lines.append(f"# HELP {family.name} {_escape(family.help)}")
+        suffix = "_total" if family.kind == "counter" else ""
+        for labels, value in family.samples:
+            label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            if label_text:
+                label_text = "{" + label_text + "}"
+            lines.append(f"{family.name}{suffix}{label_text} {_format_value(value)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if os.name == "nt":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class _Counters(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = _Counters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()  # type: ignore[attr-defined]
+            if ctypes.windll.psapi.GetProcessMemoryInfo(  # type: ignore[attr-defined]
+                process, ctypes.byref(counters), counters.cb
+            ):
+                return int(counters.WorkingSetSize)
+        except Exception:
+            pass
+    return None
+
+
+def _single(kind: str, name: str, help: str, value: float, unit: str = "") -> MetricFamily:
+    return MetricFamily(PREFIX + name, kind, help, [({}, value)], unit)
+
+
+def _per_queue(kind: str, name: str, help: str, queues: List[Dict[str, Any]], key: str):
+    return MetricFamily(PREFIX + name, kind, help, [({"queue": q["name"]}, q[key]) for q in queues])
+
+
+def _converter_families(sc: Any) -> List[MetricFamily]:
+    capture = sc.capture_stats()
+    queues = sc.pipeline_stats()
+    snap = sc.metrics.snapshot()
+    families = [
+        _single(
+            "counter",
+            "audio_frames_received",
+            "Audio frames delivered by the input device",
+            capture["frames_captured"],
+        ),
+        _single(
+            "counter",
+            "audio_frames_dropped",
+            "Captured frames lost because the capture ring was full",
+            capture["frames_dropped"],
+        ),
+        _single(
+            "counter",
+            "audio_input_overflows",
+            "Input overflows reported by the audio device",
+            capture["input_overflows"],
+        ),
+        _per_queue(
+            "counter",
+            "queue_items_dropped",
+            "Items a stage queue discarded under its overflow policy",
+            queues,
+            "dropped",
+        ),
+        _per_queue("gauge", "queue_depth", "Items waiting in a stage queue", queues, "depth"),
+        _per_queue(
+            "gauge",
+            "queue_high_water",
+            "Largest depth a stage queue has reached",
+            queues,
+            "high_water",
+        ),
+        _single(
+            "counter",
+            "vad_windows_scored",
+            "Windows scored by the voice activity detector",
+            sc.vad_windows_scored(),
+        ),
+        _single(
+            "counter",
+            "segments_transcribed",
+            "Utterances decoded by the ASR backend",
+            snap["segments"],
+        ),
+        _single(
+            "counter",
+            "audio_transcribed_seconds",
+            "Seconds of speech decoded",
+            snap["audio_seconds"],
+            "seconds",
+        ),
+        _single(
+            "counter", "decode_seconds", "Seconds spent decoding", snap["decode_seconds"], "seconds"
+        ),
+        _single(
+            "gauge",
+            "model_ready",
+            "1 when the speech models are loaded and warmed up",
+            sc.readiness == READINESS_READY,
+        ),
+    ]
+    if snap["rtf"].get("overall") is not None:
+        families.append(
+            _single(
+                "gauge", "realtime_factor", "Decode time over audio time", snap["rtf"]["overall"]
+            )
+        )
+    if sc.modelLoadSeconds is not None:
+        families.append(
+            _single(
+                "gauge",
+                "model_load_seconds",
+                "Duration of the last model load",
+                sc.modelLoadSeconds,
+                "seconds",
+            )
+        )
+    latency: List[Tuple[Labels, float]] = [
+        ({"stage": stage, "percentile": pct}, summary["p" + pct] / 1000.0)
+        for stage, summary in snap["latency_ms"].items()
+        if summary.get("count")
+        for pct in ("50", "95", "99")
+    ]
+    if latency:
+        families.append(
+            MetricFamily(
+                PREFIX + "utterance_latency_seconds",
+                "gauge",
+                "Per-stage utterance latency percentiles over the recent window",
+                latency,
+                "seconds",
+            )
+        )
+    return families
+
+
+def collect(converter: Any = None, hotkeys: Any = None) -> List[MetricFamily]:
+    """Metric families from whichever of the app's components are running.
+
+    Window counters are only reported when the Qt window module is loaded,
+    so headless runs never import Qt for this.
+    """
+    families: List[MetricFamily] = []
+    if converter is not None:
+        families.extend(_converter_families(converter))
+    if hotkeys is not None:
+        stats = hotkeys.stats()
+        families.append(
+            _single(
+                "counter",
+                "hotkey_activations",
+                "Hotkey presses that started or stopped recording",
+                stats["activations"],
+            )
+        )
+        families.append(
+            _single(
+                "gauge", "hotkeys_running", "1 while the hotkeys service runs", stats["running"]
+            )
+        )
+    window = sys.modules.get(__package__ + ".window")
+    if window is not None:
+        thread = window.windowThread
+        stats = window.windowStats
+        families.append(
+            _single(
+                "gauge",
+                "window_thread_running",
+                "1 while the Qt window thread runs",
+                thread is not None and thread.is_alive(),
+            )
+        )
+        families.append(
+            _single(
+                "counter",
+                "window_label_updates",
+                "Overlay label changes applied",
+                stats["label_updates"],
+            )
+        )
+        label = window.labelUpdater.stats()
+        families.append(
+            _single(
+                "counter",
+                "window_label_updates_coalesced",
+                "Label texts replaced by a newer one before being shown",
+                label["coalesced"],
+            )
+        )
+        families.append(
+            _single(
+                "counter",
+                "window_label_updates_unchanged",
+                "Label flushes skipped because the text was already shown",
+                label["unchanged"],
+            )
+        )
+        families.append(
+            _single("counter", "window_repaints", "Blurred background repaints", stats["repaints"])
+        )
+        families.append(
+            _single(
+                "counter",
+                "window_repaint_seconds",
+                "Seconds spent repainting the blurred background",
+                stats["repaint_seconds"],
+                "seconds",
+            )
+        )
+        families.append(
+            _single(
+                "gauge",
+                "window_last_repaint_seconds",
+                "Duration of the latest background repaint",
+                stats["last_repaint_seconds"],
+                "seconds",
+            )
+        )
+        families.append(
+            _single(
+                "counter",
+                "window_blur_frames",
+                "Background captures blurred into a new frame",
+                stats["blur_frames"],
+            )
+        )
+        families.append(
+            _single(
+                "counter",
+                "window_blur_skipped",
+                "Background captures skipped because the region was unchanged",
+                stats["blur_skipped"],
+            )
+        )
+        families.append(
+            _single(
+                "counter",
+                "window_blur_seconds",
+                "Seconds spent capturing, hashing and blurring the background",
+                stats["blur_seconds"],
+                "seconds",
+            )
+        )
+    rss = process_rss_bytes()
+    if rss is not None:
+        families.append(
+            _single("gauge", "process_resident_memory_bytes", "Resident set size", rss, "bytes")
+        )
+    return families
+
+
+def write_file(text: str, path: str) -> None:
+    """Replace ``path`` with ``text`` atomically (textfile collectors may read at any time)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = path + ".tmp"
+    with open(partial, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(partial, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_MetricsHttpServer"
+
+    def do_GET(self):  # noqa: N802 - http.server naming
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        try:
+            body = self.server.render_fn().encode("utf-8")
+        except Exception as e:
+            logging.error(f"Failed to collect metrics: {e}")
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes would otherwise flood stderr
+        pass
+
+
+class _MetricsHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], render_fn: Callable[[], str]):
+        super().__init__(address, _Handler)
+        self.render_fn = render_fn
+
+
+class MetricsExporter:
+    """Expose ``collect_fn()`` over HTTP on localhost and/or in a text file.
+
+    ``port`` 0 disables the endpoint and an empty ``path`` the file; the file
+    is rewritten every ``interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        collect_fn: Callable[[], List[MetricFamily]],
+        port: int = 0,
+        path: str = "",
+        interval: float = 15.0,
+        host: str = "127.0.0.1",
+    ):
+        self.collect_fn = collect_fn
+        self.port = int(port)
+        self.path = path
+        self.interval = max(0.1, float(interval))
+        self.host = host
+        self._server: Optional[_MetricsHttpServer] = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    def render(self) -> str:
+        return render(self.collect_fn())
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        """Host and port the endpoint is bound to, once started."""
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> None:
+        """Start the endpoint and the file writer; raises OSError if the port is taken."""
+        self._stop.clear()
+        if self.port > 0:
+            self._server = _MetricsHttpServer((self.host, self.port), self.render)
+            self._spawn(self._server.serve_forever, "metrics-http")
+            logging.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        if self.path:
+            self._spawn(self._write_loop, "metrics-file")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def write(self) -> None:
+        """Write the current metrics to ``path`` once."""
+        try:
+            write_file(self.render(), self.path)
+        except Exception as e:
+            logging.warning(f"Failed to write metrics to {self.path}: {e}")
+
+    def _spawn(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write_loop(self) -> None:
+        self.write()
+        while not self._stop.wait(self.interval):
+            self.write()
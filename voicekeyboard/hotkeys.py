@@ -1,8 +1,7 @@
 import logging
 import os
 import threading
-import time
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional
 
 import keyboard
 
@@ -13,21 +12,31 @@ class HotkeysManager:
     def __init__(self, start_fn: Callable[[], None], stop_fn: Callable[[], None]):
         self.start_fn: Callable[[], None] = start_fn
         self.stop_fn: Callable[[], None] = stop_fn
+        # Hotkey presses that started or stopped recording
+        self.activations: int = 0
+
+    def _start(self):
+        self.activations += 1
+        self.start_fn()
+
+    def _stop(self):
+        self.activations += 1
+        self.stop_fn()
 
     def register_start(self):
         """Register global start-recording hotkey."""
-        keyboard.add_hotkey(settings.hotkeyStartRecording, self.start_fn)
+        keyboard.add_hotkey(settings.hotkeyStartRecording, self._start)
         logging.debug(f"Loaded start recording hotkey: {settings.hotkeyStartRecording}")
 
     def register_stop(self):
         """Register global stop-recording hotkey."""
-        keyboard.add_hotkey(settings.hotkeyStopRecording, self.stop_fn)
+        keyboard.add_hotkey(settings.hotkeyStopRecording, self._stop)
         logging.debug(f"Loaded stop recording hotkey: {settings.hotkeyStopRecording}")
 
     def register_push_to_talk(self):
         """Register push-to-talk: press to start, release to stop."""
-        keyboard.on_press_key(settings.hotkeyPushToTalk, lambda _e: self.start_fn())
-        keyboard.on_release_key(settings.hotkeyPushToTalk, lambda _e: self.stop_fn())
+        keyboard.on_press_key(settings.hotkeyPushToTalk, lambda _e: self._start())
+        keyboard.on_release_key(settings.hotkeyPushToTalk, lambda _e: self._stop())
         logging.debug(f"Loaded push-to-talk recording hotkey: {settings.hotkeyPushToTalk}")
 
     def register_all(self):
@@ -43,6 +52,7 @@ class HotkeysService:
         self.manager: HotkeysManager = manager
         self._thread: Optional[threading.Thread] = None
         self._stop_event: threading.Event = threading.Event()
+        self.restarts: int = 0
 
     def start(self):
         """Start the service thread and register all hotkeys unless disabled."""
@@ -61,8 +71,8 @@ class HotkeysService:
         try:
             self.manager.register_all()
             logging.info("Hotkeys registered and service running")
-            while not self._stop_event.is_set():
-                time.sleep(0.1)
+            # keyboard delivers hotkeys on its own thread; sleep until stop()
+            self._stop_event.wait()
         except Exception as e:
             logging.error(f"Hotkeys service error: {e}")
 
@@ -70,8 +80,20 @@ class HotkeysService:
         """Stop the service, swap the manager, and start again."""
         self.stop()
         self.manager = manager
+        self.restarts += 1
         self.start()
 
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> Dict[str, int]:
+        """Service state and hotkey activation counters."""
+        return {
+            "running": int(self.running()),
+            "activations": self.manager.activations,
+            "restarts": self.restarts,
+        }
+
     def stop(self):
         """Stop the service thread and clear registered hotkeys."""
         self._stop_event.set()
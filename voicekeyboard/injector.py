@@ -0,0 +1,323 @@
+"""Type recognized text into the focused application.
+
+:class:`TextInjector` owns a queue and a thread of its own, so a slow target
+application never holds up decoding. Short texts are sent as one batch of key
+events with :func:`keyboard.write`; texts longer than ``outputPasteThreshold``
+characters are put on the clipboard and pasted with a single shortcut, and the
+previous clipboard contents are restored afterwards. Texts that queue up while
+the target is busy are joined and injected together.
+
+In live mode (``outputLiveHypotheses``) :meth:`TextInjector.revise` receives
+the whole current hypothesis of the open utterance instead. Only the edit
+against what is already on screen is sent: backspaces down to the common
+prefix, then the new characters. Revisions still queued when a newer one
+arrives are skipped, so a slow target only ever receives the latest one.
+
+Time-to-text -- from :meth:`TextInjector.submit` to the last key event or the
+paste shortcut being sent -- is kept in a rolling histogram and, when given,
+recorded in the pipeline metrics as the ``type`` stage.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from queue import Full
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import keyboard
+
+from .metrics import PipelineMetrics, RollingHistogram
+from .pipeline import StageQueue
+
+# Clipboard tools tried in order when the Qt clipboard is not available: (copy, paste)
+CLIPBOARD_COMMANDS: List[Tuple[List[str], Optional[List[str]]]] = [
+    (["wl-copy"], ["wl-paste", "--no-newline"]),
+    (["xclip", "-selection", "clipboard"], ["xclip", "-selection", "clipboard", "-o"]),
+    (["xsel", "--clipboard", "--input"], ["xsel", "--clipboard", "--output"]),
+    (["pbcopy"], ["pbpaste"]),
+]
+
+# Time the target application gets to read the clipboard before it is restored
+PASTE_SETTLE_SECONDS = 0.15
+# How long stop() waits for queued text to be injected
+STOP_TIMEOUT_SECONDS = 5.0
+
+
+class Clipboard:
+    """Minimal text clipboard interface used for pasting."""
+
+    def get(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, text: str) -> None:
+        raise NotImplementedError
+
+
+class QtClipboard(Clipboard):
+    """Clipboard of the running Qt application, accessed on the UI thread."""
+
+    def __init__(self, timeout: float = 1.0):
+        self.timeout = timeout
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        from .window import invoke_in_ui
+
+        done = threading.Event()
+        result: Dict[str, Any] = {}
+
+        def run() -> None:
+            try:
+                result["value"] = fn()
+            finally:
+                done.set()
+
+        invoke_in_ui(run)
+        if not done.wait(self.timeout):
+            raise RuntimeError("Qt UI thread did not respond")
+        return result.get("value")
+
+    def get(self) -> Optional[str]:
+        from PyQt6.QtWidgets import QApplication
+
+        return self._call(lambda: QApplication.clipboard().text())
+
+    def set(self, text: str) -> None:
+        from PyQt6.QtWidgets import QApplication
+
+        self._call(lambda: QApplication.clipboard().setText(text))
+
+
+class CommandClipboard(Clipboard):
+    """Clipboard driven by command-line tools such as ``wl-copy`` or ``xclip``."""
+
+    def __init__(self, copy: List[str], paste: Optional[List[str]] = None):
+        self.copy = copy
+        self.paste = paste
+
+    def get(self) -> Optional[str]:
+        if self.paste is None:
+            return None
+        result = subprocess.run(self.paste, capture_output=True, timeout=2)
+        return result.stdout.decode("utf-8", "replace") if result.returncode == 0 else None
+
+    def set(self, text: str) -> None:
+        subprocess.run(self.copy, input=text.encode("utf-8"), check=True, timeout=2)
+
+
+def default_clipboard() -> Optional[Clipboard]:
+    """The Qt clipboard when the window is running, else the first available tool."""
+    window = sys.modules.get(__package__ + ".window")
+    if window is not None and getattr(window, "uiInvoker", None) is not None:
+        return QtClipboard()
+    for copy, paste in CLIPBOARD_COMMANDS:
+        if shutil.which(copy[0]):
+            return CommandClipboard(copy, paste if paste and shutil.which(paste[0]) else None)
+    return None
+
+
+def paste_hotkey() -> str:
+    return "command+v" if sys.platform.startswith("darwin") else "ctrl+v"
+
+
+# Queue item kinds: text to append, or the open utterance's current / final hypothesis
+TEXT = "text"
+LIVE = "live"
+FINAL = "final"
+
+_Item = Tuple[str, str, float]
+
+
+def _join_pending(tail: Optional[_Item], item: _Item) -> Optional[_Item]:
+    if tail is None:
+        # Never merge past the stop sentinel
+        return None
+    tail_kind, tail_text, submitted = tail
+    kind, text, _ = item
+    # Keep the older submit time so time-to-text covers the wait
+    if tail_kind == TEXT and kind == TEXT:
+        # Keep words apart when neither side brings its own whitespace
+        joint = "" if tail_text[-1:].isspace() or text[:1].isspace() else " "
+        return TEXT, tail_text + joint + text, submitted
+    if tail_kind == LIVE and kind != TEXT:
+        # Only the newest hypothesis of the open utterance needs to reach the screen
+        return kind, text, submitted
+    return None
+
+
+def _coalesce(items: List[_Item]) -> List[_Item]:
+    out: List[_Item] = []
+    for item in items:
+        merged = _join_pending(out[-1], item) if out else None
+        if merged is None:
+            out.append(item)
+        else:
+            out[-1] = merged
+    return out
+
+
+def edit_keys(screen: str, text: str) -> Tuple[int, str]:
+    """Backspaces and characters that turn ``screen`` into ``text``."""
+    keep = len(os.path.commonprefix([screen, text]))
+    return len(screen) - keep, text[keep:]
+
+
+class TextInjector:
+    """Inject text into the focused window from a dedicated thread.
+
+    ``paste_threshold`` 0 always types. ``clipboard`` defaults to
+    :func:`default_clipboard`; without one, long texts are typed too.
+    """
+
+    def __init__(
+        self,
+        paste_threshold: int = 200,
+        restore_clipboard: bool = True,
+        metrics: Optional[PipelineMetrics] = None,
+        clipboard: Optional[Clipboard] = None,
+        window: int = 500,
+    ):
+        self.paste_threshold = max(0, int(paste_threshold))
+        self.restore_clipboard = restore_clipboard
+        self.metrics = metrics
+        self.clipboard = clipboard
+        self.latency = RollingHistogram(window)
+        self.typed = 0
+        self.pasted = 0
+        self.characters = 0
+        self.failed = 0
+        self.backspaces = 0
+        # Keystrokes sent per live utterance, including corrections
+        self.utterance_keys = RollingHistogram(window)
+        # Hypothesis of the open utterance as currently shown in the target window
+        self._screen = ""
+        self._screen_keys = 0
+        # Last hypothesis passed to revise(), to skip unchanged repeats
+        self._revised = ""
+        self._queue = StageQueue(256, "merge", merge_fn=_join_pending, name="output")
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="text-injector", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = STOP_TIMEOUT_SECONDS) -> None:
+        """Inject what is still queued, then end the thread.
+
+        Waits at most ``timeout`` seconds, so a hung target application cannot
+        block shutdown; the daemon thread is then left behind.
+        """
+        self._queue.put_unbounded(None)
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            if thread.is_alive():
+                logging.warning(
+                    f"Output engine did not finish within {timeout}s, "
+                    f"{self._queue.qsize()} texts left unsent"
+                )
+        self._thread = None
+
+    def submit(self, text: str) -> None:
+        """Queue ``text`` for injection; never blocks the caller."""
+        if text:
+            self._put(TEXT, text)
+
+    def revise(self, text: str, final: bool = False) -> None:
+        """Queue the open utterance's current hypothesis; ``final`` closes the utterance."""
+        if not final and text == self._revised:
+            return
+        self._revised = "" if final else text
+        self._put(FINAL if final else LIVE, text)
+
+    def _put(self, kind: str, text: str) -> None:
+        try:
+            self._queue.put((kind, text, time.monotonic()), block=False)
+        except Full:
+            logging.warning(f"Output queue is full, dropped text: {text}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "typed": self.typed,
+            "pasted": self.pasted,
+            "characters": self.characters,
+            "failed": self.failed,
+            "backspaces": self.backspaces,
+            "keystrokes_per_utterance": self.utterance_keys.summary(),
+            "pending": self._queue.qsize(),
+            "time_to_text_ms": self.latency.summary(1000.0),
+        }
+
+    def inject(self, text: str) -> None:
+        """Type or paste ``text`` now, on the calling thread."""
+        if self.paste_threshold and len(text) > self.paste_threshold and self._paste(text):
+            self.pasted += 1
+        else:
+            # One call sends the whole batch of key events back to back
+            keyboard.write(text, delay=0)
+            self.typed += 1
+        self.characters += len(text)
+
+    def apply_revision(self, text: str, final: bool = False) -> None:
+        """Bring the open utterance on screen to ``text`` now, with the fewest keys."""
+        erase, addition = edit_keys(self._screen, text)
+        for _ in range(erase):
+            keyboard.send("backspace")
+        self.backspaces += erase
+        if addition:
+            self.inject(addition)
+        self._screen = text
+        self._screen_keys += erase + len(addition)
+        if final:
+            self.utterance_keys.add(self._screen_keys)
+            self._screen, self._screen_keys = "", 0
+
+    def _paste(self, text: str) -> bool:
+        clipboard = self.clipboard or default_clipboard()
+        if clipboard is None:
+            return False
+        self.clipboard = clipboard
+        previous: Optional[str] = None
+        try:
+            if self.restore_clipboard:
+                previous = clipboard.get()
+            clipboard.set(text)
+        except Exception as e:
+            logging.warning(f"Clipboard unavailable, typing instead: {e}")
+            return False
+        keyboard.send(paste_hotkey())
+        if previous is not None:
+            time.sleep(PASTE_SETTLE_SECONDS)
+            try:
+                clipboard.set(previous)
+            except Exception as e:
+                logging.warning(f"Failed to restore the clipboard: {e}")
+        return True
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()] + self._queue.drain()
+            if None in batch:
+                stopping = True
+            for kind, text, submitted in _coalesce([item for item in batch if item is not None]):
+                try:
+                    if kind == TEXT:
+                        # Plain text ends any open utterance where it stands
+                        self._screen, self._screen_keys = "", 0
+                        self.inject(text)
+                    else:
+                        self.apply_revision(text, final=kind == FINAL)
+                except Exception as e:
+                    self.failed += 1
+                    logging.error(f"Failed to inject text: {e}")
+                    continue
+                elapsed = time.monotonic() - submitted
+                self.latency.add(elapsed)
+                if self.metrics is not None:
+                    self.metrics.record_typed(elapsed)
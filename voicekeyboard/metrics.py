@@ -0,0 +1,237 @@
+"""Per-utterance latency and real-time-factor metrics for the speech pipeline.
+
+Every finished utterance carries an :class:`UtteranceTiming` from the VAD
+stage to the ASR stage, stamped when its audio left the capture ring, when the
+VAD closed it, when decoding started and ended and when its text was emitted.
+:class:`PipelineMetrics` folds those timings into rolling histograms over the
+last ``window`` utterances (p50/p95/p99 per stage), tracks the real-time
+factor of every decode call and reports current queue depths. The output
+engine adds the time-to-text of each injection as the ``type`` stage.
+:class:`MetricsReporter` logs a summary periodically and can also dump the
+snapshot as JSON for external collection.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy
+
+# Stage latencies of one utterance, in pipeline order
+STAGES = ("vad", "queue", "decode", "emit", "total")
+# Time from handing text to the output engine until it reached the target window
+TYPE_STAGE = "type"
+
+
+class UtteranceTiming:
+    """Monotonic timestamps of one utterance as it moves through the pipeline.
+
+    ``captured`` is when the block holding the end of the utterance left the
+    capture ring, ``speech_end`` when the VAD closed it; the ASR stage fills
+    in the rest. ``audio`` is the utterance length in seconds.
+    """
+
+    __slots__ = ("audio", "captured", "speech_end", "decode_start", "decode_end", "emitted")
+
+    def __init__(self, audio: float, captured: float, speech_end: float):
+        self.audio = audio
+        self.captured = captured
+        self.speech_end = speech_end
+        self.decode_start = 0.0
+        self.decode_end = 0.0
+        self.emitted = 0.0
+
+    def stages(self) -> Dict[str, float]:
+        """Seconds spent in each of :data:`STAGES`."""
+        return {
+            "vad": self.speech_end - self.captured,
+            "queue": self.decode_start - self.speech_end,
+            "decode": self.decode_end - self.decode_start,
+            "emit": self.emitted - self.decode_end,
+            "total": self.emitted - self.captured,
+        }
+
+
+class RollingHistogram:
+    """The last ``window`` observations with percentile summaries."""
+
+    def __init__(self, window: int):
+        self._values: Deque[float] = deque(maxlen=max(1, int(window)))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: float) -> None:
+        with self._lock:
+            self._values.append(value)
+
+    def summary(self, scale: float = 1.0) -> Dict[str, float]:
+        """Count, mean, p50/p95/p99 and max, multiplied by ``scale``."""
+        with self._lock:
+            values = numpy.fromiter(self._values, dtype=numpy.float64)
+        if values.size == 0:
+            return {"count": 0}
+        p50, p95, p99 = numpy.percentile(values, (50, 95, 99)) * scale
+        return {
+            "count": int(values.size),
+            "mean": round(float(values.mean()) * scale, 3),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(values.max()) * scale, 3),
+        }
+
+
+class PipelineMetrics:
+    """Rolling latency histograms, real-time factor and queue depths.
+
+    Thread-safe: the ASR stage records while any thread may take a
+    :meth:`snapshot`. ``queue_depths`` is called for the current depth of
+    each stage queue.
+    """
+
+    def __init__(
+        self,
+        window: int = 500,
+        queue_depths: Optional[Callable[[], Dict[str, int]]] = None,
+    ):
+        self.window = max(1, int(window))
+        self._queue_depths = queue_depths
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.latency = {
+                stage: RollingHistogram(self.window) for stage in STAGES + (TYPE_STAGE,)
+            }
+            self.rtf = RollingHistogram(self.window)
+            self.utterances = 0
+            self.segments = 0
+            self.audio_seconds = 0.0
+            self.decode_seconds = 0.0
+
+    def record(self, timing: UtteranceTiming) -> None:
+        """Add the stage latencies of one finished utterance."""
+        for stage, seconds in timing.stages().items():
+            self.latency[stage].add(max(0.0, seconds))
+        with self._lock:
+            self.utterances += 1
+
+    def record_decode(self, audio_seconds: float, decode_seconds: float, segments: int = 1) -> None:
+        """Account one decode call over ``segments`` utterances totalling ``audio_seconds``."""
+        if audio_seconds <= 0:
+            return
+        self.rtf.add(decode_seconds / audio_seconds)
+        with self._lock:
+            self.segments += segments
+            self.audio_seconds += audio_seconds
+            self.decode_seconds += decode_seconds
+
+    def record_typed(self, seconds: float) -> None:
+        """Add the time-to-text of one injection into the target window."""
+        self.latency[TYPE_STAGE].add(max(0.0, seconds))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current metrics as a JSON-serializable dict; latencies in milliseconds."""
+        with self._lock:
+            utterances, segments = self.utterances, self.segments
+            audio, decode = self.audio_seconds, self.decode_seconds
+        rtf = self.rtf.summary()
+        rtf["overall"] = round(decode / audio, 4) if audio > 0 else None
+        snapshot: Dict[str, Any] = {
+            "time": time.time(),
+            "utterances": utterances,
+            "segments": segments,
+            "audio_seconds": round(audio, 3),
+            "decode_seconds": round(decode, 3),
+            "latency_ms": {
+                stage: histogram.summary(1000.0) for stage, histogram in self.latency.items()
+            },
+            "rtf": rtf,
+        }
+        if self._queue_depths is not None:
+            snapshot["queues"] = self._queue_depths()
+        return snapshot
+
+
+def format_summary(snapshot: Dict[str, Any]) -> str:
+    """One log line with the p50/p95/p99 latency per stage and the real-time factor."""
+    parts = [f"{snapshot['utterances']} utterances"]
+    for stage, summary in snapshot["latency_ms"].items():
+        if summary.get("count"):
+            parts.append(f"{stage} {summary['p50']:.0f}/{summary['p95']:.0f}/{summary['p99']:.0f}")
+    if snapshot["rtf"].get("overall") is not None:
+        parts.append(f"RTF {snapshot['rtf']['overall']:.3f}")
+    if "queues" in snapshot:
+        parts.append(
+            "queues " + ", ".join(f"{name}={depth}" for name, depth in snapshot["queues"].items())
+        )
+    return "Pipeline metrics (ms p50/p95/p99): " + "; ".join(parts)
+
+
+def dump_json(snapshot: Dict[str, Any], path: str) -> None:
+    """Write ``snapshot`` to ``path`` atomically, so readers never see a partial file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = path + ".tmp"
+    with open(partial, "w", encoding="utf-8") as file:
+        json.dump(snapshot, file, indent=2)
+    os.replace(partial, path)
+
+
+class MetricsReporter:
+    """Log (and optionally dump) a metrics snapshot every ``interval`` seconds.
+
+    Intervals in which no utterance finished are skipped, so an idle app does
+    not fill the log.
+    """
+
+    def __init__(self, metrics: PipelineMetrics, interval: float, path: str = ""):
+        self.metrics = metrics
+        self.interval = max(0.1, float(interval))
+        self.path = path
+        self._reported = -1
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stt-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def report(self) -> None:
+        """Log and dump the current snapshot if anything changed since the last report."""
+        snapshot = self.metrics.snapshot()
+        if snapshot["utterances"] == self._reported:
+            return
+        self._reported = snapshot["utterances"]
+        logging.info(format_summary(snapshot))
+        if self.path:
+            try:
+                dump_json(snapshot, self.path)
+            except OSError as e:
+                logging.warning(f"Failed to write metrics to {self.path}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.report()
@@ -0,0 +1,251 @@
+"""Offline transcription of audio files (``voicekeyboard transcribe``).
+
+Files go through the same models, :class:`~voicekeyboard.stt.StreamingVad` and
+:class:`~voicekeyboard.stt.SpeechSegmenter` as live dictation. Input is
+memory-mapped (or read from stdin in fixed blocks) and converted one block at
+a time, and every utterance is decoded as soon as the VAD closes it, so memory
+stays constant however long the recording is. Segments are written as JSON
+lines while decoding proceeds.
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+from typing import IO, Any, Dict, Iterator, NamedTuple, Optional
+
+import numpy
+
+from .settings import settings
+from .stt import SpeechConverter, SpeechSegmenter
+
+# Raw PCM sample formats accepted by ``--format``
+RAW_FORMATS: Dict[str, str] = {
+    "s16le": "<i2",
+    "s32le": "<i4",
+    "f32le": "<f4",
+    "u8": "u1",
+}
+
+_WAVE_PCM = 1
+_WAVE_FLOAT = 3
+_WAVE_EXTENSIBLE = 0xFFFE
+
+
+class AudioFormat(NamedTuple):
+    """Layout of interleaved PCM samples in a file."""
+
+    sample_rate: int
+    channels: int
+    # numpy dtype of one sample
+    dtype: str
+    # Byte offset of the first sample
+    offset: int = 0
+    # Number of frames, or None to read until the end of the input
+    frames: Optional[int] = None
+
+
+def wav_format(path: str) -> AudioFormat:
+    """Read the ``fmt`` and ``data`` chunks of a RIFF/WAVE file without loading samples."""
+    with open(path, "rb") as file:
+        riff, _size, wave_id = struct.unpack("<4sI4s", file.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path}: not a WAV file")
+        fmt: Optional[Dict[str, int]] = None
+        while True:
+            header = file.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: no data chunk")
+            chunk, size = struct.unpack("<4sI", header)
+            if chunk == b"fmt ":
+                body = file.read(size)
+                tag, channels, rate, _rate, _align, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == _WAVE_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]
+                fmt = {"tag": tag, "channels": channels, "rate": rate, "bits": bits}
+            elif chunk == b"data":
+                if fmt is None:
+                    raise ValueError(f"{path}: data chunk before fmt chunk")
+                dtype = _wav_dtype(fmt["tag"], fmt["bits"])
+                if dtype is None:
+                    raise ValueError(
+                        f"{path}: unsupported WAV encoding "
+                        f"(format {fmt['tag']}, {fmt['bits']} bits)"
+                    )
+                frame_bytes = fmt["channels"] * numpy.dtype(dtype).itemsize
+                available = os.path.getsize(path) - file.tell()
+                return AudioFormat(
+                    fmt["rate"],
+                    fmt["channels"],
+                    dtype,
+                    file.tell(),
+                    min(size, available) // frame_bytes,
+                )
+            else:
+                # Chunks are padded to an even length
+                file.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def _wav_dtype(tag: int, bits: int) -> Optional[str]:
+    if tag == _WAVE_PCM:
+        return {8: "u1", 16: "<i2", 32: "<i4"}.get(bits)
+    if tag == _WAVE_FLOAT and bits == 32:
+        return "<f4"
+    return None
+
+
+def to_mono_float(block: numpy.ndarray) -> numpy.ndarray:
+    """Convert a ``(frames, channels)`` block of PCM samples to mono float32."""
+    kind, size = block.dtype.kind, block.dtype.itemsize
+    if block.shape[1] == 1:
+        samples = block[:, 0].astype(numpy.float32)
+    else:
+        samples = block.mean(axis=1, dtype=numpy.float32)
+    if kind == "u":
+        samples -= 128.0
+        samples *= 1.0 / 128.0
+    elif kind == "i":
+        samples *= 1.0 / float(1 << (8 * size - 1))
+    return samples
+
+
+def read_blocks(source: Any, fmt: AudioFormat, block_frames: int) -> Iterator[numpy.ndarray]:
+    """Yield mono float32 blocks of ``block_frames`` frames from ``source``.
+
+    ``source`` is a file path (memory-mapped) or a binary stream read
+    block by block, e.g. ``sys.stdin.buffer``.
+    """
+    dtype = numpy.dtype(fmt.dtype)
+    if isinstance(source, str):
+        frame_bytes = fmt.channels * dtype.itemsize
+        frames = fmt.frames
+        if frames is None:
+            frames = (os.path.getsize(source) - fmt.offset) // frame_bytes
+        if frames <= 0:
+            return
+        mapped = numpy.memmap(
+            source, dtype=dtype, mode="r", offset=fmt.offset, shape=(frames, fmt.channels)
+        )
+        for start in range(0, frames, block_frames):
+            yield to_mono_float(mapped[start : start + block_frames])
+        return
+    frame_bytes = fmt.channels * dtype.itemsize
+    pending = b""
+    while True:
+        data = source.read(block_frames * frame_bytes)
+        if not data:
+            break
+        data = pending + data
+        usable = len(data) - len(data) % frame_bytes
+        pending = data[usable:]
+        if usable:
+            block = numpy.frombuffer(data[:usable], dtype=dtype).reshape(-1, fmt.channels)
+            yield to_mono_float(block)
+
+
+class LinearResampler:
+    """Streaming linear-interpolation resampler; state carries across blocks."""
+
+    def __init__(self, source_rate: int, target_rate: int):
+        self.step = source_rate / target_rate
+        self._position = 0.0
+        self._last: Optional[numpy.ndarray] = None
+
+    def process(self, block: numpy.ndarray) -> numpy.ndarray:
+        if self.step == 1.0 or block.size == 0:
+            return block
+        # Index 0 is the previous block's last sample, so output spans block edges
+        x = block if self._last is None else numpy.concatenate([self._last, block])
+        positions = numpy.arange(self._position, x.shape[0] - 1, self.step)
+        out = numpy.interp(positions, numpy.arange(x.shape[0]), x).astype(numpy.float32)
+        following = positions[-1] + self.step if positions.size else self._position
+        self._position = following - (x.shape[0] - 1)
+        self._last = x[-1:]
+        return out
+
+
+def _segment_record(offset: float, seg: Any, words: bool) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        "start": round(offset + seg.start, 3),
+        "end": round(offset + seg.end, 3),
+        "text": seg.text.strip(),
+    }
+    if words:
+        record["words"] = [
+            {"start": round(offset + w.start, 3), "end": round(offset + w.end, 3), "word": w.text}
+            for w in seg.words
+        ]
+    return record
+
+
+def transcribe_file(
+    source: Any,
+    out: IO[str],
+    fmt: Optional[AudioFormat] = None,
+    converter: Optional[SpeechConverter] = None,
+    block_seconds: float = 1.0,
+    word_timestamps: bool = False,
+) -> int:
+    """Transcribe ``source`` and write one JSON object per segment to ``out``.
+
+    ``source`` is a path or a binary stream; ``fmt`` is read from the WAV
+    header when omitted. Returns the number of segments written. Raises
+    RuntimeError if the models cannot be loaded or the VAD cannot stream.
+    """
+    if fmt is None:
+        if not isinstance(source, str):
+            raise ValueError("Raw input needs an explicit format")
+        fmt = wav_format(source)
+    sc = converter or SpeechConverter()
+    sc._ensure_models_loaded()
+    vad = sc.vad or sc._build_streaming_vad()
+    if sc.asr is None or vad is None:
+        raise RuntimeError("Speech models are not loaded or the VAD cannot stream")
+    rate = settings.audioSampleRate
+    segmenter = SpeechSegmenter(vad, int(rate * settings.vadMaxSpeechDuration))
+    resampler = LinearResampler(fmt.sample_rate, rate)
+    block_frames = max(1, int(fmt.sample_rate * block_seconds))
+    written = 0
+
+    def emit(start: int, audio: numpy.ndarray) -> None:
+        nonlocal written
+        assert sc.asr is not None
+        for seg in sc.asr.segments(
+            audio, language=settings.whisperLanguage, word_timestamps=word_timestamps
+        ):
+            record = _segment_record(start / rate, seg, word_timestamps)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            written += 1
+
+    for block in read_blocks(source, fmt, block_frames):
+        for start, audio in segmenter.feed_spans(resampler.process(block)):
+            emit(start, audio)
+    for start, audio in segmenter.flush_spans():
+        emit(start, audio)
+    logging.info(f"Transcribed {written} segments from {source}")
+    return written
+
+
+def run(
+    path: str,
+    raw_format: Optional[str] = None,
+    sample_rate: int = 16000,
+    channels: int = 1,
+    language: Optional[str] = None,
+    words: bool = False,
+    block_seconds: float = 1.0,
+) -> int:
+    """``voicekeyboard transcribe``: write JSONL segments for ``path`` to stdout."""
+    if language:
+        settings.whisperLanguage = language
+    fmt: Optional[AudioFormat] = None
+    if raw_format is not None:
+        fmt = AudioFormat(sample_rate, channels, RAW_FORMATS[raw_format])
+    elif path == "-":
+        raise ValueError("Reading from stdin needs --format")
+    source: Any = sys.stdin.buffer if path == "-" else path
+    return transcribe_file(
+        source, sys.stdout, fmt, block_seconds=block_seconds, word_timestamps=words
+    )
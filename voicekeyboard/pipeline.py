@@ -0,0 +1,172 @@
+"""Bounded hand-off queues between the stages of the speech pipeline.
+
+Audio flows capture -> VAD -> ASR, each stage running on its own thread.
+Stages are connected by :class:`StageQueue`, a bounded queue with a
+configurable overflow policy so that a slow consumer applies backpressure (or
+sheds load) instead of letting memory and latency grow without limit.
+"""
+
+import threading
+import time
+from collections import deque
+from queue import Empty, Full
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+BLOCK = "block"
+DROP_OLDEST = "drop-oldest"
+MERGE = "merge"
+POLICIES = (BLOCK, DROP_OLDEST, MERGE)
+
+
+class StageQueue:
+    """Bounded FIFO with ``block``, ``drop-oldest`` or ``merge`` overflow policy.
+
+    - ``block``: producers wait for space (up to their timeout).
+    - ``drop-oldest``: the oldest item is discarded to make room.
+    - ``merge``: the new item is folded into the newest queued item with
+      ``merge_fn(tail, item)``; if that returns None the put blocks instead.
+
+    The API mirrors the subset of :class:`queue.Queue` used by the app
+    (``put``, ``get``, ``get_nowait``, ``qsize``, ``empty``) and raises
+    :class:`queue.Empty` / :class:`queue.Full` the same way. After each
+    ``get`` the consumer can read :attr:`last_enqueued`, the monotonic time the
+    returned item was put (for a merged item, the time of its oldest part).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: str = BLOCK,
+        merge_fn: Optional[Callable[[Any, Any], Optional[Any]]] = None,
+        name: str = "",
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        if policy == MERGE and merge_fn is None:
+            raise ValueError("merge policy requires merge_fn")
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.merge_fn = merge_fn
+        self.name = name
+        self._items: Deque[Any] = deque()
+        # Enqueue time of each item, parallel to ``_items``
+        self._stamps: Deque[float] = deque()
+        self.last_enqueued: Optional[float] = None
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self.put_count = 0
+        self.dropped = 0
+        self.merged = 0
+        self.rejected = 0
+        self.high_water = 0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        """Enqueue ``item``, applying the overflow policy when full.
+
+        Raises :class:`queue.Full` if the item could not be enqueued within
+        ``timeout`` (or immediately when ``block`` is False).
+        """
+        with self._not_full:
+            if len(self._items) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self._stamps.popleft()
+                    self.dropped += 1
+                elif self.policy == MERGE and self._merge_into_tail(item):
+                    self.put_count += 1
+                    self._not_empty.notify()
+                    return
+                else:
+                    self._wait_for_space(block, timeout)
+            self._items.append(item)
+            self._stamps.append(time.monotonic())
+            self.put_count += 1
+            self.high_water = max(self.high_water, len(self._items))
+            self._not_empty.notify()
+
+    def put_nowait(self, item: Any) -> None:
+        self.put(item, block=False)
+
+    def put_unbounded(self, item: Any) -> None:
+        """Enqueue ignoring the bound (control messages such as stop sentinels)."""
+        with self._lock:
+            self._items.append(item)
+            self._stamps.append(time.monotonic())
+            self._not_empty.notify()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        with self._not_empty:
+            if not block:
+                if not self._items:
+                    raise Empty
+            elif timeout is None:
+                while not self._items:
+                    self._not_empty.wait()
+            else:
+                deadline = time.monotonic() + max(0.0, timeout)
+                while not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+            item = self._items.popleft()
+            self.last_enqueued = self._stamps.popleft()
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def drain(self) -> List[Any]:
+        """Remove and return every queued item."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            self._stamps.clear()
+            self._not_full.notify_all()
+            return items
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of depth and overflow counters for this queue."""
+        return {
+            "name": self.name,
+            "policy": self.policy,
+            "depth": len(self._items),
+            "capacity": self.maxsize,
+            "high_water": self.high_water,
+            "put": self.put_count,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "rejected": self.rejected,
+        }
+
+    def _merge_into_tail(self, item: Any) -> bool:
+        assert self.merge_fn is not None
+        merged = self.merge_fn(self._items[-1], item)
+        if merged is None:
+            return False
+        self._items[-1] = merged
+        self.merged += 1
+        return True
+
+    def _wait_for_space(self, block: bool, timeout: Optional[float]) -> None:
+        if not block:
+            self.rejected += 1
+            raise Full
+        deadline = None if timeout is None else time.monotonic() + max(0.0, timeout)
+        while len(self._items) >= self.maxsize:
+            if deadline is None:
+                self._not_full.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise Full
+            self._not_full.wait(remaining)
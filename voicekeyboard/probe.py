@@ -0,0 +1,289 @@
+"""Pick the fastest usable Whisper device and compute type for this machine.
+
+With ``whisperDevice`` or ``whisperComputeType`` set to ``auto``,
+:func:`resolve_device` builds the model for every supported candidate
+(``float16``, ``int8_float16``, ``int8`` on CUDA; ``int8``, ``int8_float32``,
+``float32`` on CPU), times a short reference transcription with each and keeps
+the fastest one whose text stays within ``whisperProbeMinAccuracy`` of the most
+precise candidate's. The choice is cached per machine and model, so only the
+first startup pays for the probe.
+"""
+
+import json
+import logging
+import os
+import platform
+import re
+import time
+import wave
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy
+
+from .settings import settings
+
+AUTO = "auto"
+
+COMPUTE_TYPES: Dict[str, Tuple[str, ...]] = {
+    "cuda": ("float16", "int8_float16", "int8"),
+    "cpu": ("int8", "int8_float32", "float32"),
+}
+# Most to least precise; the first candidate in this order is the reference
+_PRECISION = ("float32", "float16", "int8_float32", "int8_float16", "int8")
+
+ModelFactory = Callable[[str, str], Any]
+
+
+class ProbeResult(NamedTuple):
+    """Outcome of timing one device / compute type pair."""
+
+    device: str
+    compute_type: str
+    # Wall time of the timed reference transcription
+    seconds: float
+    # 1 - word error rate against the reference candidate's transcript
+    accuracy: float
+
+
+def default_cache_path() -> str:
+    """``$XDG_CACHE_HOME/voicekeyboard/device-probe.json`` (``~/.cache`` by default)."""
+    cache = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache, "voicekeyboard", "device-probe.json")
+
+
+def _cuda_devices() -> int:
+    try:
+        import ctranslate2
+
+        return int(ctranslate2.get_cuda_device_count())
+    except Exception:
+        return 0
+
+
+def _supported(device: str) -> Optional[set]:
+    try:
+        import ctranslate2
+
+        return set(ctranslate2.get_supported_compute_types(device))
+    except Exception:
+        return None
+
+
+def candidates(device: str = AUTO, compute_type: str = AUTO) -> List[Tuple[str, str]]:
+    """Device / compute type pairs worth probing, fastest-likely first.
+
+    ``auto`` for the device means CUDA (when a GPU is visible) and CPU; a fixed
+    compute type restricts the probe to that type on each device.
+    """
+    if device == AUTO:
+        devices = (["cuda"] if _cuda_devices() > 0 else []) + ["cpu"]
+    else:
+        devices = [device]
+    pairs: List[Tuple[str, str]] = []
+    for dev in devices:
+        types = COMPUTE_TYPES.get(dev, COMPUTE_TYPES["cpu"])
+        if compute_type != AUTO:
+            types = (compute_type,)
+        supported = _supported(dev)
+        pairs.extend((dev, ct) for ct in types if supported is None or ct in supported)
+    return pairs
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance divided by the reference length (case and punctuation ignored)."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, other in enumerate(hyp, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other))
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_reference_audio(path: Optional[str], sample_rate: int = 16000) -> numpy.ndarray:
+    """Mono float32 audio from a 16-bit PCM WAV file, or synthetic audio without one.
+
+    The synthetic fallback (a tone in light noise) exercises the engine for
+    timing but carries no words, so accuracy cannot be judged on it.
+    """
+    if not path:
+        t = numpy.arange(5 * sample_rate, dtype=numpy.float32) / sample_rate
+        noise = numpy.random.default_rng(0).standard_normal(t.shape[0]).astype(numpy.float32)
+        return (0.1 * numpy.sin(2 * numpy.pi * 220.0 * t) + 0.01 * noise).astype(numpy.float32)
+    with wave.open(path, "rb") as reader:
+        if reader.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels, rate = reader.getnchannels(), reader.getframerate()
+        pcm = numpy.frombuffer(reader.readframes(reader.getnframes()), dtype="<i2")
+    audio = pcm.reshape(-1, channels).mean(axis=1).astype(numpy.float32) / 32768.0
+    if rate != sample_rate:
+        positions = numpy.arange(0, audio.shape[0], rate / sample_rate)
+        audio = numpy.interp(positions, numpy.arange(audio.shape[0]), audio)
+    return audio.astype(numpy.float32, copy=False)
+
+
+def _whisper_factory(model: str) -> ModelFactory:
+    def build(device: str, compute_type: str) -> Any:
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            model_size_or_path=model,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=settings.whisperCpuThreads,
+            num_workers=settings.whisperNumWorkers,
+        )
+
+    return build
+
+
+def _decode(engine: Any, audio: numpy.ndarray) -> str:
+    segments, _info = engine.transcribe(
+        audio, language=settings.whisperLanguage or None, vad_filter=False, beam_size=1
+    )
+    return " ".join(seg.text for seg in segments)
+
+
+def probe(
+    pairs: List[Tuple[str, str]],
+    factory: ModelFactory,
+    audio: numpy.ndarray,
+    min_accuracy: float = 0.9,
+    judge_accuracy: bool = True,
+) -> Tuple[Optional[ProbeResult], List[ProbeResult]]:
+    """Time every pair and return ``(best, all results)``.
+
+    Pairs that fail to load or decode are skipped. The most precise pair that
+    works provides the reference transcript; ``best`` is the fastest pair
+    within ``min_accuracy`` of it (accuracy is not judged when
+    ``judge_accuracy`` is False), or None if nothing worked.
+    """
+    ordered = sorted(
+        pairs, key=lambda p: _PRECISION.index(p[1]) if p[1] in _PRECISION else len(_PRECISION)
+    )
+    warm = audio[: min(audio.shape[0], 16000)]
+    reference: Optional[str] = None
+    results: List[ProbeResult] = []
+    for device, compute_type in ordered:
+        try:
+            engine = factory(device, compute_type)
+            # The first call pays for kernel selection and allocator growth
+            _decode(engine, warm)
+            started = time.perf_counter()
+            text = _decode(engine, audio)
+            seconds = time.perf_counter() - started
+        except Exception as e:
+            logging.info(f"Probe {device}/{compute_type} unavailable: {e}")
+            continue
+        finally:
+            engine = None
+        if reference is None:
+            reference = text
+        accuracy = 1.0 - word_error_rate(reference, text) if judge_accuracy else 1.0
+        result = ProbeResult(device, compute_type, seconds, max(0.0, accuracy))
+        logging.info(
+            f"Probe {device}/{compute_type}: {seconds:.2f}s, accuracy {result.accuracy:.2f}"
+        )
+        results.append(result)
+    eligible = [r for r in results if r.accuracy >= min_accuracy]
+    best = min(eligible, key=lambda r: r.seconds) if eligible else None
+    return best, results
+
+
+def machine_key(model: str, device: str = AUTO, compute_type: str = AUTO) -> str:
+    """Cache key: the model, the requested constraints and what identifies this machine."""
+    try:
+        import ctranslate2
+
+        runtime = ctranslate2.__version__
+    except Exception:
+        runtime = "?"
+    return "|".join(
+        str(part)
+        for part in (
+            platform.node(),
+            platform.machine(),
+            platform.processor(),
+            os.cpu_count(),
+            _cuda_devices(),
+            runtime,
+            model,
+            device,
+            compute_type,
+            settings.whisperCpuThreads,
+        )
+    )
+
+
+def _read_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(path: str, data: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2, sort_keys=True)
+        os.replace(temporary, path)
+    except OSError as e:
+        logging.warning(f"Could not cache device probe result: {e}")
+
+
+def resolve_device(
+    model: str,
+    device: str = AUTO,
+    compute_type: str = AUTO,
+    cache_path: Optional[str] = None,
+    factory: Optional[ModelFactory] = None,
+) -> Tuple[str, str]:
+    """Concrete ``(device, compute_type)`` for ``model``; ``auto`` values are probed.
+
+    A cached choice for this machine and model is reused; otherwise the probe
+    runs and its result is cached. Raises RuntimeError if no candidate loads.
+    """
+    if device != AUTO and compute_type != AUTO:
+        return device, compute_type
+    path = cache_path or default_cache_path()
+    key = machine_key(model, device, compute_type)
+    cache = _read_cache(path)
+    entry = cache.get(key)
+    if isinstance(entry, dict) and "device" in entry and "compute_type" in entry:
+        logging.info(f"Using cached device probe: {entry['device']}/{entry['compute_type']}")
+        return entry["device"], entry["compute_type"]
+    pairs = candidates(device, compute_type)
+    audio_path = settings.whisperProbeAudio
+    audio = load_reference_audio(audio_path, settings.audioSampleRate)
+    if not audio_path:
+        logging.info("No whisperProbeAudio set; choosing on speed alone")
+    started = time.perf_counter()
+    best, _results = probe(
+        pairs,
+        factory or _whisper_factory(model),
+        audio,
+        min_accuracy=settings.whisperProbeMinAccuracy,
+        judge_accuracy=bool(audio_path),
+    )
+    if best is None:
+        raise RuntimeError(f"No usable device/compute type for {model} among {pairs}")
+    logging.info(
+        f"Device probe chose {best.device}/{best.compute_type} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    cache[key] = dict(best._asdict(), model=model, probed=time.time())
+    _write_cache(path, cache)
+    return best.device, best.compute_type
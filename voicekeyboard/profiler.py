@@ -0,0 +1,179 @@
+"""Sampling profiler for live sessions.
+
+When a user reports lag, :func:`start` (tray menu "Profile threads", or the
+``VOICEKB_PROFILE`` environment variable at startup) samples the stacks of
+every thread -- Qt window, tray, hotkeys, capture, VAD and ASR -- for at most
+``profilerDuration`` seconds. Stacks are rooted at the thread name and
+written in collapsed-stack format (``thread;outer;inner count`` per line)
+next to the log file, ready for ``flamegraph.pl`` or speedscope.
+
+Nothing runs while profiling is off; while on, a single daemon thread wakes
+every ``profilerIntervalMs`` to read :func:`sys._current_frames`.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+from .settings import settings
+
+
+class SamplingProfiler:
+    """Sample all threads every ``interval`` seconds for up to ``duration`` seconds.
+
+    The collapsed stacks are written to ``path`` when sampling ends, whether
+    the duration ran out or :meth:`stop` was called.
+    """
+
+    def __init__(self, path: str, interval: float = 0.005, duration: float = 30.0):
+        self.path = path
+        self.interval = max(0.001, float(interval))
+        self.duration = max(0.0, float(duration))
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.active():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        logging.info(f"Profiling all threads for up to {self.duration:.0f}s")
+
+    def stop(self) -> str:
+        """Stop sampling, wait for the output file and return its path."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self.path
+
+    def sample(self) -> None:
+        """Record the current stack of every thread except the profiler's own."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            name = names.get(ident, f"thread-{ident}").replace(";", ":")
+            self._stacks[name + ";" + self._stack(frame)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> List[str]:
+        """Lines of the collapsed-stack output, most frequent first."""
+        return [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+
+    def thread_samples(self) -> Dict[str, int]:
+        """Samples per thread name."""
+        totals: Counter = Counter()
+        for stack, count in self._stacks.items():
+            totals[stack.split(";", 1)[0]] += count
+        return dict(totals.most_common())
+
+    def _stack(self, frame: Optional[FrameType]) -> str:
+        parts: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                where = f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+                label = self._labels[code] = f"{code.co_name} ({where})".replace(";", ":")
+            parts.append(label)
+            frame = frame.f_back
+        parts.reverse()
+        return ";".join(parts)
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.duration
+        try:
+            while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+                self.sample()
+        finally:
+            self._write()
+
+    def _write(self) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as file:
+                file.writelines(line + "\n" for line in self.collapsed())
+        except OSError as e:
+            logging.error(f"Failed to write profile to {self.path}: {e}")
+            return
+        busiest = ", ".join(f"{name}={n}" for name, n in list(self.thread_samples().items())[:5])
+        logging.info(f"Wrote {self.samples} profile samples to {self.path} ({busiest})")
+
+
+_current: Optional[SamplingProfiler] = None
+_lock = threading.Lock()
+
+
+def default_output_path() -> str:
+    """``profile-<timestamp>.folded`` in the directory of the log file."""
+    directory = os.path.dirname(settings.logFullpath) if settings.logFullpath else ""
+    name = time.strftime("profile-%Y%m%d-%H%M%S.folded")
+    return os.path.join(directory or settings.logFilepath or "", name)
+
+
+def active() -> bool:
+    """True while a profiling session is sampling."""
+    return _current is not None and _current.active()
+
+
+def start(duration: Optional[float] = None, path: Optional[str] = None) -> SamplingProfiler:
+    """Start a profiling session unless one is running; returns the session."""
+    global _current
+    with _lock:
+        if _current is not None and _current.active():
+            return _current
+        _current = SamplingProfiler(
+            path or default_output_path(),
+            settings.profilerIntervalMs / 1000.0,
+            settings.profilerDuration if duration is None else duration,
+        )
+        _current.start()
+        return _current
+
+
+def stop() -> Optional[str]:
+    """End the running session early; returns the output path, or None if idle."""
+    with _lock:
+        session = _current
+    if session is None or not session.active():
+        return None
+    return session.stop()
+
+
+def toggle() -> bool:
+    """Start profiling if idle, otherwise stop; returns whether it is now running."""
+    if active():
+        stop()
+        return False
+    start()
+    return True
+
+
+def start_from_env() -> Optional[SamplingProfiler]:
+    """Honour ``VOICEKB_PROFILE``: ``1`` runs for ``profilerDuration``, a number sets seconds."""
+    value = os.getenv("VOICEKB_PROFILE", "").strip()
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        return start()
+    try:
+        return start(duration=float(value))
+    except ValueError:
+        logging.warning(f"Ignoring VOICEKB_PROFILE={value!r}: expected 1 or a number of seconds")
+        return None
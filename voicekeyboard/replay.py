@@ -0,0 +1,315 @@
+"""Record raw capture input and replay it through the pipeline.
+
+:class:`AudioRecorder` stores every block :meth:`SpeechConverter.audioCallback
+<voicekeyboard.stt.SpeechConverter.audioCallback>` receives -- samples, block
+boundaries, arrival time and overflow/underflow flags -- in a compact
+``.vkrec`` file (16-bit PCM by default). Set ``audioRecordDir`` and every
+recording session is saved there.
+
+:func:`replay` feeds such a file back through the same callback and the
+capture hand-off into ``audioQueue``, block by block, at the recorded pace
+(``speed=1``), faster (``speed=4``) or as fast as possible (``speed=0``).
+That reproduces a user's latency or drop problem without a microphone and
+gives performance tests real-world audio. ``voicekeyboard replay FILE``
+runs a recording through the configured models and prints the metrics.
+
+File layout (little-endian): a header ``magic, sample_rate (u32),
+channels (u16), sample format (u8)``, then per block ``time (f64 seconds
+since the first block), frames (u32), status (u8)`` followed by the
+interleaved samples.
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from typing import IO, Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy
+
+from .settings import settings
+from .stt import SpeechConverter, SpscRingBuffer
+
+MAGIC = b"VKREC\x00\x01\x00"
+_HEADER = struct.Struct("<8sIHB")
+_BLOCK = struct.Struct("<dIB")
+
+# Sample formats: code -> numpy dtype
+SAMPLE_FORMATS: Dict[int, str] = {0: "<f4", 1: "<i2"}
+FORMAT_FLOAT32 = 0
+FORMAT_INT16 = 1
+
+STATUS_OVERFLOW = 1
+STATUS_UNDERFLOW = 2
+
+
+class RecordingHeader(NamedTuple):
+    sample_rate: int
+    channels: int
+    sample_format: int
+
+
+class RecordedBlock(NamedTuple):
+    """One callback invocation: arrival time, ``(frames, channels)`` samples, status bits."""
+
+    time: float
+    audio: numpy.ndarray
+    status: int
+
+
+class ReplayStatus(NamedTuple):
+    """Stand-in for ``sounddevice.CallbackFlags`` when replaying."""
+
+    input_overflow: bool
+    input_underflow: bool
+
+    def __bool__(self) -> bool:
+        return self.input_overflow or self.input_underflow
+
+
+def _status_bits(status: Any) -> int:
+    if not status:
+        return 0
+    bits = 0
+    if getattr(status, "input_overflow", False):
+        bits |= STATUS_OVERFLOW
+    if getattr(status, "input_underflow", False):
+        bits |= STATUS_UNDERFLOW
+    return bits
+
+
+class AudioRecorder:
+    """Append capture blocks to a ``.vkrec`` file from the audio callback.
+
+    :meth:`capture` runs on the real-time thread, so like
+    :meth:`~voicekeyboard.stt.SpeechConverter.audioCallback` it neither
+    allocates nor locks: samples go into a preallocated
+    :class:`~voicekeyboard.stt.SpscRingBuffer` holding ``buffer_seconds`` of
+    audio and block boundaries into preallocated arrays for ``max_blocks``
+    blocks. A writer thread polls both, encodes and writes. Blocks that do not
+    fit while the disk falls behind are dropped whole and counted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int,
+        channels: int,
+        sample_format: int = FORMAT_INT16,
+        buffer_seconds: float = 5.0,
+        max_blocks: int = 4096,
+        poll_interval: float = 0.05,
+    ):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}")
+        self.path = path
+        self.channels = int(channels)
+        self.sample_format = sample_format
+        self.poll_interval = poll_interval
+        self.blocks = 0
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file: IO[bytes] = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, int(sample_rate), self.channels, sample_format))
+        self._samples = SpscRingBuffer(int(sample_rate * self.channels * buffer_seconds))
+        # Block boundaries, published like SpscRingBuffer: the callback only
+        # advances _queued, the writer only _written
+        self._max_blocks = max(1, int(max_blocks))
+        self._times = numpy.zeros(self._max_blocks, dtype=numpy.float64)
+        self._frames = numpy.zeros(self._max_blocks, dtype=numpy.int64)
+        self._status = numpy.zeros(self._max_blocks, dtype=numpy.uint8)
+        self._queued = 0
+        self._written = 0
+        self._closing = threading.Event()
+        self._start: Optional[float] = None
+        self._writer = threading.Thread(target=self._run, name="audio-recorder", daemon=True)
+        self._writer.start()
+
+    def capture(self, indata: numpy.ndarray, frames: int, status: Any = None) -> None:
+        """Queue one callback block (same arguments ``audioCallback`` receives)."""
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        samples = frames * self.channels
+        ring = self._samples
+        if (
+            self._queued - self._written >= self._max_blocks
+            or ring.capacity - ring.available() < samples
+        ):
+            self.dropped_blocks += 1
+            self.dropped_frames += frames
+            return
+        ring.write(indata[:frames].reshape(-1))
+        slot = self._queued % self._max_blocks
+        self._times[slot] = now - self._start
+        self._frames[slot] = frames
+        self._status[slot] = _status_bits(status)
+        # Publish only after the samples and the boundary are in place
+        self._queued += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "blocks": self.blocks,
+            "dropped_blocks": self.dropped_blocks,
+            "dropped_frames": self.dropped_frames,
+        }
+
+    def close(self) -> None:
+        """Write everything captured so far and close the file."""
+        self._closing.set()
+        self._writer.join()
+        self._file.close()
+        if self.dropped_blocks:
+            logging.warning(
+                f"Recorder fell behind and dropped {self.dropped_blocks} blocks "
+                f"({self.dropped_frames} frames)"
+            )
+        logging.info(f"Recorded {self.blocks} capture blocks to {self.path}")
+
+    def _run(self) -> None:
+        # The lock-free callback cannot signal, so poll; close() cuts the wait short
+        while not self._closing.wait(self.poll_interval):
+            self._write_pending()
+        self._write_pending()
+
+    def _write_pending(self) -> None:
+        dtype = numpy.dtype(SAMPLE_FORMATS[self.sample_format])
+        while self._written < self._queued:
+            slot = self._written % self._max_blocks
+            frames = int(self._frames[slot])
+            samples = self._samples.read(frames * self.channels).reshape(frames, self.channels)
+            if dtype.kind == "i":
+                samples = numpy.clip(samples, -1.0, 1.0) * 32767.0
+            self._file.write(_BLOCK.pack(float(self._times[slot]), frames, int(self._status[slot])))
+            self._file.write(samples.astype(dtype).tobytes())
+            self.blocks += 1
+            self._written += 1
+
+
+class RecordingReader:
+    """Iterator over the blocks of an open ``.vkrec`` file, as float32.
+
+    Owns the file: it is closed once the last block has been read, by
+    :meth:`close`, or on leaving a ``with`` block.
+    """
+
+    def __init__(self, file: IO[bytes], header: RecordingHeader):
+        self.header = header
+        self._file = file
+        self._dtype = numpy.dtype(SAMPLE_FORMATS[header.sample_format])
+
+    def __iter__(self) -> "RecordingReader":
+        return self
+
+    def __next__(self) -> RecordedBlock:
+        if self._file.closed:
+            raise StopIteration
+        head = self._file.read(_BLOCK.size)
+        if len(head) < _BLOCK.size:
+            self.close()
+            raise StopIteration
+        offset, frames, status = _BLOCK.unpack(head)
+        size = frames * self.header.channels * self._dtype.itemsize
+        data = self._file.read(size)
+        if len(data) < size:
+            # Torn last block of an interrupted recording
+            self.close()
+            raise StopIteration
+        audio = numpy.frombuffer(data, dtype=self._dtype).reshape(frames, self.header.channels)
+        audio = audio.astype(numpy.float32)
+        if self._dtype.kind == "i":
+            audio *= 1.0 / 32768.0
+        return RecordedBlock(offset, audio, status)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "RecordingReader":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+
+def read_recording(path: str) -> Tuple[RecordingHeader, RecordingReader]:
+    """Header of a ``.vkrec`` file and a :class:`RecordingReader` over its blocks.
+
+    The header is checked and the file opened right away; close the reader
+    (or use it in a ``with`` block) if it is not read to the end.
+    """
+    file = open(path, "rb")
+    raw = file.read(_HEADER.size)
+    if len(raw) < _HEADER.size or raw[:8] != MAGIC:
+        file.close()
+        raise ValueError(f"{path}: not a voicekeyboard capture recording")
+    _magic, rate, channels, sample_format = _HEADER.unpack(raw)
+    if sample_format not in SAMPLE_FORMATS:
+        file.close()
+        raise ValueError(f"{path}: unknown sample format {sample_format}")
+    header = RecordingHeader(rate, channels, sample_format)
+    return header, RecordingReader(file, header)
+
+
+def replay(path: str, converter: SpeechConverter, speed: float = 0.0) -> Dict[str, Any]:
+    """Feed a recording into ``converter`` the way live capture does.
+
+    Each block goes through ``audioCallback`` and is then moved into
+    ``audioQueue``. ``speed`` 1 keeps the recorded timing, larger values play
+    faster and 0 feeds as fast as possible, waiting whenever the queue is
+    full so that no audio is lost to the replay itself. Start the VAD stage
+    (``processAudioStream``) first; this only produces input. Returns the
+    number of blocks and seconds of audio fed and the wall time taken.
+    """
+    header, blocks = read_recording(path)
+    with blocks:
+        if header.sample_rate != settings.audioSampleRate:
+            raise ValueError(
+                f"{path} was recorded at {header.sample_rate} Hz, "
+                f"the pipeline runs at {settings.audioSampleRate} Hz"
+            )
+        fed = frames = 0
+        started = time.perf_counter()
+        for block in blocks:
+            if speed > 0:
+                time.sleep(max(0.0, started + block.time / speed - time.perf_counter()))
+            status = ReplayStatus(
+                bool(block.status & STATUS_OVERFLOW), bool(block.status & STATUS_UNDERFLOW)
+            )
+            converter.audioCallback(block.audio, block.audio.shape[0], None, status)
+            # Flat out, wait for queue space rather than shed audio the replay itself overran
+            converter._drain_capture(wait=speed <= 0)
+            fed += 1
+            frames += block.audio.shape[0]
+    return {
+        "blocks": fed,
+        "audio_seconds": round(frames / header.sample_rate, 3),
+        "wall_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def run(path: str, speed: float = 0.0, out: Optional[IO[str]] = None) -> Dict[str, Any]:
+    """``voicekeyboard replay``: run a recording through the models and print metrics."""
+    converter = SpeechConverter()
+    converter._ensure_models_loaded()
+    converter._process_flag = [True]
+    thread = threading.Thread(target=converter.processAudioStream, name="stt-vad", daemon=True)
+    started = time.perf_counter()
+    thread.start()
+    result = replay(path, converter, speed)
+    # The VAD stage drains what is still queued and waits for the ASR stage
+    converter._process_flag[0] = False
+    converter.audioQueue.put_unbounded(None)
+    thread.join()
+    result["wall_seconds_with_decode"] = round(time.perf_counter() - started, 3)
+    result["metrics"] = converter.metrics_snapshot()
+    result["capture"] = converter.capture_stats()
+    result["queues"] = converter.pipeline_stats()
+    json.dump(result, out or sys.stdout, indent=2)
+    (out or sys.stdout).write("\n")
+    return result
@@ -0,0 +1,344 @@
+"""Long-lived local model server and its client backend.
+
+``voicekeyboard serve`` loads the ASR engine once and answers requests on a
+Unix domain socket, so restarting the app (tray "Restart", settings changes)
+no longer reloads the model, and several front-ends on one host share one copy
+of the weights. The front-end reaches it through :class:`RemoteAsrBackend`
+when ``asrServerEnabled`` is set, falling back to in-process models if no
+server is running.
+
+The wire protocol is the one used by the process-isolated worker (see
+:class:`~voicekeyboard.asr.ConnectedAsrBackend`), preceded by a ``hello``
+naming the client's shared audio ring so audio is read in place. The socket
+lives in a directory only the current user can access, and both ends
+authenticate with a key kept in a 0600 file next to it (:func:`authkey_path`),
+so other local users can neither connect nor impersonate the server.
+"""
+
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, List, Optional
+
+from .asr import (
+    AsrBackend,
+    AsrWorkerError,
+    ConnectedAsrBackend,
+    create_asr_backend,
+    serve_connection,
+)
+from .settings import settings
+from .transport import SharedAudioRing, TransportMeter
+
+
+def _shutdown(conn: Any) -> None:
+    """Make a thread blocked reading ``conn`` (and the peer) see EOF.
+
+    ``close()`` from another thread would neither wake the reader nor reach
+    the peer; ``shutdown()`` on a duplicate descriptor does both. The reading
+    thread still closes the connection itself.
+    """
+    try:
+        with socket.fromfd(conn.fileno(), socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except (OSError, ValueError):
+        pass
+
+
+def default_socket_path() -> str:
+    """Per-user socket path: ``$XDG_RUNTIME_DIR/voicekeyboard/model.sock`` or a temp dir."""
+    runtime = os.getenv("XDG_RUNTIME_DIR")
+    if runtime:
+        base = os.path.join(runtime, "voicekeyboard")
+    else:
+        user = getattr(os, "getuid", lambda: os.getenv("USERNAME", "user"))()
+        base = os.path.join(tempfile.gettempdir(), f"voicekeyboard-{user}")
+    return os.path.join(base, "model.sock")
+
+
+def socket_path() -> str:
+    """Socket path from ``asrServerSocket``, or :func:`default_socket_path`."""
+    return settings.asrServerSocket or default_socket_path()
+
+
+def authkey_path(path: str) -> str:
+    """Key file shared by the server on ``path`` and its clients."""
+    return os.path.join(os.path.dirname(path), "authkey")
+
+
+def _check_private(path: str, mode: int) -> None:
+    """Refuse ``path`` unless it is owned by this user and has exactly ``mode``."""
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o777 != mode:
+        raise RuntimeError(
+            f"{path} must be owned by the current user with mode {mode:o}, "
+            f"found uid {info.st_uid} and mode {info.st_mode & 0o777:o}"
+        )
+
+
+def read_authkey(path: str, create: bool = False) -> bytes:
+    """Authentication key for the server on ``path``; ``create`` makes one if missing."""
+    key_file = authkey_path(path)
+    if create:
+        try:
+            fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "wb") as file:
+                file.write(os.urandom(32))
+    _check_private(key_file, 0o600)
+    with open(key_file, "rb") as file:
+        return file.read()
+
+
+class ModelServer:
+    """Owns one loaded ASR backend and serves it to any number of clients.
+
+    Each client gets its own thread; engine calls are serialised so clients
+    share the model without loading it twice.
+    """
+
+    def __init__(self, path: Optional[str] = None, backend: Optional[AsrBackend] = None):
+        self.path = path or socket_path()
+        self.backend = backend
+        self.clients = 0
+        self.connections = 0
+        self._listener: Optional[Any] = None
+        self._accept_thread: Optional[threading.Thread] = None
+        self._engine_lock = threading.Lock()
+        self._conns: List[Any] = []
+        self._conns_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._authkey = b""
+
+    def start(self) -> None:
+        """Load the backend (unless given one) and start accepting clients."""
+        self._prepare_socket()
+        if self.backend is None:
+            self.backend = create_asr_backend(settings.asrBackend)
+        if self.backend.model is None:
+            started = time.perf_counter()
+            self.backend.load()
+            logging.info(f"Model server loaded models in {time.perf_counter() - started:.2f}s")
+        # Create the socket 0600 from the start instead of tightening it after bind
+        umask = os.umask(0o177)
+        try:
+            self._listener = Listener(self.path, family="AF_UNIX", authkey=self._authkey)
+        finally:
+            os.umask(umask)
+        self._stopped.clear()
+        self._accept_thread = threading.Thread(
+            target=self._accept_loop, name="model-server-accept", daemon=True
+        )
+        self._accept_thread.start()
+        logging.info(f"Model server listening on {self.path}")
+
+    def serve_forever(self) -> None:
+        """Start and block until :meth:`stop` is called (or Ctrl+C)."""
+        self.start()
+        try:
+            # Unix sockets only: a blocking wait stays interruptible by Ctrl+C here
+            self._stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop accepting, drop connected clients and remove the socket."""
+        if self._stopped.is_set() and self._listener is None:
+            return
+        self._stopped.set()
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            # Wake the accept loop with a bare connection, then close; a full
+            # Client would wait forever for a challenge if the loop already left
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.path)
+            except OSError:
+                pass
+            listener.close()
+        with self._conns_lock:
+            conns = list(self._conns)
+        for conn in conns:
+            _shutdown(conn)
+        if self._accept_thread is not None:
+            self._accept_thread.join(timeout=2)
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        logging.info("Model server stopped")
+
+    def _prepare_socket(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            # An existing directory may belong to someone else or be open to them
+            _check_private(directory, 0o700)
+        self._authkey = read_authkey(self.path, create=True)
+        if not os.path.exists(self.path):
+            return
+        try:
+            Client(self.path, family="AF_UNIX", authkey=self._authkey).close()
+        except AuthenticationError:
+            raise RuntimeError(f"{self.path} is served by a server with another key") from None
+        except OSError:
+            # Left behind by a server that did not shut down cleanly
+            os.unlink(self.path)
+            return
+        raise RuntimeError(f"A model server is already running on {self.path}")
+
+    def _accept_loop(self) -> None:
+        while not self._stopped.is_set():
+            listener = self._listener
+            if listener is None:
+                return
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError) as e:
+                if not self._stopped.is_set():
+                    logging.warning(f"Model server rejected a client: {e!r}")
+                continue
+            except OSError:
+                return
+            if self._stopped.is_set():
+                conn.close()
+                return
+            self.connections += 1
+            threading.Thread(
+                target=self._handle_client, args=(conn,), name="model-server-client", daemon=True
+            ).start()
+
+    def _handle_client(self, conn: Any) -> None:
+        ring: Optional[SharedAudioRing] = None
+        with self._conns_lock:
+            self._conns.append(conn)
+            self.clients += 1
+        try:
+            message = conn.recv()
+            if not message or message[0] != "hello":
+                return
+            _hello, ring_name, ring_capacity = message
+            if ring_name:
+                try:
+                    ring = SharedAudioRing(ring_capacity, name=ring_name, track=False)
+                except OSError as e:
+                    # Different host or namespace; audio will come over the socket
+                    logging.info(f"Client audio ring unavailable: {e}")
+            assert self.backend is not None
+            # Tell the client whether it may pass audio by reference
+            conn.send(("ready", self.backend.capabilities(), ring is not None))
+            serve_connection(conn, self.backend, ring, lock=self._engine_lock)
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._conns_lock:
+                self._conns.remove(conn)
+                self.clients -= 1
+            if ring is not None:
+                ring.close()
+            conn.close()
+
+
+class RemoteAsrBackend(ConnectedAsrBackend):
+    """ASR backend served by a :class:`ModelServer` over a Unix socket.
+
+    :meth:`load` raises :class:`~voicekeyboard.asr.AsrWorkerError` when no
+    server is listening. If the connection drops later (e.g. the server was
+    restarted), requests reconnect for up to ``reconnect_timeout`` seconds
+    before failing; ``reconnects`` counts successful reconnections.
+    """
+
+    name = "remote"
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        reconnect_timeout: float = 10.0,
+        poll_interval: float = 0.1,
+        transport: Optional[SharedAudioRing] = None,
+        meter: Optional[TransportMeter] = None,
+    ):
+        super().__init__(poll_interval, transport, meter)
+        self.path = path or socket_path()
+        self.reconnect_timeout = reconnect_timeout
+        self.reconnects = 0
+
+    def load(self) -> None:
+        with self._lock:
+            self._connect()
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+        self.model = None
+
+    def _connect(self) -> None:
+        try:
+            conn = Client(self.path, family="AF_UNIX", authkey=read_authkey(self.path))
+        except OSError as e:
+            raise AsrWorkerError(f"No model server on {self.path}: {e}") from None
+        except (AuthenticationError, RuntimeError) as e:
+            raise AsrWorkerError(
+                f"Model server on {self.path} failed authentication: {e}"
+            ) from None
+        try:
+            transport = self.transport
+            conn.send(
+                (
+                    "hello",
+                    None if transport is None else transport.name,
+                    0 if transport is None else transport.capacity,
+                )
+            )
+            reply = conn.recv()
+        except (EOFError, OSError) as e:
+            conn.close()
+            raise AsrWorkerError(f"Model server handshake failed: {e}") from None
+        if reply[0] != "ready":
+            conn.close()
+            raise AsrWorkerError(f"Model server refused connection: {reply[1]}")
+        self._conn, self._caps = conn, reply[1]
+        self._peer_ring = self.transport is not None and bool(reply[2])
+        self.model = self.path
+        logging.info(f"Connected to model server on {self.path}")
+
+    def _disconnect(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        conn.close()
+
+    def _recover(self) -> None:
+        self._disconnect()
+        deadline = time.monotonic() + self.reconnect_timeout
+        while True:
+            try:
+                self._connect()
+                self.reconnects += 1
+                return
+            except AsrWorkerError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+
+
+def serve(path: Optional[str] = None, backend: Optional[str] = None) -> None:
+    """Run a model server in the foreground (``voicekeyboard serve``)."""
+    if backend:
+        settings.asrBackend = backend
+    ModelServer(path).serve_forever()
@@ -41,9 +41,13 @@ class SettingsManager:
         self.windowBlurBackgroundEnabled: bool = False
         self.windowBlurBackgroundPeriod: int = 100
         self.windowBlurBackgroundStrength: float = 2.0
+        # Blur a capture shrunk by this factor, then scale it back up (1 blurs full size)
+        self.windowBlurBackgroundDownscale: int = 4
         self.windowClipToScreenBorder: bool = True
         self.windowKeepOnTop: bool = True
         self.windowFrameless: bool = True
+        # Minimum milliseconds between overlay label updates; newer text replaces pending text
+        self.windowLabelUpdateIntervalMs: int = 16
         self.trayIconShow: bool = True
         self.trayIconDaemon: bool = True
         self.pushToTalk: bool = False
@@ -74,13 +78,41 @@ class SettingsManager:
         self.labelTrayMenuSettings: str = "Settings"
         self.labelTrayMenuDivider1: str = "---"
         self.labelTrayMenuRestart: str = "Restart"
+        self.labelTrayMenuProfile: str = "Profile threads"
         self.settingsJustUseDefaults: bool = True
+        # Speech recognition engine: "faster-whisper" or "stub" (deterministic, for testing)
+        self.asrBackend: str = "faster-whisper"
+        # Host the ASR engine in a child process so decoding never holds the app's GIL
+        self.asrProcessIsolation: bool = False
+        # Worker crashes tolerated (each restarts it and retries the request)
+        self.asrProcessMaxRestarts: int = 3
+        # Seconds of voiced audio the shared-memory hand-off to the ASR process holds
+        self.pipelineSharedAudioDuration: float = 120.0
+        # Use a running ``voicekeyboard serve`` model server; falls back to in-process
+        self.asrServerEnabled: bool = False
+        # Unix socket of the model server; empty uses the per-user default path
+        self.asrServerSocket: str = ""
+        # Seconds to keep reconnecting when the model server goes away
+        self.asrServerReconnectTimeout: float = 10.0
         self.whisperModel: str = "medium"
-        self.whisperDevice: str = "cuda"
-        self.whisperComputeType: str = "float16"
+        # "auto" probes devices/compute types once per machine and model and caches the pick
+        self.whisperDevice: str = "auto"
+        self.whisperComputeType: str = "auto"
+        # 16-bit WAV with speech used by the probe to check accuracy; None judges speed only
+        self.whisperProbeAudio: Optional[str] = None
+        # Fraction of the most precise candidate's words a faster candidate must match
+        self.whisperProbeMinAccuracy: float = 0.9
         self.whisperCpuThreads: int = 0
         self.whisperNumWorkers: int = 1
         self.whisperLanguage: str = "pt"
+        # Load and warm up models in the background at startup instead of on first use
+        self.sttPreloadOnStartup: bool = False
+        # Re-decode an overlapping window while speaking and emit only stable text
+        self.whisperStreamingDecode: bool = False
+        # Decode up to this many finished utterances in one batched call
+        self.whisperBatchMaxSize: int = 8
+        # How long the first utterance of a batch may wait for more (0 = no added latency)
+        self.whisperBatchMaxWaitMs: int = 0
         self.audioChannels: int = 1
         self.audioSampleRate: int = 16000
         self.audioChunkDuration: float = 1.0
@@ -91,7 +123,51 @@ class SettingsManager:
         from typing import Optional
 
         self.audioInputDevice: Optional[str] = None
+        # Capture block length and size of the lock-free ring the callback writes into
+        self.audioCaptureBlockMs: int = 10
+        self.audioCaptureBufferDuration: float = 2.0
+        # Save each session's raw capture input here as .vkrec for replay; empty disables
+        self.audioRecordDir: str = ""
         self.vadForceRedownload: bool = False
+        # "torch" (torch.hub Silero) or "onnx" (ONNX Runtime, no PyTorch, works offline)
+        self.vadBackend: str = "torch"
+        # Path to a Silero .onnx file; None searches bundled/cached copies
+        self.vadOnnxPath: Optional[str] = None
+        # Bounded stage queues (capture -> VAD -> ASR); policy: block, drop-oldest or merge
+        self.pipelineAudioQueueSize: int = 256
+        self.pipelineAudioQueuePolicy: str = "merge"
+        self.pipelineAsrQueueSize: int = 8
+        self.pipelineAsrQueuePolicy: str = "block"
+        # Utterances kept in the rolling latency / real-time-factor histograms
+        self.metricsWindow: int = 500
+        # Seconds between metrics summaries in the log (0 disables); idle periods are skipped
+        self.metricsLogInterval: float = 60.0
+        # Also write each metrics snapshot as JSON to this file; empty disables
+        self.metricsDumpPath: str = ""
+        # Serve OpenMetrics counters at http://127.0.0.1:<port>/metrics (0 disables)
+        self.metricsExporterPort: int = 0
+        # Also rewrite the OpenMetrics text to this file every metricsExporterInterval seconds
+        self.metricsExporterPath: str = ""
+        self.metricsExporterInterval: float = 15.0
+        # Sampling profiler (tray menu or VOICEKB_PROFILE): sample period and maximum run time
+        self.profilerIntervalMs: int = 5
+        self.profilerDuration: float = 30.0
+        # Type recognized text into the focused window (opt-in; off: only log it)
+        self.outputEnabled: bool = False
+        # Paste texts longer than this many characters via the clipboard (0 always types)
+        self.outputPasteThreshold: int = 200
+        # Put the previous clipboard contents back after pasting
+        self.outputRestoreClipboard: bool = True
+        # With whisperStreamingDecode, type unconfirmed words too and correct them in place
+        self.outputLiveHypotheses: bool = False
+        # Streaming VAD: score each new frame once instead of re-running over the buffer
+        self.vadStreaming: bool = True
+        self.vadThreshold: float = 0.5
+        self.vadMinSilenceMs: int = 300
+        self.vadSpeechPadMs: int = 30
+        # Drop speech regions shorter than this (clicks, coughs), like Silero's default
+        self.vadMinSpeechMs: int = 250
+        self.vadMaxSpeechDuration: float = 30.0
 
     def load(self, configFile: str = "settings.ini"):
         """Load settings from an INI file.
@@ -234,6 +310,16 @@ class SettingsManager:
         except Exception:
             opacity = 0.78
         self.windowOpacity = max(0.0, min(1.0, opacity))
+        try:
+            self.windowBlurBackgroundDownscale = max(
+                1, min(16, int(self.windowBlurBackgroundDownscale))
+            )
+        except Exception:
+            self.windowBlurBackgroundDownscale = 4
+        try:
+            self.windowLabelUpdateIntervalMs = max(0, int(self.windowLabelUpdateIntervalMs))
+        except Exception:
+            self.windowLabelUpdateIntervalMs = 16
 
         # Audio and STT
         try:
@@ -244,6 +330,11 @@ class SettingsManager:
             self.audioChannels = 1 if int(self.audioChannels) != 2 else 2
         except Exception:
             self.audioChannels = 1
+        try:
+            self.audioCaptureBlockMs = max(1, min(200, int(self.audioCaptureBlockMs)))
+            self.audioCaptureBufferDuration = max(0.1, float(self.audioCaptureBufferDuration))
+        except Exception:
+            self.audioCaptureBlockMs, self.audioCaptureBufferDuration = 10, 2.0
         # Derived sizes
         try:
             self.audioChunkSize = int(self.audioSampleRate * float(self.audioChunkDuration))
@@ -255,6 +346,75 @@ class SettingsManager:
             self.audioChunkOverlapDuration = 0.2
             self.audioChunkSize = int(self.audioSampleRate * self.audioChunkDuration)
             self.audioChunkOverlapSize = int(self.audioSampleRate * self.audioChunkOverlapDuration)
+        try:
+            self.whisperBatchMaxSize = max(1, int(self.whisperBatchMaxSize))
+            self.whisperBatchMaxWaitMs = max(0, int(self.whisperBatchMaxWaitMs))
+        except Exception:
+            self.whisperBatchMaxSize, self.whisperBatchMaxWaitMs = 8, 0
+        try:
+            self.whisperProbeMinAccuracy = max(0.0, min(1.0, float(self.whisperProbeMinAccuracy)))
+        except Exception:
+            self.whisperProbeMinAccuracy = 0.9
+        try:
+            self.asrProcessMaxRestarts = max(0, int(self.asrProcessMaxRestarts))
+        except Exception:
+            self.asrProcessMaxRestarts = 3
+        try:
+            self.pipelineSharedAudioDuration = max(1.0, float(self.pipelineSharedAudioDuration))
+        except Exception:
+            self.pipelineSharedAudioDuration = 120.0
+        try:
+            self.asrServerReconnectTimeout = max(0.0, float(self.asrServerReconnectTimeout))
+        except Exception:
+            self.asrServerReconnectTimeout = 10.0
+        # Pipeline queues
+        from .pipeline import POLICIES
+
+        for key, default in (
+            ("pipelineAudioQueuePolicy", "merge"),
+            ("pipelineAsrQueuePolicy", "block"),
+        ):
+            if getattr(self, key) not in POLICIES:
+                setattr(self, key, default)
+        try:
+            self.pipelineAudioQueueSize = max(1, int(self.pipelineAudioQueueSize))
+            self.pipelineAsrQueueSize = max(1, int(self.pipelineAsrQueueSize))
+        except Exception:
+            self.pipelineAudioQueueSize, self.pipelineAsrQueueSize = 256, 8
+        try:
+            self.metricsWindow = max(1, int(self.metricsWindow))
+            self.metricsLogInterval = max(0.0, float(self.metricsLogInterval))
+        except Exception:
+            self.metricsWindow, self.metricsLogInterval = 500, 60.0
+        try:
+            self.metricsExporterPort = max(0, min(65535, int(self.metricsExporterPort)))
+            self.metricsExporterInterval = max(1.0, float(self.metricsExporterInterval))
+        except Exception:
+            self.metricsExporterPort, self.metricsExporterInterval = 0, 15.0
+        try:
+            self.profilerIntervalMs = max(1, int(self.profilerIntervalMs))
+            self.profilerDuration = max(1.0, float(self.profilerDuration))
+        except Exception:
+            self.profilerIntervalMs, self.profilerDuration = 5, 30.0
+        try:
+            self.outputPasteThreshold = max(0, int(self.outputPasteThreshold))
+        except Exception:
+            self.outputPasteThreshold = 200
+        # VAD tuning
+        if self.vadBackend not in ("torch", "onnx"):
+            self.vadBackend = "torch"
+        try:
+            self.vadThreshold = max(0.05, min(0.95, float(self.vadThreshold)))
+        except Exception:
+            self.vadThreshold = 0.5
+        try:
+            self.vadMinSpeechMs = max(0, min(2000, int(self.vadMinSpeechMs)))
+        except Exception:
+            self.vadMinSpeechMs = 250
+        try:
+            self.vadMaxSpeechDuration = max(1.0, min(30.0, float(self.vadMaxSpeechDuration)))
+        except Exception:
+            self.vadMaxSpeechDuration = 30.0
         # Language default
         if not getattr(self, "whisperLanguage", None):
             self.whisperLanguage = "en"
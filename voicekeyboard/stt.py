@@ -2,29 +2,59 @@ import logging
 import os
 import threading
 import time
-from collections import deque
-from queue import Queue
-from typing import Any, Callable, Deque, Dict, List, Optional
+from queue import Empty, Full
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import numpy
 
+from .asr import (
+    AsrBackend,
+    AsrWorkerError,
+    FasterWhisperBackend,
+    ProcessAsrBackend,
+    Word,
+    create_asr_backend,
+)
+from .metrics import MetricsReporter, PipelineMetrics, UtteranceTiming
+from .pipeline import StageQueue
 from .settings import settings
+from .transport import SharedAudioRing, TransportMeter
+
+# Model readiness states reported by SpeechConverter.readiness
+READINESS_IDLE = "idle"
+READINESS_LOADING = "loading"
+READINESS_WARMING = "warming"
+READINESS_READY = "ready"
+READINESS_FAILED = "failed"
+
+_READINESS_LABELS = {
+    READINESS_LOADING: "STT startup\nLoading models",
+    READINESS_WARMING: "STT startup\nWarming up models",
+    READINESS_FAILED: "Failed to load models!\nPlease check logs",
+}
 
 
 class RingBuffer:
-    """Simple ring buffer for 1-D numpy arrays concatenation.
+    """Fixed-capacity circular buffer of float32 audio samples.
 
-    Maintains a deque of numpy chunks up to a maximum total length. On append,
-    evicts from the left to keep the concatenated length within capacity.
+    Samples live in one preallocated array and appending never allocates; once
+    full, the oldest samples are overwritten. Storage is mirrored (every sample
+    is written at ``i`` and ``i + capacity``) so that any span of the newest
+    samples is contiguous and :meth:`latest` can always return a zero-copy view.
     """
 
     def __init__(self, capacity: int):
         self.capacity = max(1, int(capacity))
-        self._chunks: Deque[numpy.ndarray] = deque()
+        self._data: numpy.ndarray = numpy.zeros(2 * self.capacity, dtype=numpy.float32)
+        # Ring position one past the newest sample and number of valid samples
+        self._end = 0
         self._length = 0
 
+    def __len__(self) -> int:
+        return self._length
+
     def clear(self) -> None:
-        self._chunks.clear()
+        self._end = 0
         self._length = 0
 
     def append(self, arr: numpy.ndarray) -> None:
@@ -35,26 +65,771 @@ class RingBuffer:
         n = int(arr.shape[0])
         if n <= 0:
             return
-        self._chunks.append(arr)
-        self._length += n
-        # Evict from left if over capacity
-        while self._length > self.capacity and self._chunks:
-            left = self._chunks[0]
-            if self._length - left.shape[0] >= self.capacity:
-                self._chunks.popleft()
-                self._length -= left.shape[0]
-            else:
-                # Trim the left chunk to fit capacity
-                need = self._length - self.capacity
-                if need > 0:
-                    self._chunks[0] = left[need:]
-                    self._length -= need
-                break
+        cap = self.capacity
+        if n >= cap:
+            # Only the newest ``capacity`` samples survive
+            tail = arr[n - cap :]
+            self._data[:cap] = tail
+            self._data[cap:] = tail
+            self._end = 0
+            self._length = cap
+            return
+        end = self._end
+        first = min(n, cap - end)
+        self._data[end : end + first] = arr[:first]
+        self._data[cap + end : cap + end + first] = arr[:first]
+        if first < n:
+            rest = n - first
+            self._data[:rest] = arr[first:]
+            self._data[cap : cap + rest] = arr[first:]
+        self._end = (end + n) % cap
+        self._length = min(cap, self._length + n)
+
+    def latest(self, n: Optional[int] = None) -> numpy.ndarray:
+        """Return a view of the newest ``n`` samples (all buffered by default).
+
+        The view aliases the ring storage and is only valid until the next
+        :meth:`append`; copy it to keep the data.
+        """
+        count = self._length if n is None else max(0, min(int(n), self._length))
+        stop = self._end + self.capacity
+        return self._data[stop - count : stop]
 
     def concat(self) -> numpy.ndarray:
-        if not self._chunks:
-            return numpy.empty((0,), dtype=numpy.float32)
-        return numpy.concatenate(list(self._chunks), axis=0)
+        """Return a copy of all buffered samples, oldest first.
+
+        Unlike :meth:`latest`, the result stays valid across appends.
+        """
+        return self.latest().copy()
+
+
+class SpscRingBuffer:
+    """Lock-free single-producer/single-consumer ring of float32 samples.
+
+    Meant for the real-time audio callback: :meth:`write` copies into
+    preallocated storage and publishes the new write position with a single
+    attribute store, so it neither allocates nor takes a lock. The producer
+    only ever advances ``_write`` and the consumer only ``_read``; both are
+    monotonically increasing sample counts, which makes the fill level
+    ``_write - _read`` unambiguous. When the ring is full the newest samples
+    that do not fit are dropped and counted rather than blocking the producer.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._data: numpy.ndarray = numpy.zeros(self.capacity, dtype=numpy.float32)
+        self._write = 0
+        self._read = 0
+        self.dropped = 0
+
+    def available(self) -> int:
+        """Number of samples ready to be read."""
+        return self._write - self._read
+
+    def write(self, samples: numpy.ndarray) -> int:
+        """Producer side: copy as many samples as fit; return how many were written."""
+        n = int(samples.shape[0])
+        free = self.capacity - (self._write - self._read)
+        if n > free:
+            self.dropped += n - free
+            n = free
+        if n <= 0:
+            return 0
+        pos = self._write % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos : pos + first] = samples[:first]
+        if first < n:
+            self._data[: n - first] = samples[first:n]
+        # Publish only after the data is in place
+        self._write += n
+        return n
+
+    def read(self, max_samples: Optional[int] = None) -> numpy.ndarray:
+        """Consumer side: return a new array with up to ``max_samples`` samples."""
+        n = self._write - self._read
+        if max_samples is not None:
+            n = min(n, int(max_samples))
+        out = numpy.empty(max(0, n), dtype=numpy.float32)
+        if n <= 0:
+            return out
+        pos = self._read % self.capacity
+        first = min(n, self.capacity - pos)
+        out[:first] = self._data[pos : pos + first]
+        if first < n:
+            out[first:] = self._data[: n - first]
+        self._read += n
+        return out
+
+
+class VadEvent(NamedTuple):
+    """Speech boundary emitted by :class:`StreamingVad`.
+
+    ``kind`` is ``"start"`` or ``"end"``; ``sample`` is the absolute sample
+    index in the stream fed to the VAD since its last reset.
+    """
+
+    kind: str
+    sample: int
+
+
+def vad_frame_samples(sample_rate: int) -> Optional[int]:
+    """Return the Silero frame length for ``sample_rate`` or None if unsupported.
+
+    Silero scores fixed windows of 256 samples at 8 kHz and 512 samples at
+    16 kHz (~32 ms); multiples of 16 kHz are decimated by the model itself.
+    """
+    if sample_rate == 8000:
+        return 256
+    if sample_rate % 16000 == 0:
+        return 512 * (sample_rate // 16000)
+    return None
+
+
+class StreamingVad:
+    """Stateful voice activity detector that scores each frame exactly once.
+
+    Incoming samples are accumulated into a preallocated frame; every complete
+    frame is passed to ``score_fn`` (which keeps the model's recurrent state)
+    and the resulting speech probability drives a hysteresis state machine
+    equivalent to Silero's ``get_speech_timestamps``. Cost per second of audio
+    is therefore constant, independent of how much audio has been buffered.
+
+    Like ``min_speech_duration_ms`` there, regions with less than
+    ``min_speech_ms`` of speech are dropped: the ``start`` event is held back
+    until the region is long enough, so a short blip emits no events at all.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[numpy.ndarray], float],
+        sample_rate: int,
+        frame_samples: int,
+        reset_fn: Optional[Callable[[], None]] = None,
+        threshold: float = 0.5,
+        min_silence_ms: int = 300,
+        speech_pad_ms: int = 30,
+        min_speech_ms: int = 0,
+    ):
+        self.score_fn = score_fn
+        self.reset_fn = reset_fn
+        self.sample_rate = int(sample_rate)
+        self.frame_samples = int(frame_samples)
+        self.threshold = float(threshold)
+        self.neg_threshold = max(0.01, self.threshold - 0.15)
+        self.min_silence_samples = int(self.sample_rate * min_silence_ms / 1000)
+        self.speech_pad_samples = int(self.sample_rate * speech_pad_ms / 1000)
+        self.min_speech_samples = int(self.sample_rate * min_speech_ms / 1000)
+        self._frame = numpy.zeros(self.frame_samples, dtype=numpy.float32)
+        self.frames_scored = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all state, including the model's recurrent state."""
+        if self.reset_fn is not None:
+            self.reset_fn()
+        self._filled = 0
+        self._cursor = 0
+        self._triggered = False
+        self._temp_end = 0
+        # First speech frame of the open region, and whether its start was emitted
+        self._speech_start = 0
+        self._started = False
+
+    @property
+    def triggered(self) -> bool:
+        """True while inside a speech region whose start has been emitted."""
+        return self._started
+
+    @property
+    def cursor(self) -> int:
+        """Absolute index one past the last scored sample."""
+        return self._cursor
+
+    def process(self, samples: numpy.ndarray) -> List[VadEvent]:
+        """Score the complete frames contained in ``samples`` and return events."""
+        events: List[VadEvent] = []
+        if samples.ndim != 1:
+            samples = samples.reshape(-1)
+        n = int(samples.shape[0])
+        pos = 0
+        while pos < n:
+            take = min(self.frame_samples - self._filled, n - pos)
+            self._frame[self._filled : self._filled + take] = samples[pos : pos + take]
+            self._filled += take
+            pos += take
+            if self._filled == self.frame_samples:
+                self._filled = 0
+                probability = float(self.score_fn(self._frame))
+                self.frames_scored += 1
+                self._advance(probability, events)
+        return events
+
+    def flush(self) -> List[VadEvent]:
+        """Close an open speech region at the current cursor."""
+        if not self._triggered:
+            return []
+        started = self._started
+        self._triggered = self._started = False
+        self._temp_end = 0
+        return [VadEvent("end", self._cursor)] if started else []
+
+    def _advance(self, probability: float, events: List[VadEvent]) -> None:
+        frame_start = self._cursor
+        self._cursor += self.frame_samples
+        if probability >= self.threshold:
+            self._temp_end = 0
+            if not self._triggered:
+                self._triggered = True
+                self._speech_start = frame_start
+        elif self._triggered and probability < self.neg_threshold:
+            if not self._temp_end:
+                self._temp_end = frame_start
+            if self._cursor - self._temp_end >= self.min_silence_samples:
+                end = min(self._cursor, self._temp_end + self.speech_pad_samples)
+                started = self._started
+                self._triggered = self._started = False
+                self._temp_end = 0
+                if started:
+                    events.append(VadEvent("end", end))
+                return
+        if (
+            self._triggered
+            and not self._started
+            and not self._temp_end
+            and self._cursor - self._speech_start >= self.min_speech_samples
+        ):
+            self._started = True
+            start = max(0, self._speech_start - self.speech_pad_samples)
+            events.append(VadEvent("start", start))
+
+
+class VadBackend:
+    """Frame scorer behind :class:`StreamingVad`.
+
+    Implementations load a Silero-compatible model in :meth:`load`, return the
+    speech probability of one frame (see :func:`vad_frame_samples`) from
+    :meth:`score` while carrying the model's recurrent state, and forget that
+    state in :meth:`reset`.
+    """
+
+    name = ""
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = int(sample_rate)
+
+    def load(self) -> None:
+        raise NotImplementedError
+
+    def score(self, frame: numpy.ndarray) -> float:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def get_speech_timestamps(
+        self, audio: numpy.ndarray, *_args: Any, **_kwargs: Any
+    ) -> List[Dict[str, int]]:
+        """Batch VAD over ``audio`` built on :meth:`score` (fallback path)."""
+        frame_samples = vad_frame_samples(self.sample_rate)
+        if frame_samples is None:
+            return []
+        vad = StreamingVad(
+            self.score,
+            self.sample_rate,
+            frame_samples,
+            reset_fn=self.reset,
+            threshold=settings.vadThreshold,
+            min_silence_ms=settings.vadMinSilenceMs,
+            speech_pad_ms=settings.vadSpeechPadMs,
+            min_speech_ms=settings.vadMinSpeechMs,
+        )
+        events = vad.process(numpy.asarray(audio, dtype=numpy.float32)) + vad.flush()
+        self.reset()
+        timestamps: List[Dict[str, int]] = []
+        for event in events:
+            if event.kind == "start":
+                timestamps.append({"start": event.sample, "end": event.sample})
+            elif timestamps:
+                timestamps[-1]["end"] = min(event.sample, int(audio.shape[0]))
+        return timestamps
+
+
+class TorchSileroVad(VadBackend):
+    """Silero VAD loaded through ``torch.hub`` (imports PyTorch)."""
+
+    name = "torch"
+
+    def __init__(self, sample_rate: int):
+        super().__init__(sample_rate)
+        self.model: Optional[Any] = None
+        self._torch: Optional[Any] = None
+        self._timestamps: Optional[Callable[..., List[Dict[str, int]]]] = None
+
+    def load(self) -> None:
+        import torch
+
+        self._torch = torch
+        self.model, utils = torch.hub.load(
+            repo_or_dir="snakers4/silero-vad",
+            model="silero_vad",
+            force_reload=settings.vadForceRedownload,
+        )
+        self._timestamps = utils[0]
+
+    def score(self, frame: numpy.ndarray) -> float:
+        assert self.model is not None and self._torch is not None
+        with self._torch.no_grad():
+            return float(self.model(self._torch.from_numpy(frame), self.sample_rate).item())
+
+    def reset(self) -> None:
+        if self.model is not None:
+            self.model.reset_states()
+
+    def get_speech_timestamps(
+        self, audio: numpy.ndarray, *_args: Any, **_kwargs: Any
+    ) -> List[Dict[str, int]]:
+        if self._timestamps is None:
+            return []
+        return self._timestamps(audio, self.model, sampling_rate=self.sample_rate)
+
+
+def _onnx_model_candidates() -> List[str]:
+    """Locations searched for a Silero ``.onnx`` file when none is configured."""
+    import importlib.util
+
+    candidates = [os.path.join(os.path.dirname(__file__), "assets", "silero_vad.onnx")]
+    torch_home = os.getenv("TORCH_HOME") or os.path.join(
+        os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "torch"
+    )
+    hub_repo = os.path.join(torch_home, "hub", "snakers4_silero-vad_master")
+    candidates.append(os.path.join(hub_repo, "src", "silero_vad", "data", "silero_vad.onnx"))
+    candidates.append(os.path.join(hub_repo, "files", "silero_vad.onnx"))
+    # Models shipped inside installed packages (found without importing them)
+    for package, relative in (
+        ("silero_vad", os.path.join("data", "silero_vad.onnx")),
+        ("faster_whisper", os.path.join("assets", "silero_vad_v6.onnx")),
+    ):
+        try:
+            spec = importlib.util.find_spec(package)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None and spec.origin:
+            candidates.append(os.path.join(os.path.dirname(spec.origin), relative))
+    return candidates
+
+
+class OnnxSileroVad(VadBackend):
+    """Silero VAD on ONNX Runtime: no PyTorch import and no network access.
+
+    Loads ``path`` (``vadOnnxPath``) or the first model found by
+    :func:`_onnx_model_candidates`. Supports the Silero v5 export
+    (``input``/``state``/``sr``), the v4 export (``input``/``sr``/``h``/``c``)
+    and the ``h``/``c`` variant bundled with faster-whisper.
+    """
+
+    name = "onnx"
+
+    def __init__(self, sample_rate: int, path: Optional[str] = None):
+        super().__init__(sample_rate)
+        self.path = path
+        self.session: Optional[Any] = None
+        self._inputs: List[str] = []
+        # Silero scores 16 kHz audio; higher multiples are decimated like the torch model
+        self._step = sample_rate // 16000 if sample_rate % 16000 == 0 else 1
+        self._model_rate = sample_rate // self._step
+        self._window = 256 if self._model_rate == 8000 else 512
+        self._context_size = 32 if self._model_rate == 8000 else 64
+        self._sr = numpy.array(self._model_rate, dtype=numpy.int64)
+        self._with_context = False
+        self._input = numpy.zeros((1, self._window), dtype=numpy.float32)
+        self._state: Dict[str, numpy.ndarray] = {}
+
+    def resolve_path(self) -> str:
+        if self.path:
+            if not os.path.isfile(self.path):
+                raise FileNotFoundError(f"Silero ONNX model not found: {self.path}")
+            return self.path
+        for candidate in _onnx_model_candidates():
+            if os.path.isfile(candidate):
+                return candidate
+        raise FileNotFoundError("No Silero ONNX model found; set vadOnnxPath")
+
+    def _create_session(self, path: str) -> Any:
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = 1
+        options.log_severity_level = 4
+        return onnxruntime.InferenceSession(
+            path, providers=["CPUExecutionProvider"], sess_options=options
+        )
+
+    def load(self) -> None:
+        path = self.resolve_path()
+        self.session = self._create_session(path)
+        self._inputs = [i.name for i in self.session.get_inputs()]
+        # v5 and the faster-whisper export expect the previous frame's tail prepended
+        self._with_context = "state" in self._inputs or "sr" not in self._inputs
+        width = self._window + (self._context_size if self._with_context else 0)
+        self._input = numpy.zeros((1, width), dtype=numpy.float32)
+        self.reset()
+        logging.info(f"Loaded ONNX Silero VAD from {path}")
+
+    def reset(self) -> None:
+        self._input[:] = 0.0
+        if "state" in self._inputs:
+            self._state = {"state": numpy.zeros((2, 1, 128), dtype=numpy.float32)}
+        elif "sr" in self._inputs:
+            zeros = numpy.zeros((2, 1, 64), dtype=numpy.float32)
+            self._state = {"h": zeros, "c": zeros.copy()}
+        else:
+            zeros = numpy.zeros((1, 1, 128), dtype=numpy.float32)
+            self._state = {"h": zeros, "c": zeros.copy()}
+
+    def score(self, frame: numpy.ndarray) -> float:
+        assert self.session is not None
+        samples = frame[:: self._step] if self._step > 1 else frame
+        if self._with_context:
+            ctx = self._context_size
+            # Slide the last frame's tail into the context slot, then add the new frame
+            self._input[0, :ctx] = self._input[0, -ctx:]
+            self._input[0, ctx:] = samples
+        else:
+            self._input[0, :] = samples
+        feeds: Dict[str, numpy.ndarray] = {"input": self._input}
+        feeds.update(self._state)
+        if "sr" in self._inputs:
+            feeds["sr"] = self._sr
+        outputs = self.session.run(None, feeds)
+        if "state" in self._state:
+            self._state["state"] = outputs[1]
+        else:
+            self._state["h"], self._state["c"] = outputs[1], outputs[2]
+        return float(numpy.asarray(outputs[0]).reshape(-1)[-1])
+
+
+VAD_BACKENDS: Dict[str, Callable[[int], VadBackend]] = {
+    TorchSileroVad.name: TorchSileroVad,
+    OnnxSileroVad.name: lambda rate: OnnxSileroVad(rate, settings.vadOnnxPath),
+}
+
+
+def create_vad_backend(name: str, sample_rate: int) -> VadBackend:
+    """Instantiate the VAD backend registered under ``name`` (``torch`` or ``onnx``)."""
+    try:
+        factory = VAD_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown VAD backend: {name}") from None
+    return factory(sample_rate)
+
+
+class SpeechSegmenter:
+    """Cut a continuous sample stream into utterances using :class:`StreamingVad`.
+
+    Audio is kept in a :class:`RingBuffer` holding up to ``max_samples``; when
+    an utterance outgrows it, it is cut at the current position and a new one
+    starts immediately so nothing is dropped. Finished utterances are copied
+    out of the ring with ``store`` (``numpy.copy`` by default; the app stores
+    them straight into a :class:`~voicekeyboard.transport.SharedAudioRing`).
+    """
+
+    def __init__(
+        self,
+        vad: StreamingVad,
+        max_samples: int,
+        store: Callable[[numpy.ndarray], numpy.ndarray] = numpy.copy,
+    ):
+        self.vad = vad
+        self.store = store
+        self.ring = RingBuffer(max_samples)
+        self._total = 0
+        self._start: Optional[int] = None
+        self.vad.reset()
+
+    @property
+    def active(self) -> bool:
+        """True while an utterance is open."""
+        return self._start is not None
+
+    def feed(self, chunk: numpy.ndarray) -> List[numpy.ndarray]:
+        """Append ``chunk`` and return the utterances completed by it."""
+        return [audio for _start, audio in self.feed_spans(chunk)]
+
+    def feed_spans(self, chunk: numpy.ndarray) -> List[Tuple[int, numpy.ndarray]]:
+        """Like :meth:`feed`, pairing each utterance with its absolute start sample."""
+        if chunk.ndim != 1:
+            chunk = chunk.reshape(-1)
+        n = int(chunk.shape[0])
+        utterances: List[Tuple[int, numpy.ndarray]] = []
+        # Cut before the ring would overwrite the start of the open utterance
+        if self._start is not None and self._total + n - self._start > self.ring.capacity:
+            utterances.append(self._span(self._start, self._total))
+            self._start = self._total
+        self.ring.append(chunk)
+        self._total += n
+        for event in self.vad.process(chunk):
+            if event.kind == "start":
+                self._start = event.sample
+            elif self._start is not None:
+                utterances.append(self._span(self._start, event.sample))
+                self._start = None
+        return utterances
+
+    def current(self) -> Optional[numpy.ndarray]:
+        """Return a view of the open utterance so far, or None."""
+        if self._start is None:
+            return None
+        return self.ring.latest(self._total - max(self._start, self._oldest()))
+
+    def flush(self) -> List[numpy.ndarray]:
+        """Finish the open utterance (e.g. when recording stops)."""
+        return [audio for _start, audio in self.flush_spans()]
+
+    def flush_spans(self) -> List[Tuple[int, numpy.ndarray]]:
+        """Like :meth:`flush`, pairing the utterance with its absolute start sample."""
+        utterances: List[Tuple[int, numpy.ndarray]] = []
+        if self._start is not None:
+            utterances.append(self._span(self._start, self._total))
+        self._start = None
+        self.vad.flush()
+        return utterances
+
+    def _oldest(self) -> int:
+        return self._total - len(self.ring)
+
+    def _span(self, start: int, end: int) -> Tuple[int, numpy.ndarray]:
+        start = max(start, self._oldest())
+        end = min(end, self._total)
+        if end <= start:
+            return start, numpy.empty((0,), dtype=numpy.float32)
+        return start, self.store(self.ring.latest(self._total - start)[: end - start])
+
+
+def _norm_word(word: Word) -> str:
+    return word.text.strip().lower()
+
+
+def join_words(words: List[Word]) -> str:
+    """Concatenate Whisper word pieces (which carry their own leading spaces)."""
+    return "".join(w.text for w in words)
+
+
+class HypothesisStabilizer:
+    """Commit the prefix on which consecutive hypotheses agree (LocalAgreement-2).
+
+    Each call to :meth:`insert` receives the words of a fresh decode of an
+    overlapping window, in utterance time. Words that end before the already
+    committed text are discarded, then the longest common prefix with the
+    previous hypothesis is committed and returned. Only committed words are
+    final; the rest stays pending until confirmed or :meth:`flush` is called.
+    """
+
+    def __init__(self, tolerance: float = 0.1):
+        self.tolerance = float(tolerance)
+        self.reset()
+
+    def reset(self) -> None:
+        self.committed: List[Word] = []
+        self.committed_end = 0.0
+        self._pending: List[Word] = []
+
+    def insert(self, words: List[Word]) -> List[Word]:
+        """Add a new hypothesis and return the words it newly commits."""
+        fresh = [w for w in words if w.start > self.committed_end - self.tolerance]
+        # Whisper often repeats the last committed words at the window start
+        if fresh and self.committed and abs(fresh[0].start - self.committed_end) < 1.0:
+            for n in range(min(len(self.committed), len(fresh), 5), 0, -1):
+                tail = [_norm_word(w) for w in self.committed[-n:]]
+                if tail == [_norm_word(w) for w in fresh[:n]]:
+                    fresh = fresh[n:]
+                    break
+        agreed: List[Word] = []
+        for old, new in zip(self._pending, fresh):
+            if _norm_word(old) != _norm_word(new):
+                break
+            agreed.append(new)
+        self._pending = fresh[len(agreed) :]
+        self._commit(agreed)
+        return agreed
+
+    @property
+    def pending(self) -> List[Word]:
+        """Words of the latest hypothesis that are not confirmed yet."""
+        return list(self._pending)
+
+    def flush(self) -> List[Word]:
+        """Commit and return whatever is still pending."""
+        rest = self._pending
+        self._pending = []
+        self._commit(rest)
+        return rest
+
+    def _commit(self, words: List[Word]) -> None:
+        if words:
+            self.committed.extend(words)
+            self.committed_end = words[-1].end
+
+
+class StreamingDecoder:
+    """Re-decode a sliding window of the open utterance and emit stable text.
+
+    Every ``chunk_samples`` of new audio the window (from just before the end
+    of the committed text, keeping ``overlap_samples`` of context, to the
+    newest sample) is decoded again and fed to a :class:`HypothesisStabilizer`.
+    The window only grows while text is unstable, so decode cost — and hence
+    latency — is bounded by the chunk size rather than the utterance length.
+    """
+
+    def __init__(
+        self,
+        transcribe_words: Callable[[numpy.ndarray, str], List[Word]],
+        sample_rate: int,
+        chunk_samples: int,
+        overlap_samples: int,
+        max_window_samples: int,
+    ):
+        self.transcribe_words = transcribe_words
+        self.sample_rate = int(sample_rate)
+        self.chunk_samples = max(1, int(chunk_samples))
+        self.overlap_samples = max(0, int(overlap_samples))
+        self.max_window_samples = max(self.chunk_samples, int(max_window_samples))
+        self.stabilizer = HypothesisStabilizer()
+        self.reset()
+
+    def reset(self) -> None:
+        self.stabilizer.reset()
+        self._window_start = 0
+        self._decoded_upto = 0
+
+    def update(self, utterance: numpy.ndarray) -> str:
+        """Decode again if a chunk of new audio arrived; return newly committed text."""
+        n = int(utterance.shape[0])
+        if n - self._decoded_upto < self.chunk_samples:
+            return ""
+        self._decoded_upto = n
+        agreed = self.stabilizer.insert(self._decode(utterance))
+        committed_sample = int(self.stabilizer.committed_end * self.sample_rate)
+        self._window_start = max(self._window_start, committed_sample - self.overlap_samples)
+        if n - self._window_start > self.max_window_samples:
+            # Never let an unstable tail grow the window without bound
+            agreed += self.stabilizer.flush()
+            self._window_start = max(0, n - self.overlap_samples)
+        return join_words(agreed)
+
+    def hypothesis(self) -> str:
+        """Best current text of the open utterance: committed words plus the pending tail."""
+        return join_words(self.stabilizer.committed + self.stabilizer.pending)
+
+    def finish(self, utterance: numpy.ndarray) -> str:
+        """Decode the final window of a finished utterance and commit everything."""
+        words = self._decode(utterance) if utterance.shape[0] > self._window_start else []
+        agreed = self.stabilizer.insert(words)
+        agreed += self.stabilizer.flush()
+        self.reset()
+        return join_words(agreed)
+
+    def _decode(self, utterance: numpy.ndarray) -> List[Word]:
+        window = utterance[self._window_start :]
+        offset = self._window_start / self.sample_rate
+        prompt = join_words(self.stabilizer.committed)[-200:]
+        return [
+            Word(w.start + offset, w.end + offset, w.text)
+            for w in self.transcribe_words(window, prompt)
+        ]
+
+
+class UtteranceBatcher:
+    """Collect finished utterances into batches bounded by size and wait time.
+
+    A batch is due when it holds ``max_size`` utterances or when the oldest one
+    has waited ``max_wait`` seconds. With ``max_wait == 0`` only utterances that
+    are already available (e.g. several segments from one VAD pass, or a
+    backlog that piled up during a long decode) are batched, so no latency is
+    added.
+    """
+
+    def __init__(self, max_size: int, max_wait: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max(1, int(max_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self._clock = clock
+        self._items: List[numpy.ndarray] = []
+        self._timings: List[Optional[UtteranceTiming]] = []
+        self._oldest = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, audio: numpy.ndarray, timing: Optional[UtteranceTiming] = None) -> None:
+        if not self._items:
+            self._oldest = self._clock()
+        self._items.append(audio)
+        self._timings.append(timing)
+
+    def full(self) -> bool:
+        return len(self._items) >= self.max_size
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the oldest pending utterance is due, or None if empty."""
+        if not self._items:
+            return None
+        return max(0.0, self._oldest + self.max_wait - self._clock())
+
+    def take(self) -> List[numpy.ndarray]:
+        """Remove and return up to ``max_size`` utterances, oldest first."""
+        return self.take_timed()[0]
+
+    def take_timed(self) -> Tuple[List[numpy.ndarray], List[Optional[UtteranceTiming]]]:
+        """Like :meth:`take`, also returning the timing recorded with each utterance."""
+        batch = self._items[: self.max_size]
+        timings = self._timings[: self.max_size]
+        self._items = self._items[self.max_size :]
+        self._timings = self._timings[self.max_size :]
+        if self._items:
+            self._oldest = self._clock()
+        return batch, timings
+
+
+class AsrJob(NamedTuple):
+    """Unit of work handed from the VAD stage to the ASR stage.
+
+    ``kind`` is ``"final"`` for finished utterances (``audios`` may hold several,
+    which are decoded as one batch) or ``"partial"`` for a snapshot of the open
+    utterance in streaming decode mode. ``timings`` parallels ``audios`` for
+    finished utterances and may be empty.
+    """
+
+    kind: str
+    audios: List[numpy.ndarray]
+    timings: Tuple[UtteranceTiming, ...] = ()
+
+
+# Sentinel telling the ASR worker to drain its queue and exit
+_ASR_STOP = AsrJob("stop", [])
+
+
+def merge_audio_blocks(
+    tail: Optional[numpy.ndarray], item: numpy.ndarray
+) -> Optional[numpy.ndarray]:
+    """``merge`` policy for the capture queue: join consecutive audio blocks."""
+    if tail is None:
+        # A wake-up marker left by stop() is not audio
+        return None
+    return numpy.concatenate((tail, item))
+
+
+def merge_asr_jobs(tail: AsrJob, item: AsrJob) -> Optional[AsrJob]:
+    """``merge`` policy for the ASR queue.
+
+    A queued partial snapshot is superseded by anything newer for the same
+    utterance, and finished utterances are combined into a larger batch. A
+    partial cannot be folded into a final, so that case applies backpressure.
+    """
+    if tail.kind == "partial":
+        return item
+    if tail.kind == "final" and item.kind == "final":
+        return AsrJob("final", tail.audios + item.audios, tail.timings + item.timings)
+    return None
 
 
 class SpeechConverter:
@@ -65,11 +840,11 @@ class SpeechConverter:
         return os.getenv("VOICEKB_DRYRUN", "0") in ("1", "true", "True")
 
     def _update_label(self, text: str) -> None:
-        """Emit a label change signal on the UI thread, if available."""
+        """Post a label change for the UI thread, if available."""
         try:
             from .window import labelUpdater  # local import to avoid hard dep
 
-            labelUpdater.textChanged.emit(text)
+            labelUpdater.post(text)
         except Exception:
             # UI not available; ignore label updates
             logging.debug("Label update skipped (UI not initialized)")
@@ -86,8 +861,18 @@ class SpeechConverter:
             self.stream: Optional[Any] = None
             self.streamThread: Optional[threading.Thread] = None
             self.transcriptionThread: Optional[threading.Thread] = None
-            self.model: Optional[Any] = None
+            self.asrThread: Optional[threading.Thread] = None
+            # Speech recognition engine (``asrBackend``); None until loaded
+            self.asr: Optional[AsrBackend] = None
             self.vadModel: Optional[Any] = None
+            # Model lifecycle; guarded so lazy loading and preload never race
+            self.readiness: str = READINESS_IDLE
+            self._readiness_listeners: List[Callable[[str], None]] = []
+            self._load_lock = threading.Lock()
+            # VAD backend (torch or onnx); ``vadModel`` aliases it for "loaded" checks
+            self.vadBackend: Optional[VadBackend] = None
+            # Streaming VAD built around ``vadBackend``; None falls back to batch VAD
+            self.vad: Optional[StreamingVad] = None
             # default VAD is a no-op until models are ensured
             self.get_speech_timestamps: Callable[..., List[Dict[str, int]]] = (
                 lambda audio, *_args, **_kwargs: []
@@ -100,7 +885,39 @@ class SpeechConverter:
             )
             self._update_label("STT startup\nSetting up audio queue")
             logging.debug("Starting audio queue")
-            self.audioQueue: Queue = Queue()
+            # capture -> VAD hand-off; bounded so a stalled VAD cannot grow memory
+            self.audioQueue: StageQueue = StageQueue(
+                settings.pipelineAudioQueueSize,
+                settings.pipelineAudioQueuePolicy,
+                merge_fn=merge_audio_blocks,
+                name="audio",
+            )
+            # VAD -> ASR hand-off; recreated for every processing run
+            self.asrQueue: StageQueue = self._new_asr_queue()
+            # Real-time capture path: lock-free ring plus preallocated downmix scratch
+            self.captureRing = SpscRingBuffer(
+                int(settings.audioSampleRate * settings.audioCaptureBufferDuration)
+            )
+            self._downmix = numpy.zeros(self._capture_block_frames(), dtype=numpy.float32)
+            self.framesCaptured = 0
+            # Copies and by-reference hand-offs on the way to the model
+            self.transportMeter = TransportMeter()
+            # Shared-memory store for voiced audio; set up with process-isolated ASR
+            self.asrRing: Optional[SharedAudioRing] = None
+            self.inputOverflows = 0
+            self.inputUnderflows = 0
+            # Per-utterance stage latencies and real-time factor (see metrics_snapshot)
+            self.metrics = PipelineMetrics(settings.metricsWindow, queue_depths=self.queue_depths)
+            self.metricsReporter: Optional[MetricsReporter] = None
+            # Writes raw callback input to disk while set (``audioRecordDir``)
+            self.recorder: Optional[Any] = None
+            # Set by stop() to end the capture thread's wait between ring drains
+            self._captureStop = threading.Event()
+            # Output engine (``injector.TextInjector``) that types emitted text, when set
+            self.injector: Optional[Any] = None
+            # Seconds the last successful model load took; windows scored by batch VAD
+            self.modelLoadSeconds: Optional[float] = None
+            self.vadPasses = 0
             logging.debug("Queue started")
             self._update_label("Ready!")
         except Exception as error:
@@ -109,101 +926,632 @@ class SpeechConverter:
         else:
             logging.info("Initialized speech converter")
 
+    def add_readiness_listener(self, listener: Callable[[str], None]) -> None:
+        """Call ``listener(state)`` whenever :attr:`readiness` changes."""
+        self._readiness_listeners.append(listener)
+
+    def _set_readiness(self, state: str) -> None:
+        self.readiness = state
+        logging.info(f"STT readiness: {state}")
+        if state == READINESS_READY:
+            recording = getattr(self, "_record_flag", [False])[0]
+            self._update_label("Recording/Processing..." if recording else "Ready!")
+        else:
+            self._update_label(_READINESS_LABELS.get(state, state))
+        for listener in list(self._readiness_listeners):
+            try:
+                listener(state)
+            except Exception as e:
+                logging.debug(f"Readiness listener failed: {e}")
+
+    @property
+    def model(self) -> Optional[Any]:
+        """Engine object of the loaded ASR backend (e.g. the ``WhisperModel``)."""
+        return None if self.asr is None else self.asr.model
+
+    @model.setter
+    def model(self, value: Optional[Any]) -> None:
+        # Assigning a raw faster-whisper model wraps it in a backend
+        self.asr = None if value is None else FasterWhisperBackend(model=value)
+
+    @property
+    def batchedModel(self) -> Optional[Any]:
+        """faster-whisper ``BatchedInferencePipeline``, if the backend has one."""
+        return getattr(self.asr, "batched", None)
+
+    @batchedModel.setter
+    def batchedModel(self, value: Optional[Any]) -> None:
+        if isinstance(self.asr, FasterWhisperBackend):
+            self.asr.batched = value
+        elif value is not None:
+            raise ValueError("batchedModel requires the faster-whisper backend")
+
+    def _models_loaded(self) -> bool:
+        return self.asr is not None and self.vadModel is not None
+
     def _ensure_models_loaded(self) -> None:
-        """Lazy-load VAD and Whisper models if not in dry-run mode."""
-        if self.dry_run:
+        """Lazy-load VAD and Whisper models if not in dry-run mode.
+
+        Safe to call from any thread: if :meth:`preload` is already loading the
+        models, this waits for it instead of loading them a second time.
+        """
+        if self.dry_run or self._models_loaded():
             return
-        if self.model is not None and self.vadModel is not None:
+        with self._load_lock:
+            if self._models_loaded():
+                return
+            ok = self._load_models()
+            self._set_readiness(READINESS_READY if ok else READINESS_FAILED)
+
+    def preload(self) -> threading.Thread:
+        """Load and warm up the models on a background thread.
+
+        Used at startup when ``sttPreloadOnStartup`` is set so that the first
+        dictation does not pay for model construction and first-run kernel and
+        allocator initialisation. Progress is reported through
+        :attr:`readiness` and the readiness listeners.
+        """
+        thread = threading.Thread(target=self._preload, name="stt-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def _preload(self) -> None:
+        if self.dry_run:
+            self._set_readiness(READINESS_READY)
             return
+        with self._load_lock:
+            if not self._models_loaded() and not self._load_models():
+                self._set_readiness(READINESS_FAILED)
+                return
+            self._set_readiness(READINESS_WARMING)
+            self._warm_up()
+            self._set_readiness(READINESS_READY)
+
+    def _warm_up(self) -> None:
+        """Run the VAD and Whisper once on synthetic audio.
+
+        CTranslate2 and PyTorch select kernels and grow their allocators on the
+        first call; doing it here keeps that cost out of the first utterance.
+        """
+        rate = settings.audioSampleRate
+        t = numpy.arange(rate, dtype=numpy.float32) / rate
+        noise = numpy.random.default_rng(0).standard_normal(rate).astype(numpy.float32)
+        audio = (0.1 * numpy.sin(2 * numpy.pi * 220.0 * t) + 0.01 * noise).astype(numpy.float32)
         try:
-            self._update_label("STT startup\nLoading models")
-            logging.debug("Loading speech-to-text and VAD models lazily")
-            # Import heavy deps only when needed
-            import torch
-            from faster_whisper import WhisperModel
-
-            self.model = WhisperModel(
-                model_size_or_path=settings.whisperModel,
-                device=settings.whisperDevice,
-                compute_type=settings.whisperComputeType,
-                cpu_threads=settings.whisperCpuThreads,
-                num_workers=settings.whisperNumWorkers,
-            )
-            self.vadModel, utils = torch.hub.load(
-                repo_or_dir="snakers4/silero-vad",
-                model="silero_vad",
-                force_reload=settings.vadForceRedownload,
-            )
-            (self.get_speech_timestamps, _, _, _, _) = utils
-            logging.debug("Models loaded")
+            started = time.perf_counter()
+            if self.vad is not None:
+                self.vad.process(audio)
+                self.vad.reset()
+            elif self.vadModel is not None:
+                self.get_speech_timestamps(audio, self.vadModel, sampling_rate=rate)
+            self._transcribe(audio)
+            if self.asr is not None and self.asr.capabilities().batching:
+                self._transcribe_batch([audio, audio[: rate // 2]])
+            logging.info(f"Model warm-up took {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logging.warning(f"Model warm-up failed: {e}")
+
+    def _load_models(self) -> bool:
+        """Construct the Whisper and VAD models; returns False on failure."""
+        self._set_readiness(READINESS_LOADING)
+        started = time.perf_counter()
+        try:
+            logging.debug("Loading speech-to-text and VAD models")
+            # Heavy deps are imported by the backends when loading
+            asr = self._connect_model_server() if settings.asrServerEnabled else None
+            if asr is None:
+                asr = self._create_asr_backend()
+                asr.load()
+            self.asr = asr
+            backend = create_vad_backend(settings.vadBackend, settings.audioSampleRate)
+            backend.load()
+            self.vadBackend = backend
+            self.vadModel = backend
+            self.get_speech_timestamps = backend.get_speech_timestamps
+            self.vad = self._build_streaming_vad()
+            self.modelLoadSeconds = time.perf_counter() - started
+            logging.debug(f"Models loaded in {self.modelLoadSeconds:.2f}s")
+            return True
         except Exception as e:
             logging.error(f"Failed to load models: {e}")
             # Keep placeholders to allow app to continue running
-            self.model = None
+            self.asr = None
             self.vadModel = None
+            self.vadBackend = None
+            self.vad = None
             self.get_speech_timestamps = lambda audio, *_a, **_k: []
+            return False
+
+    def _shared_audio_ring(self) -> SharedAudioRing:
+        if self.asrRing is None:
+            self.asrRing = SharedAudioRing(
+                int(settings.audioSampleRate * settings.pipelineSharedAudioDuration)
+            )
+        return self.asrRing
+
+    def _create_asr_backend(self) -> AsrBackend:
+        """The configured in-process or process-isolated ASR backend (not loaded)."""
+        if settings.asrProcessIsolation:
+            return ProcessAsrBackend(
+                settings.asrBackend,
+                max_restarts=settings.asrProcessMaxRestarts,
+                transport=self._shared_audio_ring(),
+                meter=self.transportMeter,
+            )
+        return create_asr_backend(settings.asrBackend)
+
+    def _connect_model_server(self) -> Optional[AsrBackend]:
+        """Connect to a running model server, or None to load models in-process."""
+        from .server import RemoteAsrBackend
+
+        remote = RemoteAsrBackend(
+            reconnect_timeout=settings.asrServerReconnectTimeout,
+            transport=self._shared_audio_ring(),
+            meter=self.transportMeter,
+        )
+        try:
+            remote.load()
+        except AsrWorkerError as e:
+            logging.info(f"{e}; loading models in-process")
+            return None
+        return remote
+
+    def _build_streaming_vad(self) -> Optional[StreamingVad]:
+        """Wrap the loaded VAD backend in a :class:`StreamingVad`, if enabled."""
+        sample_rate = settings.audioSampleRate
+        frame_samples = vad_frame_samples(sample_rate)
+        backend = self.vadBackend
+        if not settings.vadStreaming or frame_samples is None or backend is None:
+            return None
+        return StreamingVad(
+            backend.score,
+            sample_rate,
+            frame_samples,
+            reset_fn=backend.reset,
+            threshold=settings.vadThreshold,
+            min_silence_ms=settings.vadMinSilenceMs,
+            speech_pad_ms=settings.vadSpeechPadMs,
+            min_speech_ms=settings.vadMinSpeechMs,
+        )
+
+    def _new_asr_queue(self) -> StageQueue:
+        return StageQueue(
+            settings.pipelineAsrQueueSize,
+            settings.pipelineAsrQueuePolicy,
+            merge_fn=merge_asr_jobs,
+            name="asr",
+        )
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Current number of items waiting in front of each pipeline stage."""
+        return {"audio": self.audioQueue.qsize(), "asr": self.asrQueue.qsize()}
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Rolling p50/p95/p99 stage latencies, real-time factor and queue depths."""
+        return self.metrics.snapshot()
+
+    def vad_windows_scored(self) -> int:
+        """VAD windows scored so far: streaming frames plus batch VAD passes."""
+        return (self.vad.frames_scored if self.vad is not None else 0) + self.vadPasses
+
+    def pipeline_stats(self) -> List[Dict[str, Any]]:
+        """Depth, high-water mark and overflow counters of every stage queue."""
+        return [self.audioQueue.stats(), self.asrQueue.stats()]
+
+    def _capture_block_frames(self) -> int:
+        return max(1, int(settings.audioSampleRate * settings.audioCaptureBlockMs / 1000))
+
+    def capture_stats(self) -> Dict[str, int]:
+        """Counters maintained by the audio callback."""
+        return {
+            "frames_captured": self.framesCaptured,
+            "frames_dropped": self.captureRing.dropped,
+            "input_overflows": self.inputOverflows,
+            "input_underflows": self.inputUnderflows,
+        }
 
     def audioCallback(self, indata, frames, time_info, status):
-        """Audio callback for sounddevice, pushing mono samples into the queue."""
-        if indata.ndim > 1:
-            mono_audio = numpy.mean(indata, axis=1)
+        """Real-time audio callback: downmix to mono and write into ``captureRing``.
+
+        Runs on the PortAudio thread, so it does a bounded, constant amount of
+        work: no allocation (the downmix goes into a preallocated buffer), no
+        locks and no queue operations. Status flags and frames that did not fit
+        into the ring are counted; :meth:`_drain_capture` moves the audio on.
+        """
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.capture(indata, frames, status)
+        if status:
+            if getattr(status, "input_overflow", False):
+                self.inputOverflows += 1
+            if getattr(status, "input_underflow", False):
+                self.inputUnderflows += 1
+        if indata.ndim > 1 and indata.shape[1] > 1:
+            if frames > self._downmix.shape[0]:
+                # Host delivered a larger block than configured; grow once
+                self._downmix = numpy.zeros(frames, dtype=numpy.float32)
+            mono = self._downmix[:frames]
+            numpy.add.reduce(indata, axis=1, out=mono)
+            mono *= 1.0 / indata.shape[1]
         else:
-            mono_audio = indata
+            mono = indata.reshape(-1)
+        self.captureRing.write(mono)
+        self.framesCaptured += frames
+
+    def transport_stats(self) -> Dict[str, float]:
+        """Copies and bytes moved per second of captured audio (see ``TransportMeter``)."""
+        stats = self.transportMeter.stats(settings.audioSampleRate)
+        if self.asrRing is not None:
+            stats["shared_ring_used"] = self.asrRing.used()
+            stats["shared_ring_full"] = self.asrRing.full
+        return stats
+
+    def _store_audio(self, audio: numpy.ndarray) -> numpy.ndarray:
+        """Copy voiced audio out of a VAD ring for the ASR stage.
+
+        With a shared ring the copy lands in shared memory, so a process-isolated
+        ASR backend reads it by offset without another copy.
+        """
+        self.transportMeter.copied(audio.nbytes)
+        if self.asrRing is not None:
+            ref = self.asrRing.write(audio)
+            if ref is not None:
+                return self.asrRing.view(ref)
+        return audio.copy()
+
+    def _release_audio(self, job: AsrJob) -> None:
+        """Free shared audio up to and including ``job`` once it is decoded."""
+        if self.asrRing is None:
+            return
+        refs = [self.asrRing.ref_of(audio) for audio in job.audios]
+        shared = [ref for ref in refs if ref is not None]
+        if shared:
+            self.asrRing.release(max(shared, key=lambda ref: ref.end))
+
+    def _drain_capture(self, wait: bool = False) -> None:
+        """Move captured audio from ``captureRing`` into the VAD stage queue.
+
+        With ``wait`` a full queue is waited on instead of applying its policy.
+        """
+        if self.captureRing.available() <= 0:
+            return
+        block = self.captureRing.read()
+        self.transportMeter.audio(block.shape[0])
+        self.transportMeter.copied(block.nbytes)
+        try:
+            self.audioQueue.put(block, block=wait)
+        except Full:
+            # Overflow is counted by the queue according to its policy
+            pass
+
+    def _transcribe(self, audio: numpy.ndarray) -> str:
+        """Run the ASR backend over one voiced region and return the joined text."""
+        if self.asr is None or audio.size == 0:
+            return ""
+        return self.asr.transcribe(audio, language=settings.whisperLanguage)
 
-        self.audioQueue.put(mono_audio.copy())
+    def _transcribe_batch(self, audios: List[numpy.ndarray]) -> List[str]:
+        """Transcribe several voiced regions, in one batched call when possible."""
+        if self.asr is None:
+            return ["" for _ in audios]
+        return self.asr.transcribe_batch(audios, language=settings.whisperLanguage)
+
+    def _transcribe_words(self, audio: numpy.ndarray, prompt: str = "") -> List[Word]:
+        """Run the ASR backend with word timestamps; times are relative to ``audio``."""
+        if self.asr is None or audio.size == 0:
+            return []
+        words: List[Word] = []
+        for seg in self.asr.segments(
+            audio, language=settings.whisperLanguage, word_timestamps=True, prompt=prompt
+        ):
+            if seg.words:
+                words.extend(seg.words)
+                continue
+            # No word timings: spread the segment's words evenly over its span
+            pieces = seg.text.split()
+            step = (seg.end - seg.start) / max(1, len(pieces))
+            for i, piece in enumerate(pieces):
+                start = seg.start + i * step
+                words.append(Word(start, start + step, " " + piece))
+        return words
+
+    def _emit_text(self, text: str) -> None:
+        """Hand recognized text downstream to the output engine, if one is attached."""
+        if text:
+            logging.info(f"Typing: {text}")
+            if self.injector is not None:
+                self.injector.submit(text)
+
+    def _emit_live(self, text: str, final: bool = False) -> None:
+        """Hand the open utterance's current (or ``final``) hypothesis to the output engine."""
+        if final:
+            logging.info(f"Typing: {text}")
+        else:
+            logging.debug(f"Hypothesis: {text}")
+        if self.injector is not None:
+            self.injector.revise(text, final)
 
     def processAudioStream(self) -> None:
-        """Consume audio, detect voice segments, and transcribe when possible.
+        """VAD stage: consume captured audio and hand voiced regions to the ASR stage.
+
+        With a streaming VAD available, every chunk is scored once by a
+        :class:`SpeechSegmenter` and each finished utterance is queued for
+        decoding. With ``whisperStreamingDecode`` a snapshot of the open
+        utterance is also queued every ``audioChunkDuration``. Otherwise the
+        loop falls back to running batch VAD over a short sliding buffer.
 
-        This loop keeps a sliding buffer and runs VAD to find voiced segments.
-        For each segment, it invokes the Whisper model to obtain text.
-        The loop terminates when ``_process_flag`` is cleared.
+        Decoding runs on a separate ASR worker (see :meth:`_asr_worker`) fed
+        through a bounded :class:`StageQueue`, so a long decode no longer stalls
+        VAD. The loop terminates when ``_process_flag`` is cleared; audio still
+        queued at that point is drained, the open utterance flushed, and the
+        ASR worker is allowed to finish before returning.
         """
         # Ring buffer sized to ~2s of audio for responsiveness without growing unbounded
         ring = RingBuffer(capacity=int(settings.audioSampleRate * 2))
         sample_rate = settings.audioSampleRate
         # Process small windows to improve responsiveness and allow tests to feed short buffers
         min_audio_window = max(160, int(sample_rate * 0.02))  # ~20ms at 16kHz
+        segmenter: Optional[SpeechSegmenter] = None
+        self._partial_sent = 0
+        asr_queue = self._start_asr_worker()
 
         # Use a mutable flag set in start()/stop()
         if not hasattr(self, "_process_flag"):
             self._process_flag = [True]
         while self._process_flag[0]:
             try:
+                # stop() wakes this at once; the timeout covers callers that only clear the flag
                 chunk = self.audioQueue.get(timeout=1)
-                ring.append(chunk)
-                audio_data = ring.concat()
-                if len(audio_data) < min_audio_window:
+            except Empty:
+                continue
+            segmenter = self._vad_step(chunk, ring, min_audio_window, segmenter)
+        # Audio queued before the flag was cleared (e.g. the end of a replay) still counts
+        for chunk in self.audioQueue.drain():
+            segmenter = self._vad_step(chunk, ring, min_audio_window, segmenter)
+        if segmenter is not None:
+            self._flush_segmenter(segmenter)
+        self._stop_asr_worker(asr_queue)
+
+    def _vad_step(
+        self,
+        chunk: Optional[numpy.ndarray],
+        ring: RingBuffer,
+        min_audio_window: int,
+        segmenter: Optional[SpeechSegmenter],
+    ) -> Optional[SpeechSegmenter]:
+        """Process one ``audioQueue`` item, skipping wake markers and logging failures."""
+        if chunk is None:
+            return segmenter
+        try:
+            return self._process_chunk(
+                chunk, ring, min_audio_window, segmenter, self.audioQueue.last_enqueued
+            )
+        except Exception as e:
+            logging.error(f"Error during real-time transcription: {e}")
+            return segmenter
+
+    def _process_chunk(
+        self,
+        chunk: numpy.ndarray,
+        ring: RingBuffer,
+        min_audio_window: int,
+        segmenter: Optional[SpeechSegmenter],
+        captured: Optional[float] = None,
+    ) -> Optional[SpeechSegmenter]:
+        """Run VAD over one queued chunk; returns the (possibly new) segmenter.
+
+        ``captured`` is when the chunk left the capture ring, for latency metrics.
+        """
+        sample_rate = settings.audioSampleRate
+        # Ensure heavy models are loaded if needed
+        if not self.dry_run and (self.asr is None or self.vadModel is None):
+            self._ensure_models_loaded()
+        if self.vad is not None:
+            if segmenter is None or segmenter.vad is not self.vad:
+                max_samples = int(sample_rate * settings.vadMaxSpeechDuration)
+                segmenter = SpeechSegmenter(self.vad, max_samples, store=self._store_audio)
+            # Mirrored ring: every sample is written twice
+            self.transportMeter.copied(2 * chunk.nbytes)
+            utterances = segmenter.feed(chunk)
+            if utterances:
+                self._partial_sent = 0
+                self._submit(self._final_job(utterances, captured))
+            if settings.whisperStreamingDecode:
+                current = segmenter.current()
+                if current is not None and (
+                    current.shape[0] - self._partial_sent >= settings.audioChunkSize
+                ):
+                    self._partial_sent = current.shape[0]
+                    self._submit(AsrJob("partial", [self._store_audio(current)]))
+            return segmenter
+        ring.append(chunk)
+        self.transportMeter.copied(2 * chunk.nbytes)
+        if len(ring) < min_audio_window:
+            return segmenter
+        # Zero-copy view of the buffered audio; valid until the next append
+        audio_data = ring.latest()
+        speech_timestamps = self.get_speech_timestamps(
+            audio_data, self.vadModel, sampling_rate=sample_rate
+        )
+        self.vadPasses += 1
+        if speech_timestamps and self.asr is not None:
+            # Copy out of the ring; all segments of one pass form one batch
+            voiced = [
+                self._store_audio(audio_data[seg["start"] : seg["end"]])
+                for seg in speech_timestamps
+            ]
+            self._submit(self._final_job(voiced, captured))
+        # Reset buffer after processing a batch to keep latency low
+        ring.clear()
+        return segmenter
+
+    def _final_job(self, utterances: List[numpy.ndarray], captured: Optional[float]) -> AsrJob:
+        """Wrap finished utterances in a job, stamped with their capture and VAD times."""
+        now = time.monotonic()
+        rate = settings.audioSampleRate
+        timings = tuple(
+            UtteranceTiming(audio.shape[0] / rate, now if captured is None else captured, now)
+            for audio in utterances
+        )
+        return AsrJob("final", utterances, timings)
+
+    def _submit(self, job: AsrJob) -> None:
+        """Queue ``job`` for the ASR stage, waiting while it is full (backpressure)."""
+        queue = self.asrQueue
+        while True:
+            try:
+                queue.put(job, timeout=0.5)
+                return
+            except Full:
+                if self.asrThread is None or not self.asrThread.is_alive():
+                    logging.warning("ASR stage not running; dropping voiced audio")
+                    return
+
+    def _flush_segmenter(self, segmenter: SpeechSegmenter) -> None:
+        """Feed audio still queued at stop, then close the open utterance."""
+        try:
+            while True:
+                try:
+                    chunk = self.audioQueue.get_nowait()
+                except Empty:
+                    break
+                if chunk is None:
+                    # stop()'s wake marker can arrive after the drain
                     continue
-                # Ensure heavy models are loaded if needed
-                if not self.dry_run and (self.model is None or self.vadModel is None):
-                    self._ensure_models_loaded()
-                speech_timestamps = self.get_speech_timestamps(
-                    audio_data, self.vadModel, sampling_rate=sample_rate
-                )
-                if speech_timestamps and self.model:
-                    for segment in speech_timestamps:
-                        start = segment["start"]
-                        end = segment["end"]
-                        voiced_audio = audio_data[start:end]
-                        voiced_audio = voiced_audio.astype(numpy.float32)
-                        segments, info = self.model.transcribe(
-                            voiced_audio,
-                            language=settings.whisperLanguage,
-                            vad_filter=False,
-                            word_timestamps=False,
-                        )
-                        text = " ".join([seg.text for seg in segments])
-                        if text:
-                            logging.info(f"Typing: {text}")
-                # Reset buffer after processing a batch to keep latency low
-                ring.clear()
+                utterances = segmenter.feed(chunk)
+                if utterances:
+                    self._submit(self._final_job(utterances, self.audioQueue.last_enqueued))
+            utterances = segmenter.flush()
+            if utterances:
+                self._submit(self._final_job(utterances, None))
+        except Exception as e:
+            logging.error(f"Error while flushing pending audio: {e}")
+
+    def _start_asr_worker(self) -> StageQueue:
+        """Start the ASR stage on a fresh queue and return that queue."""
+        queue = self._new_asr_queue()
+        self.asrQueue = queue
+        self.asrThread = threading.Thread(
+            target=self._asr_worker, args=(queue,), name="stt-asr", daemon=True
+        )
+        self.asrThread.start()
+        return queue
+
+    def _stop_asr_worker(self, queue: StageQueue) -> None:
+        """Let the ASR stage decode everything queued so far, then wait for it."""
+        queue.put_unbounded(_ASR_STOP)
+        thread = self.asrThread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _asr_worker(self, queue: StageQueue) -> None:
+        """ASR stage: decode jobs from ``queue`` and emit text until told to stop."""
+        decoder: Optional[StreamingDecoder] = None
+        if settings.whisperStreamingDecode:
+            decoder = StreamingDecoder(
+                self._transcribe_words,
+                settings.audioSampleRate,
+                settings.audioChunkSize,
+                settings.audioChunkOverlapSize,
+                int(settings.audioSampleRate * settings.vadMaxSpeechDuration),
+            )
+        batcher = UtteranceBatcher(
+            settings.whisperBatchMaxSize, settings.whisperBatchMaxWaitMs / 1000.0
+        )
+        stopping = False
+        while not stopping or len(batcher):
+            job: Optional[AsrJob] = None
+            if not stopping:
+                try:
+                    job = queue.get(timeout=batcher.time_left())
+                except Empty:
+                    job = None
+            if job is _ASR_STOP:
+                stopping = True
+                job = None
+            try:
+                if job is not None:
+                    self._handle_asr_job(job, decoder, batcher)
+                # Keep batching while a backlog is queued; flush once it drains or fills up
+                if len(batcher) and (
+                    stopping or batcher.full() or (batcher.time_left() == 0 and queue.empty())
+                ):
+                    self._flush_batch(batcher)
             except Exception as e:
                 logging.error(f"Error during real-time transcription: {e}")
-                continue
+            # Nothing older is pending once the batcher is empty
+            if job is not None and not len(batcher):
+                self._release_audio(job)
+        if self.asrRing is not None:
+            self.asrRing.release_all()
+
+    def _handle_asr_job(
+        self,
+        job: AsrJob,
+        decoder: Optional[StreamingDecoder],
+        batcher: UtteranceBatcher,
+    ) -> None:
+        live = settings.outputLiveHypotheses
+        if job.kind == "partial":
+            if decoder is not None:
+                text = decoder.update(job.audios[-1])
+                if live:
+                    self._emit_live(decoder.hypothesis())
+                else:
+                    self._emit_text(text)
+            return
+        timings: Tuple[Optional[UtteranceTiming], ...] = job.timings or (None,) * len(job.audios)
+        for utterance, timing in zip(job.audios, timings):
+            if decoder is not None:
+                started = time.monotonic()
+                committed = join_words(decoder.stabilizer.committed)
+                # Only the not-yet-committed tail of the utterance is emitted
+                text = decoder.finish(utterance)
+                if live:
+                    # The final hypothesis replaces the live one; nothing is left to append
+                    self._emit_live(committed + text, final=True)
+                    text = ""
+                self._emit_timed(text, timing, started, time.monotonic(), utterance)
+            else:
+                batcher.add(utterance, timing)
+
+    def _flush_batch(self, batcher: UtteranceBatcher) -> None:
+        """Decode the due batch and emit the texts in arrival order."""
+        audios, timings = batcher.take_timed()
+        started = time.monotonic()
+        texts = self._transcribe_batch(audios)
+        ended = time.monotonic()
+        self.metrics.record_decode(
+            sum(audio.shape[0] for audio in audios) / settings.audioSampleRate,
+            ended - started,
+            len(audios),
+        )
+        for text, timing in zip(texts, timings):
+            self._emit_timed(text, timing, started, ended)
+
+    def _emit_timed(
+        self,
+        text: str,
+        timing: Optional[UtteranceTiming],
+        started: float,
+        ended: float,
+        audio: Optional[numpy.ndarray] = None,
+    ) -> None:
+        """Emit ``text`` and record the utterance's latencies; ``audio`` if decoded alone."""
+        if audio is not None:
+            self.metrics.record_decode(audio.shape[0] / settings.audioSampleRate, ended - started)
+        self._emit_text(text)
+        if timing is not None:
+            timing.decode_start, timing.decode_end = started, ended
+            timing.emitted = time.monotonic()
+            self.metrics.record(timing)
 
     def _run_audio_stream(self, record_flag: List[bool]) -> None:
-        """Maintain a persistent audio input stream while ``record_flag`` is True."""
+        """Maintain a persistent audio input stream while ``record_flag`` is True.
+
+        This thread is also the consumer of ``captureRing``: it forwards
+        captured blocks to ``audioQueue`` until recording stops.
+        """
         # Import here to avoid dependency at module import time
         import sounddevice
 
@@ -212,31 +1560,76 @@ class SpeechConverter:
         if isinstance(device_choice, str) and device_choice in ("", "Default"):
             device_choice = None
 
+        block_frames = self._capture_block_frames()
+        # The lock-free callback cannot signal, so the ring is polled. Waking more
+        # often than once per block, or per VAD frame (the least the VAD acts on),
+        # would mostly find nothing new; the price is at most that long of added
+        # latency. stop() cuts the wait short.
+        vad_frame = vad_frame_samples(settings.audioSampleRate) or 0
+        poll_interval = max(block_frames, vad_frame) / settings.audioSampleRate
         with sounddevice.InputStream(
             callback=self.audioCallback,
             channels=settings.audioChannels,
             samplerate=settings.audioSampleRate,
+            blocksize=block_frames,
             device=device_choice,
         ) as stream:
             self.stream = stream
             while record_flag[0]:
-                time.sleep(0.1)
+                self._drain_capture()
+                if self._captureStop.wait(poll_interval):
+                    break
+        self._drain_capture()
 
     def start(self) -> None:
         """Start audio capture and processing threads."""
         self._update_label("Recording/Processing...")
         logging.info("Started recording")
+        self._start_metrics_reporter()
 
-        self.transcriptionThread = threading.Thread(target=self.processAudioStream, daemon=True)
+        self.transcriptionThread = threading.Thread(
+            target=self.processAudioStream, name="stt-vad", daemon=True
+        )
         self.transcriptionThread.start()
 
         self._record_flag = [True]
         self._process_flag = [True]
+        self._captureStop.clear()
+        self._start_recorder()
         self.streamThread = threading.Thread(
-            target=self._run_audio_stream, args=(self._record_flag,), daemon=True
+            target=self._run_audio_stream,
+            args=(self._record_flag,),
+            name="stt-capture",
+            daemon=True,
         )
         self.streamThread.start()
 
+    def _start_recorder(self) -> None:
+        """Save this session's raw capture input when ``audioRecordDir`` is set."""
+        if not settings.audioRecordDir or self.recorder is not None:
+            return
+        from .replay import AudioRecorder
+
+        path = os.path.join(settings.audioRecordDir, time.strftime("capture-%Y%m%d-%H%M%S.vkrec"))
+        try:
+            self.recorder = AudioRecorder(path, settings.audioSampleRate, settings.audioChannels)
+        except OSError as e:
+            logging.warning(f"Failed to start capture recording: {e}")
+
+    def _stop_recorder(self) -> None:
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def _start_metrics_reporter(self) -> None:
+        """Start periodic metrics logging (``metricsLogInterval``) once per converter."""
+        if settings.metricsLogInterval <= 0 or self.metricsReporter is not None:
+            return
+        self.metricsReporter = MetricsReporter(
+            self.metrics, settings.metricsLogInterval, settings.metricsDumpPath
+        )
+        self.metricsReporter.start()
+
     def stop(self) -> None:
         """Stop audio capture and processing threads and clean up resources."""
         logging.info("Stopping STT system")
@@ -244,6 +1637,7 @@ class SpeechConverter:
             self._record_flag[0] = False
         if hasattr(self, "_process_flag"):
             self._process_flag[0] = False
+        self._captureStop.set()
 
         if self.stream:
             try:
@@ -258,6 +1652,9 @@ class SpeechConverter:
             self.streamThread.join(timeout=2)
             logging.info("Audio thread joined")
             self.streamThread = None
+        self._stop_recorder()
+        # Capture has ended; wake the VAD stage so it sees the cleared flag now
+        self.audioQueue.put_unbounded(None)
 
         if self.transcriptionThread and self.transcriptionThread.is_alive():
             self.transcriptionThread.join(timeout=2)
@@ -0,0 +1,202 @@
+"""Zero-copy audio hand-off between threads and processes.
+
+Audio written into a :class:`SharedAudioRing` lives in a
+:mod:`multiprocessing.shared_memory` segment. Producers and consumers then
+exchange :class:`AudioRef` offsets and lengths instead of sample data: a
+consumer in the same process takes a view with :meth:`SharedAudioRing.view`,
+one in another process attaches to the segment by name and does the same.
+:class:`TransportMeter` counts the copies left on the way to the model.
+"""
+
+import sys
+import threading
+import weakref
+from multiprocessing import shared_memory
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy
+
+_ITEM = numpy.dtype(numpy.float32).itemsize
+
+
+class AudioRef(NamedTuple):
+    """Region of a :class:`SharedAudioRing`: absolute sample offset and length."""
+
+    offset: int
+    length: int
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.length
+
+
+def _attach(name: str, track: bool) -> shared_memory.SharedMemory:
+    if track:
+        return shared_memory.SharedMemory(name=name)
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Older Pythons always register the segment, and an unrelated process's
+    # resource tracker would unlink it from under its owner at exit
+    try:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+def _unlink(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+        shm.unlink()
+    except (FileNotFoundError, OSError):
+        pass
+
+
+class SharedAudioRing:
+    """Float32 ring in shared memory that hands out contiguous regions.
+
+    :meth:`write` places each block in one contiguous region (skipping the
+    tail of the buffer rather than wrapping), so any region can be viewed
+    without copying. Regions are released in order: :meth:`release` frees a
+    region and everything written before it. A full ring makes :meth:`write`
+    return None and the caller falls back to a private copy.
+
+    Created with ``name=None`` the ring owns a new segment, unlinked on
+    :meth:`close` or at exit; with a ``name`` it attaches to an existing one
+    (read side in another process). Pass ``track=False`` when attaching from a
+    process that was not started by the owner (e.g. the model server).
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None, track: bool = True):
+        self.capacity = max(1, int(capacity))
+        self.owner = name is None
+        self._finalizer: Optional[Any] = None
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.capacity * _ITEM)
+            self._finalizer = weakref.finalize(self, _unlink, self._shm)
+        else:
+            self._shm = _attach(name, track)
+        self._data: Optional[numpy.ndarray] = numpy.ndarray(
+            (self.capacity,), dtype=numpy.float32, buffer=self._shm.buf
+        )
+        self._base = self._data.__array_interface__["data"][0]
+        # Absolute sample positions; only the owning process writes and releases
+        self._write = 0
+        self._read = 0
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.full = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def used(self) -> int:
+        return self._write - self._read
+
+    def write(self, samples: numpy.ndarray) -> Optional[AudioRef]:
+        """Copy ``samples`` into a new region; None if they do not fit."""
+        assert self._data is not None
+        n = int(samples.shape[0])
+        with self._lock:
+            start = self._write
+            pos = start % self.capacity
+            if pos + n > self.capacity:
+                start += self.capacity - pos
+                pos = 0
+            if n > self.capacity or start + n - self._read > self.capacity:
+                self.full += 1
+                return None
+            self._data[pos : pos + n] = samples
+            self._write = start + n
+            self.writes += 1
+        return AudioRef(start, n)
+
+    def view(self, ref: AudioRef) -> numpy.ndarray:
+        """Zero-copy view of ``ref``; valid until the region is released."""
+        assert self._data is not None
+        pos = ref.offset % self.capacity
+        return self._data[pos : pos + ref.length]
+
+    def ref_of(self, array: numpy.ndarray) -> Optional[AudioRef]:
+        """The live region ``array`` views, or None if it is not in this ring."""
+        if (
+            array.dtype != numpy.float32
+            or array.ndim != 1
+            or not array.flags.c_contiguous
+            or array.size == 0
+        ):
+            return None
+        delta = array.__array_interface__["data"][0] - self._base
+        if delta < 0 or delta % _ITEM or delta // _ITEM + array.size > self.capacity:
+            return None
+        pos = delta // _ITEM
+        with self._lock:
+            # The live window spans at most one capacity, so the offset is unique
+            offset = pos + self.capacity * ((self._read - pos + self.capacity - 1) // self.capacity)
+            if offset + array.size > self._write:
+                return None
+        return AudioRef(offset, int(array.size))
+
+    def release(self, ref: AudioRef) -> None:
+        """Free ``ref`` and every region written before it."""
+        with self._lock:
+            self._read = max(self._read, min(ref.end, self._write))
+
+    def release_all(self) -> None:
+        with self._lock:
+            self._read = self._write
+
+    def close(self) -> None:
+        """Detach; the owner also unlinks the segment."""
+        self._data = None
+        if self._finalizer is not None:
+            self._finalizer()
+        else:
+            self._shm.close()
+
+
+class TransportMeter:
+    """Counts sample copies and by-reference hand-offs on the audio path.
+
+    ``audio`` is called once per captured block so totals can be normalised
+    per second of audio (see :meth:`stats`).
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.copies = 0
+        self.bytes_copied = 0
+        self.refs = 0
+        self.bytes_referenced = 0
+        self.audio_samples = 0
+
+    def copied(self, nbytes: int) -> None:
+        self.copies += 1
+        self.bytes_copied += int(nbytes)
+
+    def referenced(self, nbytes: int) -> None:
+        self.refs += 1
+        self.bytes_referenced += int(nbytes)
+
+    def audio(self, samples: int) -> None:
+        self.audio_samples += int(samples)
+
+    def stats(self, sample_rate: int) -> Dict[str, float]:
+        """Totals plus copies and bytes copied per second of captured audio."""
+        seconds = self.audio_samples / sample_rate if sample_rate > 0 else 0.0
+        per_second = 1.0 / seconds if seconds > 0 else 0.0
+        return {
+            "audio_seconds": seconds,
+            "copies": self.copies,
+            "bytes_copied": self.bytes_copied,
+            "refs": self.refs,
+            "bytes_referenced": self.bytes_referenced,
+            "copies_per_audio_second": self.copies * per_second,
+            "bytes_copied_per_audio_second": self.bytes_copied * per_second,
+        }
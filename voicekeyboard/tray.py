@@ -4,6 +4,7 @@ import threading
 from PIL import Image, ImageDraw
 from pystray import Icon, Menu, MenuItem
 
+from . import profiler
 from .settings import settings
 
 
@@ -31,6 +32,7 @@ class TrayIconManager:
     """Manage the pystray icon lifecycle and menu wiring."""
 
     icon = None
+    statusText: str = ""
 
     @staticmethod
     def onClick(icon, item):
@@ -43,15 +45,49 @@ class TrayIconManager:
         icon.visible = True
 
     @staticmethod
-    def menuInit(open_settings_cb, open_preferences_cb, restart_cb, exit_cb, toggle_window_cb=None):
+    def titleText() -> str:
+        """Menu title, suffixed with the current status when one is set."""
+        if TrayIconManager.statusText:
+            return f"{settings.labelTrayMenuTitle} ({TrayIconManager.statusText})"
+        return settings.labelTrayMenuTitle
+
+    @staticmethod
+    def setStatus(text: str) -> None:
+        """Show ``text`` (e.g. model readiness) in the tooltip and menu title."""
+        TrayIconManager.statusText = text
+        icon = TrayIconManager.icon
+        if icon is None:
+            return
+        try:
+            icon.title = (
+                f"{settings.labelTrayIconName} - {text}" if text else settings.labelTrayIconName
+            )
+            icon.update_menu()
+        except Exception as error:
+            logging.debug(f"Failed to update tray status: {error}")
+
+    @staticmethod
+    def menuInit(
+        open_settings_cb,
+        open_preferences_cb,
+        restart_cb,
+        exit_cb,
+        toggle_window_cb=None,
+        profile_cb=None,
+    ):
         """Build the tray menu with injected callbacks for actions."""
         if toggle_window_cb is None:
 
             def toggle_window_cb(*_args, **_kwargs):
                 return None
 
+        if profile_cb is None:
+
+            def profile_cb(*_args, **_kwargs):
+                profiler.toggle()
+
         return Menu(
-            MenuItem(text=settings.labelTrayMenuTitle, action=lambda *_: None),
+            MenuItem(text=lambda _item: TrayIconManager.titleText(), action=lambda *_: None),
             MenuItem(text=settings.labelTrayMenuDivider1, action=lambda *_: None, enabled=False),
             MenuItem(
                 text=settings.labelTrayMenuSettings,
@@ -59,6 +95,11 @@ class TrayIconManager:
                     MenuItem(text=settings.labelTrayMenuToggleWindow, action=toggle_window_cb),
                     MenuItem(text=settings.labelTrayMenuOpenSettings, action=open_settings_cb),
                     MenuItem(text=settings.labelTrayMenuEditHotkeys, action=open_preferences_cb),
+                    MenuItem(
+                        text=settings.labelTrayMenuProfile,
+                        action=profile_cb,
+                        checked=lambda _item: profiler.active(),
+                    ),
                 ),
             ),
             MenuItem(text=settings.labelTrayMenuRestart, action=restart_cb),
@@ -66,7 +107,14 @@ class TrayIconManager:
         )
 
     @staticmethod
-    def run(open_settings_cb, open_preferences_cb, restart_cb, exit_cb, toggle_window_cb):
+    def run(
+        open_settings_cb,
+        open_preferences_cb,
+        restart_cb,
+        exit_cb,
+        toggle_window_cb,
+        profile_cb=None,
+    ):
         """Run the tray loop in a blocking manner (to be called on a thread)."""
         menu = TrayIconManager.menuInit(
             open_settings_cb,
@@ -74,6 +122,7 @@ class TrayIconManager:
             restart_cb,
             exit_cb,
             toggle_window_cb,
+            profile_cb,
         )
         TrayIconManager.icon = Icon(
             settings.labelTrayIconTitle,
@@ -84,13 +133,28 @@ class TrayIconManager:
         TrayIconManager.icon.run(setup=TrayIconManager.setup)
 
     @staticmethod
-    def start(open_settings_cb, open_preferences_cb, restart_cb, exit_cb, toggle_window_cb):
+    def start(
+        open_settings_cb,
+        open_preferences_cb,
+        restart_cb,
+        exit_cb,
+        toggle_window_cb,
+        profile_cb=None,
+    ):
         """Spawn a daemon thread to start the tray icon if enabled in settings."""
         if not settings.trayIconShow:
             return None
         trayThread = threading.Thread(
             target=TrayIconManager.run,
-            args=(open_settings_cb, open_preferences_cb, restart_cb, exit_cb, toggle_window_cb),
+            args=(
+                open_settings_cb,
+                open_preferences_cb,
+                restart_cb,
+                exit_cb,
+                toggle_window_cb,
+                profile_cb,
+            ),
+            name="tray",
             daemon=settings.trayIconDaemon,
         )
         trayThread.start()
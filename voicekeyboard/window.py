@@ -1,25 +1,100 @@
 import logging
+import math
 import os
 import threading
 import time
-from typing import Optional
+import zlib
+from typing import Dict, Optional, Tuple
 
-from PIL import Image, ImageFilter
+import numpy
 from PyQt6 import QtCore
 from PyQt6.QtCore import QPoint, QRect, QSize, Qt, QTimer
-from PyQt6.QtGui import QImage, QPainter, QPixmap
+from PyQt6.QtGui import QImage, QPainter, QPixmap, QScreen
 from PyQt6.QtWidgets import QApplication, QLabel, QMainWindow
 
 from .settings import settings
 
 windowLabel: Optional[QLabel] = None
 window: Optional[QMainWindow] = None
+windowThread: Optional[threading.Thread] = None
+# Set once the label exists, or when the UI thread ends without creating it
+labelReady = threading.Event()
+# Work done on the Qt thread, read by the metrics exporter
+windowStats: Dict[str, float] = {
+    "label_updates": 0,
+    "repaints": 0,
+    "repaint_seconds": 0.0,
+    "last_repaint_seconds": 0.0,
+    "blur_frames": 0,
+    "blur_skipped": 0,
+    "blur_seconds": 0.0,
+}
 
 
 class LabelUpdater(QtCore.QObject):
-    """Signal-based helper to update the UI label from worker threads."""
+    """Signal-based helper to update the UI label from worker threads.
+
+    Worker threads call :meth:`post`; only the latest pending text is kept and
+    the window flushes it at most once per ``windowLabelUpdateIntervalMs``.
+    ``textChanged`` is emitted only when the text actually changed.
+    """
 
     textChanged = QtCore.pyqtSignal(str)
+    # Asks the window to schedule a flush; emitted once per batch of posts
+    flushRequested = QtCore.pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending: Optional[str] = None
+        self._shown: Optional[str] = None
+        self._scheduled = False
+        self._lastFlush = 0.0
+        self.posted = 0
+        self.coalesced = 0
+        self.unchanged = 0
+
+    def post(self, text: str) -> None:
+        """Queue ``text`` for the label from any thread; never blocks on the UI.
+
+        Does nothing without a running window (serve, batch, replay), where no
+        flush would ever pick the text up.
+        """
+        if uiInvoker is None:
+            return
+        with self._lock:
+            self.posted += 1
+            if self._pending is not None:
+                # The previous text was never shown; it is simply replaced
+                self.coalesced += 1
+            self._pending = text
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.flushRequested.emit()
+
+    def delay_ms(self) -> int:
+        """Milliseconds until the next flush keeps the configured update rate."""
+        interval = settings.windowLabelUpdateIntervalMs / 1000.0
+        return max(0, int((self._lastFlush + interval - time.monotonic()) * 1000))
+
+    def flush(self) -> None:
+        """Show the pending text, if it differs from the label (UI thread)."""
+        with self._lock:
+            text, self._pending = self._pending, None
+            self._scheduled = False
+            self._lastFlush = time.monotonic()
+            if text is None:
+                return
+            if text == self._shown:
+                self.unchanged += 1
+                return
+            self._shown = text
+        self.textChanged.emit(text)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"posted": self.posted, "coalesced": self.coalesced, "unchanged": self.unchanged}
 
 
 labelUpdater = LabelUpdater()
@@ -50,6 +125,128 @@ class UiInvoker(QtCore.QObject):
 uiInvoker: Optional[UiInvoker] = None
 
 
+def _pixels(image: QImage) -> numpy.ndarray:
+    """Writable ``(height, width, 4)`` view of a 32-bit ``image``'s pixels."""
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    rows = numpy.frombuffer(bits, numpy.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, : image.width() * 4].reshape(image.height(), image.width(), 4)
+
+
+class BackgroundBlur:
+    """Blurred copy of the screen region behind the overlay.
+
+    Only the window rectangle plus a margin for the blur kernel is grabbed.
+    The capture is downscaled by ``downscale``, blurred in place with two box
+    passes (close to a Gaussian of ``strength`` pixels) and scaled back up
+    smoothly. A CRC of the margin band -- the part of the capture the overlay
+    does not cover itself -- tells whether the background changed; if not,
+    :meth:`refresh` keeps the cached :attr:`frame`.
+    """
+
+    def __init__(self, strength: float, downscale: int = 4):
+        strength = max(0.0, float(strength))
+        self.downscale = max(1, int(downscale))
+        self.margin = max(self.downscale, int(math.ceil(3 * strength)))
+        sigma = strength / self.downscale
+        # Two box passes of width 2r+1 have the variance of a Gaussian with this sigma
+        self.radius = max(1, int(round((math.sqrt(6 * sigma * sigma + 1) - 1) / 2)))
+        self.frame: Optional[QPixmap] = None
+        # Top-left of the window rectangle within ``frame``
+        self.offset = QPoint()
+        self._key: Optional[Tuple[int, ...]] = None
+        self._sums: Optional[numpy.ndarray] = None
+        self._box: Optional[numpy.ndarray] = None
+
+    def refresh(self, screen: QScreen, geometry: QRect) -> bool:
+        """Grab and blur the background of ``geometry``; False if it is unchanged."""
+        bounds = screen.geometry()
+        m = self.margin
+        region = geometry.adjusted(-m, -m, m, m).intersected(bounds)
+        if region.isEmpty():
+            return False
+        grab = screen.grabWindow(
+            0, region.x() - bounds.x(), region.y() - bounds.y(), region.width(), region.height()
+        )
+        image = grab.toImage().convertToFormat(QImage.Format.Format_ARGB32)
+        if image.isNull():
+            return False
+        d = self.downscale
+        small = image.scaled(
+            max(1, image.width() // d),
+            max(1, image.height() // d),
+            Qt.AspectRatioMode.IgnoreAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+        pixels = _pixels(small)
+        inner = geometry.translated(-region.x(), -region.y())
+        key = (
+            region.x(),
+            region.y(),
+            region.width(),
+            region.height(),
+            self._band_crc(pixels, inner),
+        )
+        if key == self._key and self.frame is not None:
+            return False
+        self._key = key
+        self._blur(pixels)
+        self.frame = QPixmap.fromImage(
+            small.scaled(
+                region.size(),
+                Qt.AspectRatioMode.IgnoreAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        )
+        self.offset = QPoint(inner.x(), inner.y())
+        return True
+
+    def _band_crc(self, pixels: numpy.ndarray, inner: QRect) -> int:
+        d = self.downscale
+        height, width = pixels.shape[:2]
+        top = min(height, max(0, inner.top() // d))
+        bottom = min(height, max(top, -(-(inner.bottom() + 1) // d)))
+        left = min(width, max(0, inner.left() // d))
+        right = min(width, max(left, -(-(inner.right() + 1) // d)))
+        crc = 0
+        for band in (
+            pixels[:top],
+            pixels[bottom:],
+            pixels[top:bottom, :left],
+            pixels[top:bottom, right:],
+        ):
+            crc = zlib.crc32(band.tobytes(), crc)
+        return crc
+
+    def _blur(self, pixels: numpy.ndarray) -> None:
+        """Two box-blur passes over ``pixels`` in place, via a reused summed-area table."""
+        height, width = pixels.shape[:2]
+        r = self.radius
+        k = 2 * r + 1
+        shape = (height + 2 * r + 1, width + 2 * r + 1, 4)
+        if self._sums is None or self._sums.shape != shape:
+            # Row and column 0 stay zero: the summed-area table's origin
+            self._sums = numpy.zeros(shape, numpy.float32)
+            self._box = numpy.empty((height, width, 4), numpy.float32)
+        sums, box = self._sums, self._box
+        assert box is not None
+        for _ in range(2):
+            # Copy in with edge pixels repeated r times on every side
+            sums[1 + r : 1 + r + height, 1 + r : 1 + r + width] = pixels
+            sums[1 : 1 + r, 1 + r : 1 + r + width] = pixels[:1]
+            sums[1 + r + height :, 1 + r : 1 + r + width] = pixels[-1:]
+            sums[1:, 1 : 1 + r] = sums[1:, 1 + r : 2 + r]
+            sums[1:, 1 + r + width :] = sums[1:, r + width : 1 + r + width]
+            numpy.cumsum(sums[1:], axis=0, out=sums[1:])
+            numpy.cumsum(sums[:, 1:], axis=1, out=sums[:, 1:])
+            numpy.subtract(sums[k:, k:], sums[:height, k:], out=box)
+            box -= sums[k:, :width]
+            box += sums[:height, :width]
+            box *= 1.0 / (k * k)
+            numpy.rint(box, out=box)
+            numpy.copyto(pixels, box, casting="unsafe")
+
+
 class WindowManager(QMainWindow):
     """Main application window (frameless label overlay) with optional blur."""
 
@@ -79,6 +276,17 @@ class WindowManager(QMainWindow):
         windowLabel.setGeometry(2, 2, 200, 50)
         windowLabel.setStyleSheet(self.__initWindowLabelStyleBuilder())
         labelUpdater.textChanged.connect(windowLabel.setText)
+        labelReady.set()
+        labelUpdater.textChanged.connect(self.__countLabelUpdate)
+        labelUpdater.flushRequested.connect(self.__scheduleLabelFlush)
+        # Show text posted before the window existed
+        self.__scheduleLabelFlush()
+
+    def __countLabelUpdate(self, _text: str):
+        windowStats["label_updates"] += 1
+
+    def __scheduleLabelFlush(self):
+        QTimer.singleShot(labelUpdater.delay_ms(), labelUpdater.flush)
 
     def __initWindowLabelStyleBuilder(self):
         return """
@@ -87,12 +295,30 @@ class WindowManager(QMainWindow):
         """
 
     def __initWindowUpdater(self):
-        """Enable periodic repaint when background blur is active."""
+        """Refresh the blurred background periodically when background blur is active."""
+        self.backgroundBlur: Optional[BackgroundBlur] = None
         if settings.windowBlurBackgroundEnabled:
+            self.backgroundBlur = BackgroundBlur(
+                settings.windowBlurBackgroundStrength, settings.windowBlurBackgroundDownscale
+            )
             self.timer: QTimer = QTimer(self)
-            self.timer.timeout.connect(self.update)
+            self.timer.timeout.connect(self.__refreshBackground)
             self.timer.start(settings.windowBlurBackgroundPeriod)
 
+    def __refreshBackground(self):
+        """Re-blur the background and repaint, unless the region behind is unchanged."""
+        screen = QApplication.primaryScreen()
+        if screen is None or self.backgroundBlur is None:
+            return
+        started = time.perf_counter()
+        changed = self.backgroundBlur.refresh(screen, self.geometry())
+        windowStats["blur_seconds"] += time.perf_counter() - started
+        if changed:
+            windowStats["blur_frames"] += 1
+            self.update()
+        else:
+            windowStats["blur_skipped"] += 1
+
     def __initRestoreWindow(self):
         """Move window to last known position if restore is enabled."""
         if settings.windowPosRestoreOnStartup:
@@ -140,36 +366,17 @@ class WindowManager(QMainWindow):
             windowFlags |= Qt.WindowType.FramelessWindowHint
         return windowFlags
 
-    def applyBlur(self, pixmap):
-        """Apply Gaussian blur to the captured background pixmap."""
-        image = pixmap.toImage()
-        if image.format() != QImage.Format.Format_ARGB32:
-            image = image.convertToFormat(QImage.Format.Format_ARGB32)
-
-        width, height = image.width(), image.height()
-        imageData: bytes = image.bits().asstring(width * height * 4)
-        imageMode: str = "RGBA"
-        pilImage = Image.frombytes(imageMode, (width, height), imageData)
-        blurredImage = pilImage.filter(
-            ImageFilter.GaussianBlur(settings.windowBlurBackgroundStrength)
-        )
-        blurredImageData: bytes = blurredImage.tobytes()
-        qimage: QImage = QImage(blurredImageData, width, height, QImage.Format.Format_ARGB32)
-        return QPixmap.fromImage(qimage)
-
     def paintEvent(self, event):
-        if settings.windowBlurBackgroundEnabled:
+        blur = self.backgroundBlur
+        if blur is not None and blur.frame is not None:
+            started = time.perf_counter()
             painter: QPainter = QPainter(self)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
-            screen = QApplication.primaryScreen()
-            if screen is None:
-                return
-            screenshot: QPixmap = screen.grabWindow(0)  # type: ignore[arg-type]
-            pixmap: QPixmap = screenshot.copy(self.geometry())
-            blurredPixmap: QPixmap = self.applyBlur(pixmap)
-            painter.drawPixmap(0, 0, blurredPixmap)
+            painter.drawPixmap(self.rect(), blur.frame, QRect(blur.offset, self.size()))
             painter.end()
+            elapsed = time.perf_counter() - started
+            windowStats["repaints"] += 1
+            windowStats["repaint_seconds"] += elapsed
+            windowStats["last_repaint_seconds"] = elapsed
 
     def eventFilter(self, source, event):
         """Forward mouse press events so the window can be dragged when enabled."""
@@ -230,29 +437,35 @@ class WindowManager(QMainWindow):
         """Create Qt application and start the window in the UI thread."""
         global window
         global uiInvoker
-        application: QApplication = QApplication([])
-        uiInvoker = UiInvoker()
-        window = WindowManager()
-        if settings.windowShow:
-            window.show()
-
-        # Auto-close for CI smoke tests
         try:
-            ms = int(os.getenv("VOICEKB_AUTOCLOSE_MS", "0"))
-        except ValueError:
-            ms = 0
-        if ms > 0:
-            QTimer.singleShot(ms, application.quit)
-
-        application.exec()
+            application: QApplication = QApplication([])
+            uiInvoker = UiInvoker()
+            window = WindowManager()
+            if settings.windowShow:
+                window.show()
+
+            # Auto-close for CI smoke tests
+            try:
+                ms = int(os.getenv("VOICEKB_AUTOCLOSE_MS", "0"))
+            except ValueError:
+                ms = 0
+            if ms > 0:
+                QTimer.singleShot(ms, application.quit)
+
+            application.exec()
+        finally:
+            # Never leave wait_label() blocked on a UI that failed to start
+            labelReady.set()
 
     @staticmethod
     def start():
         """Spawn a daemon thread to run the Qt UI when enabled in settings."""
+        global windowThread
         if not settings.windowShow:
             return None
         windowThread = threading.Thread(
             target=WindowManager.run,
+            name="qt-window",
             daemon=settings.windowDaemon,
         )
         windowThread.start()
@@ -260,11 +473,10 @@ class WindowManager(QMainWindow):
     @staticmethod
     def wait_label():
         """Wait until the global label widget is created (used at startup)."""
-        global windowLabel
-        while True:
-            if windowLabel is not None:
-                return
-            time.sleep(0.1)
+        if windowThread is None:
+            # The window is disabled; no label will ever be created
+            return
+        labelReady.wait()
 
 
 def invoke_in_ui(fn) -> None: